@@ -15,6 +15,16 @@ __version__ = "1.0.2"
 from . import load
 from . import parse
 from . import utils
+from . import database
+from . import interning
+from . import codec
+from . import translate
+from . import geodesy
+from . import kernels
+from . import tiles
+from . import utm
+from . import transform
+from . import gridshift
 from .elements.cs import CS, GeogCS, ProjCS
 
 
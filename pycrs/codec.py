@@ -0,0 +1,298 @@
+"""
+Compact encoding of CS instances, as nested tuples of registry ids and values, or
+as binary strings, for fast pickling and for storing many coordinate systems.
+"""
+
+import inspect
+import struct
+import threading
+import zlib
+
+from .elements import cs as containers
+from .elements import datums
+from .elements import directions
+from .elements import ellipsoids
+from .elements import parameters
+from .elements import projections
+from .elements import units
+from . import interning
+
+
+#################
+# REGISTRY
+#################
+
+_MODULES = (containers, datums, directions, ellipsoids, parameters, projections, units)
+
+_ids = {}
+_classes = {}
+
+def _class_key(cls):
+    return "%s.%s" % (cls.__module__.split(".")[-1], cls.__name__)
+
+def _build_registry():
+    """
+    Assigns each element class an id from a checksum of its module and class name,
+    so that the ids stay the same across versions as long as the class is not renamed.
+    """
+    for module in _MODULES:
+        for item in vars(module).values():
+            if inspect.isclass(item) and item.__module__ == module.__name__:
+                key = _class_key(item)
+                classid = zlib.crc32(key.encode("utf8")) & 0xffffffff
+                if _classes.get(classid, item) is not item:
+                    raise Exception("Registry id collision between %s and %s" % (key, _class_key(_classes[classid])))
+                _ids[item] = classid
+                _classes[classid] = item
+
+def class_id(cls):
+    """
+    Returns the registry id of an element class.
+    """
+    if not _ids:
+        _build_registry()
+    try:
+        return _ids[cls]
+    except KeyError:
+        raise TypeError("%s is not a registered element class" % _class_key(cls))
+
+def id_class(classid):
+    """
+    Returns the element class with the given registry id.
+    """
+    if not _classes:
+        _build_registry()
+    return _classes[classid]
+
+
+#################
+# TUPLES
+#################
+
+# marks a field that is left at its class default
+DEFAULT = Ellipsis
+
+def _encode_element(obj):
+    if obj is None:
+        return None
+    cls = obj.__class__
+    classid = class_id(cls)
+    if isinstance(obj, parameters.DatumShift):
+        return (classid, tuple(obj.value), obj._text)
+    elif isinstance(obj, parameters.Parameter):
+        return (classid, obj.value, obj._text)
+    elif isinstance(obj, (datums.DatumName, ellipsoids.EllipsoidName, projections.ProjName, units.UnitName)):
+        return (classid, obj.proj4, obj.ogc_wkt, obj.esri_wkt, obj.projjson)
+    else:
+        # slotted elements with class defaults
+        encoded = [classid]
+        for field in cls._fields:
+            value = getattr(obj, field)
+            if value is cls._defaults.get(field):
+                encoded.append(DEFAULT)
+            else:
+                encoded.append(_encode_element(value))
+        return tuple(encoded)
+
+def _decode_element(encoded):
+    if encoded is None:
+        return None
+    cls = id_class(encoded[0])
+    if issubclass(cls, parameters.DatumShift):
+        obj = cls.__new__(cls)
+        obj.value = list(encoded[1])
+        obj._text = encoded[2]
+    elif issubclass(cls, parameters.Parameter):
+        obj = cls.__new__(cls)
+        obj.value = encoded[1]
+        obj._text = encoded[2]
+    elif issubclass(cls, (datums.DatumName, ellipsoids.EllipsoidName, projections.ProjName, units.UnitName)):
+        obj = cls(*encoded[1:])
+    else:
+        obj = cls.__new__(cls)
+        for field, value in zip(cls._fields, encoded[1:]):
+            if value is not DEFAULT:
+                setattr(obj, field, _decode_element(value))
+    return obj
+
+def _encode_axes(twin_ax):
+    return (class_id(twin_ax[0].__class__), class_id(twin_ax[1].__class__))
+
+def _decode_axes(encoded):
+    return (id_class(encoded[0])(), id_class(encoded[1])())
+
+def _encode_geogcs(crs):
+    return (class_id(crs.__class__), crs.name, _encode_element(crs.datum), _encode_element(crs.prime_mer),
+            _encode_element(crs.angunit), _encode_axes(crs.twin_ax))
+
+def _decode_geogcs(encoded):
+    classid, name, datum, prime_mer, angunit, twin_ax = encoded
+    return id_class(classid)(name, _decode_element(datum), _decode_element(prime_mer),
+                             _decode_element(angunit), _decode_axes(twin_ax))
+
+def to_tuple(crs):
+    """
+    Encodes a CS instance as a compact tuple of registry ids, numbers and strings.
+
+    Arguments:
+
+    - **crs**: The GeogCS or ProjCS instance to encode.
+
+    Returns:
+
+    - A nested tuple that can be decoded again with from_tuple().
+    """
+    if isinstance(crs, containers.ProjCS):
+        return (class_id(crs.__class__), crs.name, _encode_geogcs(crs.geogcs), _encode_element(crs.proj),
+                tuple([_encode_element(param) for param in crs.params]), _encode_element(crs.unit),
+                _encode_axes(crs.twin_ax))
+    else:
+        return _encode_geogcs(crs)
+
+def _from_tuple_raw(encoded):
+    # always a new CS instance, as needed for copies and unpickling
+    cls = id_class(encoded[0])
+    if issubclass(cls, containers.ProjCS):
+        classid, name, geogcs, proj, params, unit, twin_ax = encoded
+        return cls(name, _decode_geogcs(geogcs), _decode_element(proj),
+                   [_decode_element(param) for param in params], _decode_element(unit),
+                   _decode_axes(twin_ax))
+    else:
+        return _decode_geogcs(encoded)
+
+def from_tuple(encoded, intern=False):
+    """
+    Decodes a CS instance from the tuple returned by to_tuple().
+
+    Arguments:
+
+    - **encoded**: The encoded tuple.
+    - **intern** (optional): If True, returns the canonical instance from the interning
+        pool when interning is enabled, see pycrs.interning. Otherwise always returns a
+        new instance (default).
+
+    Returns:
+
+    - A CS instance of the indicated type.
+    """
+    crs = _from_tuple_raw(encoded)
+    if intern:
+        return interning._parsed(crs)
+    return crs
+
+
+#################
+# BINARY
+#################
+
+_MAGIC = b"PYCRS"
+# incremented whenever the layout of the encoded tuples changes, so that strings encoded
+# with an older layout are rejected rather than decoded into the wrong elements
+_VERSION = 2
+
+_NONE = b"N"
+_DEFAULT = b"D"
+_INT = b"I"
+_FLOAT = b"F"
+_STRING = b"S"
+_TUPLE = b"T"
+
+_COUNT = struct.Struct("<H")
+_DOUBLE = struct.Struct("<d")
+_LONG = struct.Struct("<q")
+
+# decoded tuples of recently seen binary strings, since stores tend to repeat the same few crs
+_decoded = {}
+_DECODED_MAX = 4096
+_decoded_lock = threading.Lock()
+
+def _pack(value, out):
+    if value is None:
+        out.append(_NONE)
+    elif value is DEFAULT:
+        out.append(_DEFAULT)
+    elif isinstance(value, tuple):
+        out.append(_TUPLE + _COUNT.pack(len(value)))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, float):
+        out.append(_FLOAT + _DOUBLE.pack(value))
+    elif isinstance(value, int):
+        out.append(_INT + _LONG.pack(value))
+    else:
+        text = value.encode("utf8")
+        out.append(_STRING + _COUNT.pack(len(text)) + text)
+
+def _unpack(data, pos):
+    tag = data[pos:pos+1]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    elif tag == _DEFAULT:
+        return DEFAULT, pos
+    elif tag == _TUPLE:
+        count, = _COUNT.unpack_from(data, pos)
+        pos += 2
+        items = []
+        for _ in range(count):
+            item, pos = _unpack(data, pos)
+            items.append(item)
+        return tuple(items), pos
+    elif tag == _FLOAT:
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    elif tag == _INT:
+        return _LONG.unpack_from(data, pos)[0], pos + 8
+    elif tag == _STRING:
+        length, = _COUNT.unpack_from(data, pos)
+        pos += 2
+        return data[pos:pos+length].decode("utf8"), pos + length
+    else:
+        raise ValueError("Invalid tag %r at position %i of the encoded crs" % (tag, pos - 1))
+
+def encode(crs):
+    """
+    Encodes a CS instance as a compact binary string, eg for storing in a database
+    or a columnar file format.
+
+    Arguments:
+
+    - **crs**: The GeogCS or ProjCS instance to encode.
+
+    Returns:
+
+    - A bytes string that can be decoded again with decode().
+    """
+    out = [_MAGIC, struct.pack("<B", _VERSION)]
+    _pack(to_tuple(crs), out)
+    return b"".join(out)
+
+def decode(data):
+    """
+    Decodes a CS instance from the binary string returned by encode().
+
+    Arguments:
+
+    - **data**: The encoded bytes, bytearray or memoryview.
+
+    Returns:
+
+    - A CS instance of the indicated type, or the canonical instance from the interning pool
+        when interning is enabled.
+    """
+    data = bytes(data)
+    with _decoded_lock:
+        encoded = _decoded.get(data)
+    if encoded is None:
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not an encoded crs")
+        version, = struct.unpack_from("<B", data, len(_MAGIC))
+        if version != _VERSION:
+            raise ValueError("Unsupported crs encoding version %i" % version)
+        encoded, pos = _unpack(data, len(_MAGIC) + 1)
+        with _decoded_lock:
+            if len(_decoded) >= _DECODED_MAX:
+                _decoded.clear()
+            _decoded[data] = encoded
+    # decoding from a store is like parsing, so interning applies
+    return from_tuple(encoded, intern=True)
+
@@ -0,0 +1,549 @@
+"""
+Offline lookup tables for crs codes and their areas of use, so that common
+lookups can be answered locally instead of going online.
+"""
+
+import io
+import mmap
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+#################
+# AREAS OF USE
+#################
+
+KINDS = {"other": 0, "geographic": 1, "projected": 2}
+
+AREA_DTYPE = [("codetype", "U8"),
+              ("code", "i8"),
+              ("kind", "u1"),
+              ("west", "f8"),
+              ("south", "f8"),
+              ("east", "f8"),
+              ("north", "f8")]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The area of use index requires numpy to be installed")
+
+def _kind_id(kind):
+    "convert a kind name like 'projected' or an epsg.io kind like 'CRS-PROJCRS' to its kind id"
+    if kind is None:
+        return None
+    kind = kind.lower()
+    if kind in KINDS:
+        return KINDS[kind]
+    elif "geog" in kind:
+        return KINDS["geographic"]
+    elif "proj" in kind:
+        return KINDS["projected"]
+    else:
+        return KINDS["other"]
+
+def _lon_within(inner_west, inner_east, outer_west, outer_east):
+    """
+    Vectorized test of whether longitude ranges are within other longitude ranges.
+    Ranges where west > east are taken to cross the antimeridian.
+    Points can be tested by giving the same value for the inner west and east.
+    """
+    inner_east = np.where(inner_west > inner_east, inner_east + 360, inner_east)
+    outer_east = np.where(outer_west > outer_east, outer_east + 360, outer_east)
+    result = np.zeros(np.broadcast(inner_west, outer_west).shape, dtype=bool)
+    for shift in (-360, 0, 360):
+        result |= (inner_west + shift >= outer_west) & (inner_east + shift <= outer_east)
+    return result
+
+def _lon_overlaps(west1, east1, west2, east2):
+    """
+    Vectorized test of whether longitude ranges overlap other longitude ranges.
+    Ranges where west > east are taken to cross the antimeridian.
+    """
+    east1 = np.where(west1 > east1, east1 + 360, east1)
+    east2 = np.where(west2 > east2, east2 + 360, east2)
+    result = np.zeros(np.broadcast(west1, west2).shape, dtype=bool)
+    for shift in (-360, 0, 360):
+        result |= (west1 + shift <= east2) & (east1 + shift >= west2)
+    return result
+
+
+class AreaIndex:
+    """
+    A grid index over the area of use bounding boxes of a collection of crs codes,
+    for finding which crs are valid at a set of locations.
+
+    Attributes:
+
+    - **records**: A numpy structured array with one record per crs, with the fields
+        codetype, code, kind, west, south, east, north.
+    - **cellsize**: The size of each grid cell in degrees.
+    """
+
+    def __init__(self, records, cellsize=5.0, max_cells=64):
+        """
+        Arguments:
+
+        - **records**: A numpy structured array with the fields listed in pycrs.database.AREA_DTYPE,
+                    or a sequence of tuples in the same order. Bounding boxes are given in
+                    longitude-latitude degrees, and boxes whose west is larger than their east
+                    are taken to cross the antimeridian.
+        - **cellsize** (optional): The size of each grid cell in degrees (defaults to 5).
+        - **max_cells** (optional): Boxes that cover more than this number of cells are
+                    not registered with each cell, but checked for every query instead (defaults to 64).
+        """
+        _require_numpy()
+        self.records = np.asarray(records, dtype=AREA_DTYPE)
+        self.cellsize = float(cellsize)
+        self._ncols = int(np.ceil(360 / self.cellsize))
+        self._nrows = int(np.ceil(180 / self.cellsize))
+        self._areas = self._get_areas()
+
+        # register each record with the grid cells it covers
+        cells = {}
+        broad = []
+        for i,rec in enumerate(self.records):
+            cols = self._cols_between(rec["west"], rec["east"])
+            rows = range(self._row(rec["south"]), self._row(rec["north"]) + 1)
+            if len(cols) * len(rows) > max_cells:
+                broad.append(i)
+                continue
+            for row in rows:
+                for col in cols:
+                    cells.setdefault(row * self._ncols + col, []).append(i)
+        self._broad = np.array(broad, dtype=np.intp)
+        self._cells = dict((cell, np.union1d(ids, self._broad).astype(np.intp))
+                           for cell,ids in cells.items())
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_search_results(cls, results, codetype="epsg", **kwargs):
+        """
+        Creates the index from an iterable of result dicts, such as those yielded by
+        pycrs.utils.search(). Each result must have a 'code', a 'kind', and a 'bbox'
+        given as [north, west, south, east], as is done by epsg.io. Results without a
+        bbox are skipped.
+
+        Arguments:
+
+        - **results**: Iterable of result dicts.
+        - **codetype** (optional): The codetype of the result codes (defaults to "epsg").
+        - Any remaining keyword arguments are passed on to the AreaIndex constructor.
+        """
+        records = []
+        for result in results:
+            bbox = result.get("bbox")
+            if not bbox:
+                continue
+            north, west, south, east = bbox
+            records.append((codetype, int(result["code"]), _kind_id(result.get("kind")),
+                            west, south, east, north))
+        return cls(records, **kwargs)
+
+    def save(self, savepath):
+        """
+        Saves the index records to a numpy .npy file, which can later be loaded with
+        pycrs.database.load_area_index().
+
+        Arguments:
+
+        - **savepath**: The filepath to save to, including the ".npy" extension.
+        """
+        np.save(savepath, self.records)
+
+    def _get_areas(self):
+        recs = self.records
+        east = np.where(recs["west"] > recs["east"], recs["east"] + 360, recs["east"])
+        return (east - recs["west"]) * (recs["north"] - recs["south"])
+
+    def _col(self, lon):
+        return min(max(int((lon + 180) // self.cellsize), 0), self._ncols - 1)
+
+    def _row(self, lat):
+        return min(max(int((lat + 90) // self.cellsize), 0), self._nrows - 1)
+
+    def _cols_between(self, west, east):
+        first, last = self._col(west), self._col(east)
+        if west > east:
+            # crosses the antimeridian
+            return list(range(first, self._ncols)) + list(range(0, last + 1))
+        return list(range(first, last + 1))
+
+    def _candidates(self, cell, kind):
+        ids = self._cells.get(cell, self._broad)
+        if kind is not None:
+            ids = ids[self.records["kind"][ids] == kind]
+        return ids
+
+    def _iter_cells(self, lons, lats, kind):
+        "groups the points by grid cell and yields the point indices and candidate record ids of each cell"
+        cols = np.clip(((lons + 180) // self.cellsize).astype(np.intp), 0, self._ncols - 1)
+        rows = np.clip(((lats + 90) // self.cellsize).astype(np.intp), 0, self._nrows - 1)
+        cells = rows * self._ncols + cols
+        order = np.argsort(cells, kind="mergesort")
+        uniq, starts = np.unique(cells[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for cell,start,end in zip(uniq, starts, ends):
+            ids = self._candidates(cell, kind)
+            if len(ids):
+                yield order[start:end], ids
+
+    def _contains(self, ids, lons, lats):
+        "returns a boolean matrix of shape (len(ids), len(lons)) of which records contain which points"
+        recs = self.records[ids]
+        lats = lats[np.newaxis, :]
+        inlat = (lats >= recs["south"][:, np.newaxis]) & (lats <= recs["north"][:, np.newaxis])
+        inlon = _lon_within(lons[np.newaxis, :], lons[np.newaxis, :],
+                            recs["west"][:, np.newaxis], recs["east"][:, np.newaxis])
+        return inlat & inlon
+
+    def query_points(self, lons, lats, kind=None):
+        """
+        Finds all crs whose area of use contains each point.
+
+        Arguments:
+
+        - **lons**: Array-like of point longitudes.
+        - **lats**: Array-like of point latitudes.
+        - **kind** (optional): Only return crs of this kind, either "geographic" or "projected" (defaults to None, which returns any kind).
+
+        Returns:
+
+        - A pair of integer arrays (point_indices, record_indices), one entry for each
+            point and crs match. The matching codes can be retrieved with index.records[record_indices].
+        """
+        lons = np.asarray(lons, dtype=float).ravel()
+        lats = np.asarray(lats, dtype=float).ravel()
+        kind = _kind_id(kind)
+        point_indices = []
+        record_indices = []
+        for pts,ids in self._iter_cells(lons, lats, kind):
+            recmatch, ptmatch = np.nonzero(self._contains(ids, lons[pts], lats[pts]))
+            point_indices.append(pts[ptmatch])
+            record_indices.append(ids[recmatch])
+        if not point_indices:
+            return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+        point_indices = np.concatenate(point_indices)
+        record_indices = np.concatenate(record_indices)
+        order = np.lexsort((record_indices, point_indices))
+        return point_indices[order], record_indices[order]
+
+    def best_points(self, lons, lats, kind=None):
+        """
+        Finds the most local crs for each point, ie the one with the smallest area of use
+        that contains the point.
+
+        Arguments:
+
+        - **lons**: Array-like of point longitudes.
+        - **lats**: Array-like of point latitudes.
+        - **kind** (optional): Only consider crs of this kind, either "geographic" or "projected" (defaults to None, which considers any kind).
+
+        Returns:
+
+        - An integer array of record indices, one for each point, or -1 where no crs contains the point.
+        """
+        lons = np.asarray(lons, dtype=float).ravel()
+        lats = np.asarray(lats, dtype=float).ravel()
+        kind = _kind_id(kind)
+        best = np.full(len(lons), -1, dtype=np.intp)
+        for pts,ids in self._iter_cells(lons, lats, kind):
+            inside = self._contains(ids, lons[pts], lats[pts])
+            areas = np.where(inside, self._areas[ids][:, np.newaxis], np.inf)
+            nearest = np.argmin(areas, axis=0)
+            found = inside[nearest, np.arange(len(pts))]
+            best[pts[found]] = ids[nearest[found]]
+        return best
+
+    def query_bboxes(self, bboxes, kind=None, within=False, chunksize=1024):
+        """
+        Finds all crs whose area of use intersects each bounding box.
+
+        Arguments:
+
+        - **bboxes**: Array-like of shape (n, 4) with one [west, south, east, north] box per row,
+                    in longitude-latitude degrees.
+        - **kind** (optional): Only return crs of this kind, either "geographic" or "projected" (defaults to None, which returns any kind).
+        - **within** (optional): If True, only returns crs whose area of use contains the entire box (defaults to False).
+        - **chunksize** (optional): Number of boxes to compare at a time, to limit memory use (defaults to 1024).
+
+        Returns:
+
+        - A pair of integer arrays (bbox_indices, record_indices), one entry for each
+            box and crs match.
+        """
+        bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        kind = _kind_id(kind)
+        ids = np.arange(len(self.records))
+        if kind is not None:
+            ids = ids[self.records["kind"] == kind]
+        recs = self.records[ids]
+        bbox_indices = []
+        record_indices = []
+        for start in range(0, len(bboxes), chunksize):
+            chunk = bboxes[start:start+chunksize]
+            west, south, east, north = [col[:, np.newaxis] for col in chunk.T]
+            if within:
+                match = (south >= recs["south"]) & (north <= recs["north"])
+                match &= _lon_within(west, east, recs["west"], recs["east"])
+            else:
+                match = (south <= recs["north"]) & (north >= recs["south"])
+                match &= _lon_overlaps(west, east, recs["west"], recs["east"])
+            boxmatch, recmatch = np.nonzero(match)
+            bbox_indices.append(boxmatch + start)
+            record_indices.append(ids[recmatch])
+        if not bbox_indices:
+            return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+        return np.concatenate(bbox_indices), np.concatenate(record_indices)
+
+
+def build_area_index(results, savepath, codetype="epsg"):
+    """
+    Build and save an area of use index from an iterable of result dicts, such as those
+    yielded by pycrs.utils.search().
+    NOTE: Might take a while if the results have to be fetched online.
+
+    Arguments:
+
+    - *results*: Iterable of result dicts with a 'code', 'kind', and 'bbox' entry.
+    - *savepath*: The filepath to save the index to, including the ".npy" extension.
+    - *codetype* (optional): The codetype of the result codes (defaults to "epsg").
+
+    Returns:
+
+    - The AreaIndex instance.
+    """
+    index = AreaIndex.from_search_results(results, codetype=codetype)
+    index.save(savepath)
+    return index
+
+def load_area_index(filepath, **kwargs):
+    """
+    Load an area of use index previously saved with AreaIndex.save() or build_area_index().
+    The records are memory-mapped, so the file is shared between processes.
+
+    Arguments:
+
+    - *filepath*: The filepath of the saved ".npy" index.
+    - Any remaining keyword arguments are passed on to the AreaIndex constructor.
+
+    Returns:
+
+    - An AreaIndex instance.
+    """
+    _require_numpy()
+    records = np.load(filepath, mmap_mode="r")
+    return AreaIndex(records, **kwargs)
+
+
+
+#################
+# CODE TABLES
+#################
+
+CODETYPES = {"epsg": 1, "esri": 2, "sr-org": 3}
+FORMATS = ("proj4", "ogcwkt", "esriwkt")
+
+_MAGIC = b"PYCRSCT1"
+_HEADER = struct.Struct("<8sII")
+_KEY = struct.Struct("<Q")
+_OFFSET = struct.Struct("<Q")
+
+# code tables that have been loaded with load_code_table() and that are used for lookups
+_code_tables = []
+
+
+def _code_key(codetype, code):
+    "pack a codetype and integer code into a single sortable key"
+    code = int(code)
+    # codes outside 32 bits would overflow into the codetype bits of the key
+    if not 0 <= code < 1 << 32:
+        raise ValueError("Crs code %r does not fit in a code table" % code)
+    return (CODETYPES[codetype.lower()] << 32) | code
+
+
+class CodeTable:
+    """
+    A read-only table of crs string definitions by crs code, stored in a compact
+    binary file that is memory-mapped rather than loaded into memory. Lookups
+    binary search a sorted index of codes and only decode the requested string,
+    and the pages of the file are shared through the OS between all processes
+    that open the same table.
+
+    The file consists of a header, a sorted array of codetype and code keys,
+    an array of offsets into a blob of utf-8 strings (one offset for each key
+    and format), and the string blob itself.
+    """
+
+    def __init__(self, filepath):
+        """
+        Arguments:
+
+        - **filepath**: The filepath of a code table created with pycrs.database.build_code_table().
+        """
+        self.filepath = filepath
+        with open(filepath, "rb") as fobj:
+            self._mmap = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._nformats = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError("%r is not a valid PyCRS code table" % filepath)
+        self._keys_start = _HEADER.size
+        self._offsets_start = self._keys_start + self._count * _KEY.size
+        self._blob_start = self._offsets_start + (self._count * self._nformats + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, codetype_code):
+        codetype, code = codetype_code
+        return self._find(codetype, code) is not None
+
+    def _find(self, codetype, code):
+        "binary search for the position of the code in the key index, or None if not found"
+        try:
+            key = _code_key(codetype, code)
+        except (KeyError, ValueError):
+            return None
+        mm = self._mmap
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            midkey = _KEY.unpack_from(mm, self._keys_start + mid * _KEY.size)[0]
+            if midkey < key:
+                lo = mid + 1
+            elif midkey > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def get(self, codetype, code, format):
+        """
+        Lookup the crs string of a crs code in the specified format.
+
+        Arguments:
+
+        - **codetype**: "epsg", "esri", or "sr-org".
+        - **code**: The code.
+        - **format**: The crs format of the returned string. One of "proj4", "ogcwkt", or "esriwkt".
+
+        Returns:
+
+        - Crs string in the specified format, or None if the table does not have it.
+        """
+        if format not in FORMATS:
+            return None
+        pos = self._find(codetype, code)
+        if pos is None:
+            return None
+        i = pos * self._nformats + FORMATS.index(format)
+        start, end = struct.unpack_from("<2Q", self._mmap, self._offsets_start + i * _OFFSET.size)
+        if start == end:
+            return None
+        return self._mmap[self._blob_start + start:self._blob_start + end].decode("utf-8")
+
+    def close(self):
+        "Closes the memory-mapped file, and stops it from being used for lookups."
+        if self in _code_tables:
+            _code_tables.remove(self)
+        self._mmap.close()
+
+
+def write_code_table(rows, savepath):
+    """
+    Write crs string definitions to a binary code table file.
+
+    Arguments:
+
+    - *rows*: Iterable of (codetype, code, proj4, ogcwkt, esriwkt) tuples, where missing formats can be empty strings or None.
+        Raises ValueError for rows of any other length.
+    - *savepath*: The filepath to save the table to.
+    """
+    entries = {}
+    for row in rows:
+        codetype, code, strings = row[0], row[1], row[2:]
+        if len(strings) != len(FORMATS):
+            # the offsets are read back assuming one string for each format
+            raise ValueError("Code table row %r must have a string for each of the formats %s" % (row[:2], ", ".join(FORMATS)))
+        try:
+            key = _code_key(codetype, code)
+        except (KeyError, ValueError):
+            # only integer codes of the known codetypes are supported
+            continue
+        entries[key] = [(string or "").strip().encode("utf-8") for string in strings]
+
+    keys = sorted(entries)
+    blob = io.BytesIO()
+    offsets = [0]
+    for key in keys:
+        for string in entries[key]:
+            blob.write(string)
+            offsets.append(blob.tell())
+
+    with open(savepath, "wb") as fobj:
+        fobj.write(_HEADER.pack(_MAGIC, len(keys), len(FORMATS)))
+        fobj.write(struct.pack("<%iQ" % len(keys), *keys))
+        fobj.write(struct.pack("<%iQ" % len(offsets), *offsets))
+        fobj.write(blob.getvalue())
+
+def build_code_table(tablepath, savepath):
+    """
+    Build a binary code table from the tab-delimited crs table written by
+    pycrs.utils.build_crs_table(), with the fields codetype, code, proj4, ogcwkt, and esriwkt.
+
+    Arguments:
+
+    - *tablepath*: The filepath of the tab-delimited crs table.
+    - *savepath*: The filepath to save the binary code table to.
+    """
+    def rows():
+        with io.open(tablepath, encoding="utf-8") as reader:
+            fields = next(reader).rstrip("\r\n").split("\t")
+            for line in reader:
+                row = dict(zip(fields, line.rstrip("\r\n").split("\t")))
+                yield (row["codetype"], row["code"]) + tuple(row.get(format) for format in FORMATS)
+    write_code_table(rows(), savepath)
+
+def load_code_table(filepath):
+    """
+    Load a binary code table so that it is used to lookup crs codes offline, for instance
+    by pycrs.parse.from_epsg_code() and pycrs.utils.crscode_to_string(). Codes that are
+    not found in any loaded table are still looked up online.
+
+    Arguments:
+
+    - *filepath*: The filepath of a code table created with build_code_table() or write_code_table().
+
+    Returns:
+
+    - The CodeTable instance.
+    """
+    table = CodeTable(filepath)
+    _code_tables.append(table)
+    return table
+
+def lookup_string(codetype, code, format):
+    """
+    Lookup a crs code in the loaded code tables and return it in the specified format.
+
+    Arguments:
+
+    - *codetype*: "epsg", "esri", or "sr-org".
+    - *code*: The code.
+    - *format*: The crs format of the returned string. One of "proj4", "ogcwkt", or "esriwkt".
+
+    Returns:
+
+    - Crs string in the specified format, or None if none of the loaded tables have it.
+    """
+    for table in _code_tables:
+        result = table.get(codetype, code, format)
+        if result is not None:
+            return result
+    return None
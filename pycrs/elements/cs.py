@@ -5,15 +5,114 @@ Coordinate system (CS) classes of different types.
 from . import directions
 from . import datums
 from . import ellipsoids
+from . import fields
+from . import parameters
+from . import units
 
 from .. import utils
 
+import json
+
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+
+# default axes, shared by all instances
+_DEFAULT_AXES = (directions.East(), directions.North())
+
+# proj4 always gives the false easting and northing in meters, while they are kept in the
+# linear unit of the crs, as in wkt
+_FALSE_ORIGIN = (parameters.FalseEasting, parameters.FalseNorthing)
+
+def _convert_false_origin(params, from_unit, to_unit):
+    "the params with the false easting and northing converted from one linear unit to another"
+    try:
+        conversion = units.factor(from_unit, to_unit)
+    except Exception:
+        # units without a multiplier are taken to be meters
+        return params
+    if conversion == 1:
+        return params
+    return [param.__class__(param.value * conversion) if isinstance(param, _FALSE_ORIGIN) and param.value else param
+            for param in params]
+
+def _proj4_dict(entries):
+    # flags without a value, such as +no_defs, are left out
+    items = {}
+    for entry in entries:
+        key, sep, value = entry.partition("=")
+        if sep:
+            items[key.lstrip("+")] = value
+    return items
+
+_PROJJSON_SCHEMA = "https://proj.org/schemas/v0.7/projjson.schema.json"
+
+def _projjson_axes(names, twin_ax, unit):
+    axes = []
+    for (name, abbrev), axis in zip(names, twin_ax):
+        axes.append({"name": name, "abbreviation": abbrev, "direction": axis.projjson,
+                     "unit": dict(unit) if isinstance(unit, dict) else unit})
+    return axes
+
+def _projjson_toplevel(crs, datumshift):
+    # a datum shift makes it a crs bound to wgs84 by a transformation
+    if datumshift:
+        wgs84 = GeogCS("WGS 84", datums.WGS84(), parameters.PrimeMeridian(0), units.Degree())
+        crs = {"type": "BoundCRS", "source_crs": crs, "target_crs": wgs84._projjson_crs(),
+               "transformation": datumshift.to_projjson()}
+    toplevel = {"$schema": _PROJJSON_SCHEMA}
+    toplevel.update(crs)
+    return toplevel
+
+
 #BASE
-class CS:
+class CS(fields.Slots):
     """
     Base class for all CS classes. 
     Mostly just for basic type checking. 
     """
+    __slots__ = ()
+
+    _owns = True
+
+    def _cached(self, key, build):
+        """
+        Returns the value stored under key, only calling build() to recreate it if the CS or
+        any of its nested elements have changed since it was stored. Changing an element
+        clears the stored values of the CS it is part of, see pycrs.elements.fields.watch(),
+        and changing an element shared with other CS instances changes the version number
+        of pycrs.elements.fields, so elements can be freely modified or replaced without
+        having to reset anything, while checking a stored value is only a comparison. 
+        """
+        version = fields.version()
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        else:
+            cached = cache.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        result = build()
+        fields.watch(self)
+        cache[key] = (version, result)
+        return result
+
+    def __getstate__(self):
+        state = fields.Slots.__getstate__(self)
+        # the version numbers of cached values only apply within this process
+        state["_cache"] = None
+        return state
+
+    def __reduce__(self):
+        # pickle as a compact tuple of registry ids and values, which is never interned when
+        # unpickled, so that copies do not alias the canonical instances
+        from .. import codec
+        try:
+            return (codec._from_tuple_raw, (codec.to_tuple(self),))
+        except TypeError:
+            # contains custom element classes unknown to the registry
+            return (copyreg.__newobj__, (self.__class__,), self.__getstate__())
 
     def to_epsg_code(self):
         """
@@ -58,6 +157,9 @@ class GeogCS(CS):
     """
     ogc_wkt = "GEOGCS"
     esri_wkt = "GEOGCS"
+    cs_type = "Geographic"
+
+    __slots__ = ("name", "datum", "prime_mer", "angunit", "twin_ax", "_cache", "__weakref__")
 
     def __init__(self, name, datum, prime_mer, angunit, twin_ax=None):
         """
@@ -74,16 +176,29 @@ class GeogCS(CS):
         - **twin_ax**: A pair of pycrs.elements.directions.North/South/East/West instances, one for each axis,
                     representing the compass direction in which each axis increases. Defaults to East and North. 
         """
-        self.cs_type = "Geographic"
-        
         self.name = name
         self.datum = datum
         self.prime_mer = prime_mer
         self.angunit = angunit
         if twin_ax == None:
             # default axes
-            twin_ax = directions.East(), directions.North()
+            twin_ax = _DEFAULT_AXES
         self.twin_ax = twin_ax
+        self._cache = None
+
+    def _state(self):
+        return (self.__class__, self.name, self.datum._state(), self.prime_mer._state(), self.angunit._state(),
+                self.twin_ax[0].__class__, self.twin_ax[1].__class__)
+
+    def _proj4_entries(self, toplevel=True):
+        entries = []
+        if toplevel:
+            entries.append("+proj=longlat")
+        entries.extend(self.datum.to_proj4().split())
+        entries.append(self.prime_mer.to_proj4())
+        if toplevel:
+            entries.append("+nodef")
+        return entries
 
     def to_proj4(self, as_dict=False, toplevel=True):
         """
@@ -96,31 +211,87 @@ class GeogCS(CS):
         """
         # dont parse axis to proj4, because in proj4, axis only applies to the cs, ie the projcs (not the geogcs, where wkt can specify with axis)
         # also proj4 cannot specify angular units
-        if toplevel:
-            string = "+proj=longlat %s %s +nodef" % (self.datum.to_proj4(), self.prime_mer.to_proj4())
-        else:
-            string = "%s %s" % (self.datum.to_proj4(), self.prime_mer.to_proj4())
         if as_dict:
-            return dict([
-                        entry.lstrip('+').split('=')
-                        for entry in string.split()
-                        if entry != "+no_defs"
-                         ])
+            return dict(self._cached(("proj4_dict", toplevel), lambda: _proj4_dict(self._proj4_entries(toplevel))))
         else:
-            return string
+            return self._cached(("proj4", toplevel), lambda: " ".join(self._proj4_entries(toplevel)))
 
     def to_ogc_wkt(self):
         """
         Returns the CS as a OGC WKT formatted string.
         """
+        return self._cached("ogc_wkt", self._build_ogc_wkt)
+
+    def _build_ogc_wkt(self):
         return 'GEOGCS["%s", %s, %s, %s, AXIS["Lon", %s], AXIS["Lat", %s]]' % (self.name, self.datum.to_ogc_wkt(), self.prime_mer.to_ogc_wkt(), self.angunit.to_ogc_wkt(), self.twin_ax[0].ogc_wkt, self.twin_ax[1].ogc_wkt )
     
     def to_esri_wkt(self):
         """
         Returns the CS as a ESRI WKT formatted string.
         """
+        return self._cached("esri_wkt", self._build_esri_wkt)
+
+    def _build_esri_wkt(self):
         return 'GEOGCS["%s", %s, %s, %s, AXIS["Lon", %s], AXIS["Lat", %s]]' % (self.name, self.datum.to_esri_wkt(), self.prime_mer.to_esri_wkt(), self.angunit.to_esri_wkt(), self.twin_ax[0].esri_wkt, self.twin_ax[1].esri_wkt )
 
+    def to_projjson(self, as_string=False):
+        """
+        Returns the CS as a PROJJSON dict or string.
+
+        Arguments:
+
+        - **as_string** (optional): If True, returns the PROJJSON encoded as a JSON string (defaults to False).
+        """
+        if as_string:
+            return self._cached("projjson", lambda: json.dumps(self.to_projjson()))
+        return _projjson_toplevel(self._projjson_crs(), self.datum.datumshift)
+
+    def _projjson_crs(self):
+        datum = self.datum.to_projjson()
+        if self.prime_mer.value != 0:
+            datum["prime_meridian"] = self.prime_mer.to_projjson()
+        axes = _projjson_axes((("Longitude", "lon"), ("Latitude", "lat")), self.twin_ax, self.angunit.to_projjson("AngularUnit"))
+        return {"type": "GeographicCRS", "name": self.name, "datum": datum,
+                "coordinate_system": {"subtype": "ellipsoidal", "axis": axes}}
+
+    def to_geocentric(self, lons, lats, heights=0, out=None):
+        """
+        Converts longitudes, latitudes and heights in this CS to geocentric (ECEF) coordinates.
+        Works on scalars or numpy arrays, see pycrs.geodesy.to_geocentric(). Requires numpy. 
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees, relative to the prime meridian.
+        - **heights** (optional): Heights above the ellipsoid in meters (defaults to 0).
+        - **out** (optional): A tuple of three float arrays to write the results to. If None,
+            new arrays are created (default).
+
+        Returns:
+
+        - A tuple (x, y, z) of the geocentric coordinates in meters.
+        """
+        from .. import geodesy
+        return geodesy.to_geocentric(self, lons, lats, heights, out)
+
+    def from_geocentric(self, x, y, z, out=None):
+        """
+        Converts geocentric (ECEF) coordinates to longitudes, latitudes and heights in this CS.
+        Works on scalars or numpy arrays, see pycrs.geodesy.from_geocentric(). Requires numpy. 
+
+        Arguments:
+
+        - **x**, **y**, **z**: Geocentric coordinates in meters.
+        - **out** (optional): A tuple of three float arrays to write the results to. If None,
+            new arrays are created (default).
+
+        Returns:
+
+        - A tuple (lon, lat, height) of the longitudes and latitudes in degrees, and the heights
+            above the ellipsoid in meters.
+        """
+        from .. import geodesy
+        return geodesy.from_geocentric(self, x, y, z, out)
+
 #PROJCS
 class ProjCS(CS):
     """
@@ -141,6 +312,9 @@ class ProjCS(CS):
 
     ogc_wkt = "PROJCS"
     esri_wkt = "PROJCS"
+    cs_type = "Projected"
+
+    __slots__ = ("name", "_geogcs", "proj", "_params", "_unit", "twin_ax", "_cache", "_pending", "__weakref__")
     
     def __init__(self, name, geogcs, proj, params, unit, twin_ax=None):
         """
@@ -155,7 +329,6 @@ class ProjCS(CS):
         - **twin_ax**: A pair of pycrs.elements.directions.North/South/East/West instances, one for each axis,
                     representing the compass direction in which each axis increases. Defaults to East and North. 
         """
-        self.cs_type = "Projected"
         self.name = name
         self.geogcs = geogcs
         self.proj = proj
@@ -163,8 +336,45 @@ class ProjCS(CS):
         self.unit = unit
         if twin_ax == None:
             # default axes
-            twin_ax = directions.East(), directions.North()
+            twin_ax = _DEFAULT_AXES
         self.twin_ax = twin_ax
+        self._cache = None
+        self._pending = None
+
+    @classmethod
+    def _deferred(cls, name, proj, pending, twin_ax=None):
+        """
+        Creates a ProjCS whose geogcs, params and unit are only created on first access,
+        by calling the functions stored under those names in the pending dict.
+        """
+        crs = cls.__new__(cls)
+        crs.name = name
+        crs.proj = proj
+        crs.twin_ax = twin_ax or _DEFAULT_AXES
+        crs._cache = None
+        crs._pending = pending
+        return crs
+
+    def __getstate__(self):
+        # create any deferred elements, so they are included
+        for name in list(self._pending or ()):
+            getattr(self, name)
+        return CS.__getstate__(self)
+
+    def _state(self):
+        return (self.__class__, self.name, self.geogcs._state(), self.proj._state(),
+                tuple([param._state() for param in self.params]), self.unit._state(),
+                self.twin_ax[0].__class__, self.twin_ax[1].__class__)
+
+    def _proj4_entries(self):
+        entries = [self.proj.to_proj4()]
+        entries.extend(self.geogcs._proj4_entries(toplevel=False))
+        for param in _convert_false_origin(self.params, self.unit, units.Meter):
+            entries.extend(param.to_proj4().split())
+        entries.extend(self.unit.to_proj4().split())
+        entries.append("+axis=" + self.twin_ax[0].proj4 + self.twin_ax[1].proj4 + "u") # up set as default because only proj4 can set it I think...
+        entries.append("+no_defs")
+        return entries
 
     def to_proj4(self, as_dict=False):
         """
@@ -174,26 +384,18 @@ class ProjCS(CS):
 
         - **as_dict** (optional): If True, returns the proj4 string as a dict (defaults to False).
         """
-        string = "%s" % self.proj.to_proj4()
-        string += " %s" % self.geogcs.to_proj4(toplevel=False)
-        string += " " + " ".join(param.to_proj4() for param in self.params)
-        string += " %s" % self.unit.to_proj4()
-        string += " +axis=" + self.twin_ax[0].proj4 + self.twin_ax[1].proj4 + "u" # up set as default because only proj4 can set it I think...
-        string += " +no_defs"
-        
         if as_dict:
-            return dict([
-                        entry.lstrip('+').split('=')
-                        for entry in string.split()
-                        if entry != "+no_defs"
-                         ])
+            return dict(self._cached("proj4_dict", lambda: _proj4_dict(self._proj4_entries())))
         else:
-            return string
+            return self._cached("proj4", lambda: " ".join(self._proj4_entries()))
 
     def to_ogc_wkt(self):
         """
         Returns the CS as a OGC WKT formatted string.
         """
+        return self._cached("ogc_wkt", self._build_ogc_wkt)
+
+    def _build_ogc_wkt(self):
         string = 'PROJCS["%s", %s, %s, ' % (self.name, self.geogcs.to_ogc_wkt(), self.proj.to_ogc_wkt() )
         string += ", ".join(param.to_ogc_wkt() for param in self.params)
         string += ', %s' % self.unit.to_ogc_wkt()
@@ -204,11 +406,78 @@ class ProjCS(CS):
         """
         Returns the CS as a ESRI WKT formatted string.
         """
+        return self._cached("esri_wkt", self._build_esri_wkt)
+
+    def _build_esri_wkt(self):
         string = 'PROJCS["%s", %s, %s, ' % (self.name, self.geogcs.to_esri_wkt(), self.proj.to_esri_wkt() )
         string += ", ".join(param.to_esri_wkt() for param in self.params)
         string += ', %s' % self.unit.to_esri_wkt()
         string += ', AXIS["X", %s], AXIS["Y", %s]]' % (self.twin_ax[0].esri_wkt, self.twin_ax[1].esri_wkt )
         return string
 
+    def to_projjson(self, as_string=False):
+        """
+        Returns the CS as a PROJJSON dict or string.
+
+        Arguments:
+
+        - **as_string** (optional): If True, returns the PROJJSON encoded as a JSON string (defaults to False).
+        """
+        if as_string:
+            return self._cached("projjson", lambda: json.dumps(self.to_projjson()))
+        return _projjson_toplevel(self._projjson_crs(), self.geogcs.datum.datumshift)
+
+    def _projjson_crs(self):
+        linunit = self.unit.to_projjson("LinearUnit")
+        method = self.proj.to_projjson()
+        conversion = {"name": method["name"], "method": method,
+                      "parameters": [param.to_projjson(linunit) for param in self.params]}
+        axes = _projjson_axes((("Easting", "E"), ("Northing", "N")), self.twin_ax, linunit)
+        return {"type": "ProjectedCRS", "name": self.name, "base_crs": self.geogcs._projjson_crs(),
+                "conversion": conversion, "coordinate_system": {"subtype": "Cartesian", "axis": axes}}
+
+    def _kernel(self):
+        # the compiled kernel is stored with the CS, so that short batches cost little more
+        # than the arithmetic itself
+        cached = self._cache and self._cache.get("kernel")
+        if cached is not None and cached[0] == fields.version():
+            return cached[1]
+        from .. import kernels
+        return self._cached("kernel", lambda: kernels.compile(self))
+
+    def project(self, lons, lats):
+        """
+        Projects longitudes and latitudes of the GeogCS to x and y coordinates in this CS, with
+        the compiled kernel of its projection, see pycrs.kernels.compile(). Requires numpy. 
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees, as numbers or numpy arrays.
+
+        Returns:
+
+        - A tuple (x, y) of the projected coordinates, in the unit of this CS.
+        """
+        return self._kernel().forward(lons, lats)
+
+    def unproject(self, x, y):
+        """
+        Unprojects x and y coordinates in this CS to longitudes and latitudes of the GeogCS, with
+        the compiled kernel of its projection, see pycrs.kernels.compile(). Requires numpy. 
+
+        Arguments:
+
+        - **x**, **y**: Projected coordinates in the unit of this CS, as numbers or numpy arrays.
+
+        Returns:
+
+        - A tuple (lon, lat) of the longitudes and latitudes in degrees.
+        """
+        return self._kernel().inverse(x, y)
+
 
     
+
+# the elements that can be deferred until first access, when parsing lazily
+for _name in ("geogcs", "params", "unit"):
+    setattr(ProjCS, _name, fields.Deferred(_name, ProjCS.__dict__["_" + _name]))
@@ -4,6 +4,7 @@ Named datum classes that can be created or parsed.
 
 from . import ellipsoids
 from . import parameters
+from . import fields
 
 
 def find(datumname, crstype, strict=False):
@@ -38,11 +39,13 @@ def find(datumname, crstype, strict=False):
 
 
 ##+datum     Datum name (see `proj -ld`)
-class Datum:
+class Datum(fields.Slotted):
     proj4 = "+datum"
     ogc_wkt = "DATUM"
     esri_wkt = "DATUM"
 
+    __fields__ = ("name", "ellips", "datumshift")
+
     name = None
     ellips = None
     datumshift = None
@@ -61,6 +64,10 @@ class Datum:
         self.ellips = kwargs.get('ellipsoid', self.ellips)
         self.datumshift = kwargs.get('datumshift', self.datumshift)
 
+    def _state(self):
+        return (self.__class__, self.name._state(), self.ellips._state(),
+                self.datumshift and self.datumshift._state())
+
     def to_proj4(self):
         if self.datumshift:
             return "%s %s" % (self.ellips.to_proj4(), self.datumshift.to_proj4())
@@ -84,15 +91,27 @@ class Datum:
         else:
             return 'DATUM["%s", %s]' % (self.name.esri_wkt, self.ellips.to_esri_wkt())
 
+    def to_projjson(self):
+        # the datum shift is not part of the PROJJSON datum, but a transformation of the crs
+        return {"type": "GeodeticReferenceFrame",
+                "name": self.name.projjson or self.name.ogc_wkt.replace("_", " "),
+                "ellipsoid": self.ellips.to_projjson()}
+
     def to_geotiff(self):
         pass
         #return "GeogGeodeticDatum"
 
-class DatumName:
-    def __init__(self, proj4="", ogc_wkt="", esri_wkt=""):
+class DatumName(fields.Slots):
+    __slots__ = ("proj4", "ogc_wkt", "esri_wkt", "projjson")
+
+    def __init__(self, proj4="", ogc_wkt="", esri_wkt="", projjson=""):
         self.proj4 = proj4
         self.ogc_wkt = ogc_wkt
         self.esri_wkt = esri_wkt
+        self.projjson = projjson
+
+    def _state(self):
+        return (self.proj4, self.ogc_wkt, self.esri_wkt, self.projjson)
         
 
 # Specific predefined datum classes
@@ -101,6 +120,7 @@ class WGS84(Datum):
                 proj4 = "WGS84",
                 ogc_wkt = "WGS_1984",
                 esri_wkt = "D_WGS_1984",
+                projjson = "World Geodetic System 1984",
                 )
 
     ellips = ellipsoids.WGS84()
@@ -111,6 +131,7 @@ class WGS72_BE(Datum):
                 proj4 = "", # no datum name, just ellips + towgs84 params...
                 ogc_wkt = "WGS_1972_Transit_Broadcast_Ephemeris",
                 esri_wkt = "D_WGS_1972_BE",
+                projjson = "WGS 72 Transit Broadcast Ephemeris",
                 )
 
     ellips = ellipsoids.WGS72()
@@ -121,6 +142,7 @@ class NAD83(Datum):
                 proj4 = "NAD83", # no datum name, just ellips + towgs84 params...
                 ogc_wkt = "North_American_Datum_1983",
                 esri_wkt = "D_North_American_1983",
+                projjson = "North American Datum 1983",
                 )
 
     ellips = ellipsoids.GRS80()
@@ -129,8 +151,9 @@ class NAD83(Datum):
 class NAD27(Datum):
     name = DatumName(
                 proj4 = "NAD27",
-                ogc_wkt = "D_North_American_1927",
+                ogc_wkt = "North_American_Datum_1927",
                 esri_wkt = "D_North_American_1927",
+                projjson = "North American Datum 1927",
                 )
     
     ellips = ellipsoids.Clarke1866()
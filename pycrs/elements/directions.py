@@ -1,31 +1,51 @@
 
-class North:
+class Direction(object):
+    """
+    Base class for the axis directions. Directions have no state of their own,
+    so each direction only ever has a single shared instance. 
+    """
+    __slots__ = ()
+    _instances = {}
+
+    def __new__(cls):
+        instance = cls._instances.get(cls)
+        if instance is None:
+            instance = cls._instances[cls] = object.__new__(cls)
+        return instance
+
+class North(Direction):
     proj4 = "n"
     ogc_wkt = "NORTH"
     esri_wkt = "NORTH"
+    projjson = "north"
 
-class East:
+class East(Direction):
     proj4 = "e"
     ogc_wkt = "EAST"
     esri_wkt = "EAST"
+    projjson = "east"
 
-class South:
+class South(Direction):
     proj4 = "s"
     ogc_wkt = "SOUTH"
     esri_wkt = "SOUTH"
+    projjson = "south"
 
-class West:
+class West(Direction):
     proj4 = "w"
     ogc_wkt = "WEST"
     esri_wkt = "WEST"
+    projjson = "west"
 
-class Up:
+class Up(Direction):
     proj4 = "u"
     ogc_wkt = "UP"
     esri_wkt = "UP"
+    projjson = "up"
 
-class Down:
+class Down(Direction):
     proj4 = "d"
     ogc_wkt = "DOWN"
     esri_wkt = "DOWN"
+    projjson = "down"
     
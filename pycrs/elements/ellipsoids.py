@@ -3,6 +3,9 @@ Named ellipsoid classes that can be created or parsed.
 """
 
 from . import parameters
+from . import fields
+
+import math
 
 
 def find(ellipsname, crstype, strict=False):
@@ -37,11 +40,14 @@ def find(ellipsname, crstype, strict=False):
 
 
 ##+ellps     Ellipsoid name (see `proj -le`)
-class Ellipsoid:
+class Ellipsoid(fields.Slotted):
     proj4 = "+ellps"
     ogc_wkt = "SPHEROID"
     esri_wkt = "SPHEROID"
 
+    __fields__ = ("name", "semimaj_ax", "semimin_ax", "flat", "inv_flat")
+    __slots__ = ("_derived",)
+
     name = None
     semimaj_ax = None
     semimin_ax = None
@@ -68,6 +74,13 @@ class Ellipsoid:
         self.flat = kwargs.get('flat', self.flat)
         self.inv_flat = kwargs.get('inv_flat', self.inv_flat)
 
+    def _state(self):
+        return (self.__class__, self.name._state(),
+                self.semimaj_ax and self.semimaj_ax._state(),
+                self.semimin_ax and self.semimin_ax._state(),
+                self.flat and self.flat._state(),
+                self.inv_flat and self.inv_flat._state())
+
     def _get_flat(self):
         if self.flat:
             # flattening given directly
@@ -84,11 +97,171 @@ class Ellipsoid:
             raise Exception("Cannot get ellipsoid flattening, needs either semimaj_ax + semimin_ax, semimaj_ax + flat, or semimaj_ax + inv_flat")
         return flat
 
+    def _derive(self):
+        "calculate the derived constants from whichever pair of axis and flattening values is given"
+        f = float(self._get_flat())
+        if self.semimaj_ax:
+            a = float(self.semimaj_ax.value)
+            if self.semimin_ax and not self.flat:
+                b = float(self.semimin_ax.value)
+            else:
+                b = a * (1 - f)
+        elif self.semimin_ax:
+            b = float(self.semimin_ax.value)
+            a = b / (1 - f)
+        else:
+            raise Exception("Cannot get ellipsoid axes, needs either semimaj_ax or semimin_ax")
+        e2 = f * (2 - f)
+        n = f / (2 - f)
+        n2, n3, n4 = n**2, n**3, n**4
+        # meridian arc series in the third flattening, after Helmert
+        arc = a / (1 + n)
+        meridian_coeffs = (arc * (1 + n2 / 4 + n4 / 64),
+                           -arc * 3 / 2 * (n - n3 / 8),
+                           arc * 15 / 16 * (n2 - n4 / 4),
+                           -arc * 35 / 48 * n3,
+                           arc * 315 / 512 * n4)
+        # and its inverse, from the rectifying latitude to the latitude
+        footpoint_coeffs = (3 / 2.0 * n - 27 / 32.0 * n3,
+                            21 / 16.0 * n2 - 55 / 32.0 * n4,
+                            151 / 96.0 * n3,
+                            1097 / 512.0 * n4)
+        return {"a": a, "b": b, "f": f, "inv_f": 1 / f if f else float("inf"),
+                "e2": e2, "e": math.sqrt(e2), "ep2": e2 / (1 - e2), "n": n,
+                "meridian_coeffs": meridian_coeffs, "rectifying_radius": meridian_coeffs[0],
+                "footpoint_coeffs": footpoint_coeffs}
+
+    def _constants(self):
+        """
+        Returns the dict of derived constants, only recalculating them if any of the axes
+        or flattening values have changed since they were last calculated.
+        """
+        key = tuple(param.value if param else None
+                    for param in (self.semimaj_ax, self.semimin_ax, self.flat, self.inv_flat))
+        derived = getattr(self, "_derived", None)
+        if derived is None or derived[0] != key:
+            derived = self._derived = (key, self._derive())
+        return derived[1]
+
+    @property
+    def a(self):
+        "The semimajor axis in meters."
+        return self._constants()["a"]
+
+    @property
+    def b(self):
+        "The semiminor axis in meters."
+        return self._constants()["b"]
+
+    @property
+    def f(self):
+        "The flattening."
+        return self._constants()["f"]
+
+    @property
+    def inv_f(self):
+        "The inverse flattening, which is infinite for spheres."
+        return self._constants()["inv_f"]
+
+    @property
+    def e(self):
+        "The first eccentricity."
+        return self._constants()["e"]
+
+    @property
+    def e2(self):
+        "The first eccentricity squared."
+        return self._constants()["e2"]
+
+    @property
+    def ep2(self):
+        "The second eccentricity squared."
+        return self._constants()["ep2"]
+
+    @property
+    def n(self):
+        "The third flattening."
+        return self._constants()["n"]
+
+    @property
+    def rectifying_radius(self):
+        "The radius of the sphere with the same meridian length as the ellipsoid."
+        return self._constants()["rectifying_radius"]
+
+    @property
+    def meridian_coeffs(self):
+        """
+        The coefficients (c0, c2, c4, c6, c8) of the meridian arc distance from the equator to
+        latitude phi (in radians): c0*phi + c2*sin(2*phi) + c4*sin(4*phi) + c6*sin(6*phi) + c8*sin(8*phi)
+        """
+        return self._constants()["meridian_coeffs"]
+
+    @property
+    def footpoint_coeffs(self):
+        """
+        The coefficients (d2, d4, d6, d8) of the latitude at rectifying latitude mu (in radians):
+        mu + d2*sin(2*mu) + d4*sin(4*mu) + d6*sin(6*mu) + d8*sin(8*mu)
+        """
+        return self._constants()["footpoint_coeffs"]
+
+    def geodesic_inverse(self, lon1, lat1, lon2, lat2):
+        """
+        The shortest distances between pairs of points on the ellipsoid, and the azimuths at
+        each end. Works on scalars or numpy arrays, see pycrs.geodesy.inverse(). Requires numpy. 
+
+        Arguments:
+
+        - **lon1**, **lat1**: Longitudes and latitudes of the first points in degrees.
+        - **lon2**, **lat2**: Longitudes and latitudes of the second points in degrees.
+
+        Returns:
+
+        - A tuple (distance, azi1, azi2) of the distances in meters, and the forward azimuths
+            in degrees clockwise from north at the first and second points.
+        """
+        from .. import geodesy
+        return geodesy.inverse(self, lon1, lat1, lon2, lat2)
+
+    def geodesic_direct(self, lon1, lat1, azi1, distance):
+        """
+        The points reached by travelling a distance along the geodesic from a point in a given
+        direction. Works on scalars or numpy arrays, see pycrs.geodesy.direct(). Requires numpy. 
+
+        Arguments:
+
+        - **lon1**, **lat1**: Longitudes and latitudes of the starting points in degrees.
+        - **azi1**: Forward azimuths at the starting points in degrees clockwise from north.
+        - **distance**: Distances to travel in meters.
+
+        Returns:
+
+        - A tuple (lon2, lat2, azi2) of the reached points, and the forward azimuths there.
+        """
+        from .. import geodesy
+        return geodesy.direct(self, lon1, lat1, azi1, distance)
+
+    def polygon_area(self, lons, lats, rings=None):
+        """
+        The area of polygon rings on the ellipsoid, see pycrs.geodesy.polygon_area(). Requires numpy. 
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes of the ring vertices in degrees.
+        - **rings** (optional): The start index of each ring in the vertex arrays, to calculate
+            the areas of many rings at once. If None, all the vertices are one ring (default).
+
+        Returns:
+
+        - The area in square meters, positive for counterclockwise rings, or an array of areas if rings is given.
+        """
+        from .. import geodesy
+        return geodesy.polygon_area(self, lons, lats, rings)
+
     def _get_wkt_invflat(self):
         # WKT is special in that it falsely sets the inverse flattening to 0 for perfect spheres
         # mathematically, when flattening is 0, then the inverse undefined
         if self.inv_flat:
-            inv_flat = self.inv_flat.value
+            inv_flat = self.inv_flat.get_text()
         else:
             flat = self._get_flat()
             if flat == 0:
@@ -119,21 +292,43 @@ class Ellipsoid:
 
     def to_ogc_wkt(self):
         inv_flat = self._get_wkt_invflat()
-        return 'SPHEROID["%s", %s, %s]' % (self.name.ogc_wkt, self.semimaj_ax.value, inv_flat)
+        return 'SPHEROID["%s", %s, %s]' % (self.name.ogc_wkt, self.semimaj_ax.get_text(), inv_flat)
     
     def to_esri_wkt(self):
         inv_flat = self._get_wkt_invflat()
-        return 'SPHEROID["%s", %s, %s]' % (self.name.esri_wkt, self.semimaj_ax.value, inv_flat)
+        return 'SPHEROID["%s", %s, %s]' % (self.name.esri_wkt, self.semimaj_ax.get_text(), inv_flat)
+
+    def to_projjson(self):
+        ellips = {"name": self.name.projjson or self.name.ogc_wkt.replace("_", " ")}
+        if self.inv_flat:
+            ellips["semi_major_axis"] = self.semimaj_ax.get_number()
+            ellips["inverse_flattening"] = self.inv_flat.get_number()
+        elif self.semimin_ax:
+            ellips["semi_major_axis"] = self.semimaj_ax.get_number()
+            ellips["semi_minor_axis"] = self.semimin_ax.get_number()
+        elif self._get_flat() == 0:
+            # PROJJSON has no inverse flattening for spheres, only the radius
+            ellips["radius"] = self.semimaj_ax.get_number()
+        else:
+            ellips["semi_major_axis"] = self.semimaj_ax.get_number()
+            ellips["inverse_flattening"] = 1 / float(self._get_flat())
+        return ellips
 
     def to_geotiff(self):
         pass
         #return "GeogEllipsoid"
 
-class EllipsoidName:
-    def __init__(self, proj4="", ogc_wkt="", esri_wkt=""):
+class EllipsoidName(fields.Slots):
+    __slots__ = ("proj4", "ogc_wkt", "esri_wkt", "projjson")
+
+    def __init__(self, proj4="", ogc_wkt="", esri_wkt="", projjson=""):
         self.proj4 = proj4
         self.ogc_wkt = ogc_wkt
         self.esri_wkt = esri_wkt
+        self.projjson = projjson
+
+    def _state(self):
+        return (self.proj4, self.ogc_wkt, self.esri_wkt, self.projjson)
 
 
 # Specific predefined ellipsoid classes
@@ -142,6 +337,7 @@ class WGS84(Ellipsoid):
                 proj4 = "WGS84",
                 ogc_wkt = "WGS_1984",
                 esri_wkt = "WGS_1984",
+                projjson = "WGS 84",
                 )
     
     semimaj_ax = parameters.SemiMajorRadius(6378137.0)
@@ -152,6 +348,7 @@ class WGS72(Ellipsoid):
                 proj4 = "WGS72",
                 ogc_wkt = "WGS 72",
                 esri_wkt = "WGS_1972",
+                projjson = "WGS 72",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378135.0)
@@ -162,6 +359,7 @@ class International(Ellipsoid):
                 proj4 = "intl",
                 ogc_wkt = "International_1924",
                 esri_wkt = "International_1924",
+                projjson = "International 1924",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378388.0)
@@ -172,6 +370,7 @@ class GRS80(Ellipsoid):
                 proj4 = "GRS80",
                 ogc_wkt = "GRS_1980",
                 esri_wkt = "GRS_1980",
+                projjson = "GRS 1980",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378137.0)
@@ -182,6 +381,7 @@ class Clarke1866(Ellipsoid):
                 proj4 = "clrk66",
                 ogc_wkt = "Clarke_1866",
                 esri_wkt = "Clarke_1866",
+                projjson = "Clarke 1866",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378206.4)
@@ -192,6 +392,7 @@ class Clarke1880(Ellipsoid):
                 proj4 = "clrk80",
                 ogc_wkt = "Clarke 1880 (RGS)",
                 esri_wkt = "Clarke_1880_RGS",
+                projjson = "Clarke 1880 (RGS)",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378249.145)
@@ -202,6 +403,7 @@ class Airy1830(Ellipsoid):
                 proj4 = "airy",
                 ogc_wkt = "Airy 1830",
                 esri_wkt = "Airy_1830",
+                projjson = "Airy 1830",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6377563.396)
@@ -222,6 +424,7 @@ class Krassowsky1940(Ellipsoid):
                 proj4 = "krass",
                 ogc_wkt = "Krassowsky 1940",
                 esri_wkt = "Krassowsky_1940",
+                projjson = "Krassowsky 1940",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6378245.0)
@@ -232,6 +435,7 @@ class Bessel1841(Ellipsoid):
                 proj4 = "bessel",
                 ogc_wkt = "Bessel 1841",
                 esri_wkt = "Bessel_1841",
+                projjson = "Bessel 1841",
                 )
 
     semimaj_ax = parameters.SemiMajorRadius(6377397.155)
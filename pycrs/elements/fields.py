@@ -0,0 +1,281 @@
+"""
+Compact slot-based attribute storage shared by the element classes.
+
+Values derived from elements, such as the serialized strings cached by a CS, are kept up
+to date by having each element remember the CS that it is part of, once that CS has stored
+a value derived from it. Changing the element then clears the values stored by that CS,
+and by any CS that it is in turn part of, so that checking a stored value is just a lookup.
+"""
+
+import weakref
+
+
+# the owner of elements that are part of more than one CS, such as shared default elements
+_SHARED = "shared"
+
+# incremented whenever an element that is part of more than one CS is changed
+_version = 0
+
+# attributes that only cache values derived from the element itself
+_CACHES = frozenset(["_cache", "_derived"])
+
+
+def version():
+    """
+    Returns the current version number of the elements that are part of more than one CS,
+    which changes whenever any of them is changed.
+    """
+    return _version
+
+def changed():
+    "Increments the version number, invalidating all values derived from shared elements."
+    global _version
+    _version += 1
+
+_setattr = object.__setattr__
+_delattr = object.__delattr__
+
+_attributes = {}
+
+def _attribute_names(cls):
+    "the names of the attributes of an element class that can hold nested elements"
+    names = _attributes.get(cls)
+    if names is None:
+        names = []
+        for klass in cls.__mro__:
+            for slot in klass.__dict__.get("__slots__", ()):
+                if not slot.startswith("_"):
+                    names.append(slot)
+                elif isinstance(getattr(cls, slot[1:], None), Deferred):
+                    names.append(slot[1:])
+        names.extend(getattr(cls, "_fields", ()))
+        names = _attributes[cls] = tuple(names)
+    return names
+
+def _own(obj, ref):
+    "makes the CS with the weak reference ref the owner of an element"
+    owner = getattr(obj, "_owner", None)
+    if owner is ref or owner is _SHARED:
+        return
+    if owner is None or owner() is None:
+        _setattr(obj, "_owner", ref)
+    else:
+        # already part of another CS that is still alive
+        _setattr(obj, "_owner", _SHARED)
+
+def _changed(obj):
+    "clears the values derived from an element, by the CS it is part of and any CS that is in turn part of"
+    if obj._owns:
+        _setattr(obj, "_cache", None)
+    owner = getattr(obj, "_owner", None)
+    while owner is not None:
+        if owner is _SHARED:
+            changed()
+            return
+        crs = owner()
+        if crs is None:
+            return
+        _setattr(crs, "_cache", None)
+        owner = crs._owner
+
+def watch(crs):
+    """
+    Makes a CS the owner of all the elements nested in it, so that changing any of them
+    afterwards clears the values derived from the CS. Should be called whenever a value is
+    derived from a CS and stored along with the current version().
+
+    Arguments:
+
+    - *crs*: The CS instance.
+    """
+    ref = weakref.ref(crs)
+    stack = [getattr(crs, name, None) for name in _attribute_names(type(crs))]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, Slots):
+            _own(obj, ref)
+            if obj._owns:
+                # a nested CS owns the elements nested in it, and passes on their changes
+                watch(obj)
+            else:
+                stack.extend(getattr(obj, name, None) for name in _attribute_names(type(obj)))
+        elif isinstance(obj, Elements):
+            _own(obj, ref)
+            stack.extend(obj)
+
+
+class Slots(object):
+    """
+    Base class for classes that store their attributes in __slots__, making
+    them picklable with all pickle protocols. 
+    """
+    __slots__ = ("_owner",)
+
+    # whether instances store values derived from the elements nested in them, see watch()
+    _owns = False
+
+    def __new__(cls, *args, **kwargs):
+        obj = object.__new__(cls)
+        # the CS that the element is part of, see watch(), which is always set since checking
+        # a slot that has not been set is slow
+        _setattr(obj, "_owner", None)
+        return obj
+
+    def __setattr__(self, name, value):
+        # lists are stored as Elements, so that changes to them are noticed too
+        if type(value) is list:
+            value = Elements(value)
+        _setattr(self, name, value)
+        if (self._owner is not None or self._owns) and name not in _CACHES:
+            _changed(self)
+
+    def __delattr__(self, name):
+        _delattr(self, name)
+        if (self._owner is not None or self._owns) and name not in _CACHES:
+            _changed(self)
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                # the owner only applies to this instance
+                if slot in ("__weakref__", "_owner"):
+                    continue
+                try:
+                    state[slot] = getattr(self, slot)
+                except AttributeError:
+                    pass
+        return state
+
+    def __setstate__(self, state):
+        # pickle protocols 0 and 1 create instances without calling __new__
+        _setattr(self, "_owner", None)
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+
+class Field(object):
+    """
+    An attribute stored in a slot, that falls back to the default value given on the
+    class (or any of its subclasses) when it has not been set on the instance.
+    """
+
+    def __init__(self, name, slot):
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, obj, cls):
+        if obj is not None:
+            try:
+                return self.slot.__get__(obj, cls)
+            except AttributeError:
+                pass
+        return cls._defaults.get(self.name)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+class Deferred(object):
+    """
+    An attribute stored in a slot, that when it has not been set on the instance is
+    created on first access, by calling the function stored under its name in the
+    instance's _pending dict.
+    """
+
+    def __init__(self, name, slot):
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, cls)
+        except AttributeError:
+            pending = getattr(obj, "_pending", None)
+            if not pending or self.name not in pending:
+                raise AttributeError(self.name)
+            value = pending[self.name]()
+            if type(value) is list:
+                value = Elements(value)
+            self.slot.__set__(obj, value)
+            pending.pop(self.name, None)
+            return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+        pending = getattr(obj, "_pending", None)
+        if pending:
+            pending.pop(self.name, None)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+class Elements(list):
+    """
+    A list of elements or values held by an element, such as the parameters of a ProjCS,
+    that clears the values derived from it when it is changed, like Slots.
+    """
+    __slots__ = ("_owner",)
+
+    _owns = False
+
+    def __reduce__(self):
+        # the owner only applies to this instance
+        return (Elements, (list(self),))
+
+def _changes(method):
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if getattr(self, "_owner", None) is not None:
+            _changed(self)
+        return result
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__", "__setslice__", "__delslice__"):
+    if hasattr(list, _name):
+        setattr(Elements, _name, _changes(getattr(list, _name)))
+
+
+class SlotsMeta(type):
+    """
+    Metaclass that stores instance attributes in __slots__ instead of a per-instance
+    __dict__, while still allowing subclasses to define the default values of those
+    attributes as plain class attributes, eg:
+
+        class WGS84(Datum):
+            name = DatumName(...)
+
+    The attributes are declared with a __fields__ tuple on the class that introduces them.
+    Subclasses that do not declare their own __slots__ get empty slots automatically.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        fields = tuple(attrs.pop("__fields__", ()))
+        inherited = tuple(field for base in bases for field in getattr(base, "_fields", ()))
+        defaults = {}
+        for base in reversed(bases):
+            defaults.update(getattr(base, "_defaults", {}))
+        for field in fields + inherited:
+            if field in attrs:
+                defaults[field] = attrs.pop(field)
+        attrs["__slots__"] = tuple(attrs.get("__slots__", ())) + tuple("_" + field for field in fields)
+        attrs["_fields"] = inherited + fields
+        attrs["_defaults"] = defaults
+        cls = type.__new__(mcs, name, bases, attrs)
+        for field in fields:
+            setattr(cls, field, Field(field, cls.__dict__["_" + field]))
+        return cls
+
+
+# py2 and py3 compatible way of creating the metaclass base
+Slotted = SlotsMeta("Slotted", (Slots,), {"__slots__": ()})
+
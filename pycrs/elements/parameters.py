@@ -21,6 +21,15 @@
 # so in proj4 one simply needs to give that name, but in wkt one needs to spell it all out.
 
 from . import directions
+from . import fields
+
+import numbers
+import re
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
 
 ################
 
@@ -43,68 +52,178 @@ def find(paramname, crstype, strict=False):
         return None
 
 
+# proj4 degrees-minutes-seconds, eg 10d43'22.5"E
+_DMS = re.compile(r"""^([+-]?)(\d+(?:\.\d*)?)[dD](?:(\d+(?:\.\d*)?)')?(?:(\d+(?:\.\d*)?)")?([NSEWnsew]?)$""")
+
+def parse_number(value):
+    """
+    Converts a parameter value to a canonical float, in a single step.
+
+    Arguments:
+
+    - **value**: A number, or the number as text such as "-96", "6378137.0", or the proj4
+        degrees-minutes-seconds notation "10d43'22.5\"E". 
+
+    Returns:
+
+    - A (number, text) tuple of the float value and the original text it was given as,
+        or None as the text if the value was already a float or was given in degrees-minutes-
+        seconds. Integers keep their original text too, so that they are written back out
+        without decimals. Text that is not a number is returned unchanged as both the number
+        and the text. 
+    """
+    if isinstance(value, _string_types):
+        text = value.strip()
+        try:
+            return float(text), text
+        except ValueError:
+            match = _DMS.match(text)
+            if not match:
+                return text, text
+            sign, deg, mins, secs, hemi = match.groups()
+            number = float(deg) + float(mins or 0) / 60.0 + float(secs or 0) / 3600.0
+            if sign == "-" or hemi in ("S","W","s","w"):
+                number = -number
+            return number, None
+    elif value is None or isinstance(value, bool):
+        return value, None
+    elif isinstance(value, numbers.Integral):
+        return float(value), str(value)
+    else:
+        return float(value), None
+
+def _json_number(value, text):
+    # integers that were given as integers stay integers, so they are written back out the same
+    if text is not None and parse_number(text)[0] == value:
+        try:
+            return int(text)
+        except ValueError:
+            pass
+    return value
+
+
+##################
+# Base class
+
+class Parameter(fields.Slotted):
+    """
+    Base class for all parameters, which all hold a numeric value. 
+    """
+    __slots__ = ("value", "_text")
+
+    # unit of the value when written as a PROJJSON conversion parameter, where None means
+    # the linear unit of the coordinate system
+    projjson_unit = "degree"
+    
+    def __init__(self, value):
+        """
+        Arguments:
+
+        - **value**: The parameter value, as a number or as text. The value is always stored
+            as a float, but the original text is remembered for writing the value back out. 
+        """
+        self.value, self._text = parse_number(value)
+
+    def __setattr__(self, name, value):
+        # the original text no longer applies once the value is changed
+        if name == "value" and getattr(self, "_text", None) is not None and value != getattr(self, "value", value):
+            fields.Slots.__setattr__(self, "_text", None)
+        fields.Slots.__setattr__(self, name, value)
+
+    def _state(self):
+        return (self.__class__, self.value, self._text)
+
+    def get_text(self):
+        """
+        Returns the value as text, using the original text it was given as, as long as
+        the value has not been changed since. 
+        """
+        text = self._text
+        if text is not None:
+            return text
+        return str(self.value)
+
+    def get_number(self):
+        """
+        Returns the value as a number for writing to JSON, as an int if it was given as
+        an integer and has not been changed since, otherwise as a float. 
+        """
+        text = self._text
+        if text is not None:
+            try:
+                return int(text)
+            except ValueError:
+                pass
+        return self.value
+
+    def to_projjson(self, linunit="metre"):
+        """
+        Returns the parameter as a PROJJSON conversion parameter dict.
+
+        Arguments:
+
+        - **linunit** (optional): The PROJJSON unit of linear parameters such as false easting,
+            ie the unit of the coordinate system (defaults to "metre"). 
+        """
+        if not getattr(self, "projjson", None):
+            raise Exception("Parameter %r not supported by PROJJSON" % self)
+        return {"name": self.projjson, "value": self.get_number(), "unit": self.projjson_unit or linunit}
+
+
 ##################
 # Ellipsoid parameters
     
 ##+a         Semimajor radius of the ellipsoid axis
-class SemiMajorRadius:
+class SemiMajorRadius(Parameter):
     proj4 = "+a"    
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "%s=%s" % (self.proj4, self.value)
+        return "%s=%s" % (self.proj4, self.get_text())
 
     def to_esri_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
     def to_ogc_wkt(self):
-        return str(self.value)
+        return self.get_text()
     
 ##+b         Semiminor radius of the ellipsoid axis
-class SemiMinorRadius:
+class SemiMinorRadius(Parameter):
     proj4 = "+b"
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "%s=%s" % (self.proj4, self.value)
+        return "%s=%s" % (self.proj4, self.get_text())
 
     def to_esri_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
     def to_ogc_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
 ##+f         Flattening of the ellipsoid axis
-class Flattening:
+class Flattening(Parameter):
     proj4 = "+f"    
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "%s=%s" % (self.proj4, self.value)
+        return "%s=%s" % (self.proj4, self.get_text())
 
     def to_esri_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
     def to_ogc_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
 ##+rf         Inverse flattening of the ellipsoid axis
-class InverseFlattening:
+class InverseFlattening(Parameter):
     proj4 = "+rf"    
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "%s=%s" % (self.proj4, self.value)
+        return "%s=%s" % (self.proj4, self.get_text())
 
     def to_esri_wkt(self):
-        return str(self.value)
+        return self.get_text()
 
     def to_ogc_wkt(self):
-        return str(self.value)
+        return self.get_text()
     
 
 
@@ -112,182 +231,179 @@ class InverseFlattening:
 # Other parameters
 
 ##+alpha     ? Used with Oblique Mercator and possibly a few others
-class Azimuth:
+class Azimuth(Parameter):
     proj4 = "+alpha"
+    projjson = "Azimuth of initial line"
     esri_wkt = "azimuth"
     ogc_wkt = "azimuth"
     geotiff = "AzimuthAngle"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+alpha=%s" % self.value
+        return "+alpha=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["Azimuth",%s]' % self.value
+        return 'PARAMETER["Azimuth",%s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Azimuth",%s]' % self.value
+        return 'PARAMETER["Azimuth",%s]' % self.get_text()
 
 ##+k         Scaling factor (old name)
 ##+k_0       Scaling factor (new name)
-class ScalingFactor:
-    proj4 = "+k"
+class ScalingFactor(Parameter):
+    proj4 = "+k_0"
+    proj4_aliases = ("+k",)
+    projjson = "Scale factor at natural origin"
+    projjson_aliases = ("Scale factor on initial line", "Scale factor at projection centre")
+    projjson_unit = "unity"
     esri_wkt = "Scale_Factor"
     ogc_wkt = "scale_factor"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+k_0=%s" %self.value
+        return "+k_0=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["scale_factor", %s]' %self.value
+        return 'PARAMETER["scale_factor", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Scale_Factor", %s]' %self.value
+        return 'PARAMETER["Scale_Factor", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "ScaleAtNatOrigin" # or ScaleAtCenter?
 
 ##+lat_0     Latitude of origin
-class LatitudeOrigin:
+class LatitudeOrigin(Parameter):
     proj4 = "+lat_0"
+    projjson = "Latitude of natural origin"
+    projjson_aliases = ("Latitude of false origin", "Latitude of projection centre", "Latitude of origin")
     ogc_wkt = "latitude_of_origin"
     esri_wkt = "Latitude_Of_Origin"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+lat_0=%s" %self.value
+        return "+lat_0=%s" % self.get_text()
 
     def to_ogc_wkt(self):
         # SAME AS LATITUDE OF CENTER???
-        return 'PARAMETER["latitude_of_origin", %s]' %self.value
+        return 'PARAMETER["latitude_of_origin", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Latitude_Of_Origin", %s]' %self.value
+        return 'PARAMETER["Latitude_Of_Origin", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "ProjCenterLat"
     
 ##+lat_1     Latitude of first standard parallel
-class LatitudeFirstStndParallel:
+class LatitudeFirstStndParallel(Parameter):
     proj4 = "+lat_1"
+    projjson = "Latitude of 1st standard parallel"
     ogc_wkt = "standard_parallel_1"
     esri_wkt = "Standard_Parallel_1"
     
-    def __init__(self, value):
-        self.value = value
         
     def to_proj4(self):
-        return "+lat_1=%s" %self.value
+        return "+lat_1=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["standard_parallel_1", %s]' %self.value
+        return 'PARAMETER["standard_parallel_1", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Standard_Parallel_1", %s]' %self.value
+        return 'PARAMETER["Standard_Parallel_1", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "StdParallel1"
     
 ##+lat_2     Latitude of second standard parallel
-class LatitudeSecondStndParallel:
+class LatitudeSecondStndParallel(Parameter):
     proj4 = "+lat_2"
+    projjson = "Latitude of 2nd standard parallel"
     ogc_wkt = "standard_parallel_2"
     esri_wkt = "Standard_Parallel_2"
     
-    def __init__(self, value):
-        self.value = value
     
     def to_proj4(self):
-        return "+lat_2=%s" %self.value
+        return "+lat_2=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["standard_parallel_2", %s]' %self.value
+        return 'PARAMETER["standard_parallel_2", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Standard_Parallel_2", %s]' %self.value
+        return 'PARAMETER["Standard_Parallel_2", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "StdParallel2"
     
 ##+lat_ts    Latitude of true scale
-class LatitudeTrueScale:
-    proj4 = "lat_ts"
+class LatitudeTrueScale(Parameter):
+    proj4 = "+lat_ts"
+    projjson = "Latitude of standard parallel"
     ogc_wkt = "Standard_Parallel_1"
     esri_wkt = "Standard_Parallel_1"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+lat_ts=%s" %self.value
+        return "+lat_ts=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["Standard_Parallel_1", %s]' %self.value
+        return 'PARAMETER["Standard_Parallel_1", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Standard_Parallel_1", %s]' %self.value
+        return 'PARAMETER["Standard_Parallel_1", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "ProjStdParallel1"
     
 ##+lon_0     Central meridian
-class CentralMeridian:
+class CentralMeridian(Parameter):
     proj4 = "+lon_0"
+    projjson = "Longitude of natural origin"
+    projjson_aliases = ("Longitude of false origin", "Longitude of origin")
     ogc_wkt = "Central_Meridian"
     esri_wkt = "Central_Meridian"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+lon_0=%s" %self.value
+        return "+lon_0=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["Central_Meridian", %s]' %self.value
+        return 'PARAMETER["Central_Meridian", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Central_Meridian", %s]' %self.value
+        return 'PARAMETER["Central_Meridian", %s]' % self.get_text()
 
     def to_geotiff(self):
         pass
         #return "ProjCenterLong"
 
 ##+lonc      ? Longitude used with Oblique Mercator and possibly a few others
-class LongitudeCenter:
+class LongitudeCenter(Parameter):
     proj4 = "+lonc"
+    projjson = "Longitude of projection centre"
     ogc_wkt = "Longitude_Of_Center"
     esri_wkt = "Longitude_Of_Center"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+lonc=%s" %self.value
+        return "+lonc=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["Longitude_Of_Center", %s]' %self.value
+        return 'PARAMETER["Longitude_Of_Center", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["Longitude_Of_Center", %s]' %self.value
+        return 'PARAMETER["Longitude_Of_Center", %s]' % self.get_text()
     
 ##+lon_wrap  Center longitude to use for wrapping (see below)
     
 ##+over      Allow longitude output outside -180 to 180 range, disables wrapping (see below)
 
 ##+pm        Alternate prime meridian (typically a city name, see below)
-class PrimeMeridian:
+class PrimeMeridian(Parameter):
     proj4 = "+pm"
     ogc_wkt = "PRIMEM"
     esri_wkt = "PRIMEM"
@@ -332,7 +448,9 @@ class PrimeMeridian:
 
         - **value**: Longitude value relative to Greenwich, or the name of one of these cities: {}. 
         """.format(', '.join(self.cities.keys()))
-        self.value = value
+        if isinstance(value, _string_types) and value.strip().lower() in self.cities:
+            value = self.cities[value.strip().lower()]
+        Parameter.__init__(self, value)
 
     def get_value(self):
         value = self.value
@@ -355,14 +473,32 @@ class PrimeMeridian:
     def to_esri_wkt(self):
         return 'PRIMEM["Greenwich", %s]' %self.get_value()
 
+    def to_projjson(self):
+        name = "Unknown"
+        for city,longitude in self.cities.items():
+            if longitude == self.value:
+                name = city.capitalize()
+                break
+        return {"name": name, "longitude": self.get_number()}
+
 ##+zone     UTM zone
     
 ##+south     Denotes southern hemisphere UTM zone
     
 ##+towgs84   3 or 7 term datum transform parameters (see below)
-class DatumShift:
+class DatumShift(Parameter):
     proj4 = "+towgs84"
     ogc_wkt = "TOWGS84"
+
+    # the PROJJSON names and units of the 3 or 7 transform parameters, in order
+    projjson_params = (("X-axis translation", "metre"),
+                       ("Y-axis translation", "metre"),
+                       ("Z-axis translation", "metre"),
+                       ("X-axis rotation", {"type": "AngularUnit", "name": "arc-second", "conversion_factor": 4.84813681109536e-06}),
+                       ("Y-axis rotation", {"type": "AngularUnit", "name": "arc-second", "conversion_factor": 4.84813681109536e-06}),
+                       ("Z-axis rotation", {"type": "AngularUnit", "name": "arc-second", "conversion_factor": 4.84813681109536e-06}),
+                       ("Scale difference", {"type": "ScaleUnit", "name": "parts per million", "conversion_factor": 1e-06}),
+                       )
     
     def __init__(self, value):
         """
@@ -372,82 +508,116 @@ class DatumShift:
         
         - **value**: A list of 3 or 7 term datum transform parameters.
         """
-        self.value = value
+        parsed = [parse_number(val) for val in value]
+        self.value = [number for number,text in parsed]
+        self._text = tuple(text for number,text in parsed)
+
+    def _state(self):
+        return (self.__class__, tuple(self.value), self._text)
+
+    def get_text(self):
+        """
+        Returns the comma-separated transform parameters as text, using the original text
+        they were given as, as long as the values have not been changed since. 
+        """
+        texts = self._text
+        if texts is None or len(texts) != len(self.value):
+            texts = (None,) * len(self.value)
+        return ",".join((text if text is not None and parse_number(text)[0] == val else str(val)
+                         for val,text in zip(self.value, texts)))
 
     def to_proj4(self):
-        return "+towgs84=%s" %",".join((str(val) for val in self.value))
+        return "+towgs84=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return "TOWGS84[%s]" %",".join((str(val) for val in self.value))
+        return "TOWGS84[%s]" % self.get_text()
 
     def to_esri_wkt(self):
         raise Exception("Parameter %r not supported by ESRI WKT" % self)
+
+    def to_projjson(self):
+        """
+        Returns the datum shift as a PROJJSON transformation dict, for use in a BoundCRS. 
+        """
+        texts = self._text
+        if texts is None or len(texts) != len(self.value):
+            texts = (None,) * len(self.value)
+        if len(self.value) == 3:
+            method = "Geocentric translations (geog2D domain)"
+        else:
+            method = "Position Vector transformation (geog2D domain)"
+        params = []
+        for (name,unit),val,text in zip(self.projjson_params, self.value, texts):
+            if isinstance(unit, dict):
+                unit = dict(unit)
+            params.append({"name": name, "value": _json_number(val, text), "unit": unit})
+        return {"name": "Transformation to WGS84", "method": {"name": method}, "parameters": params}
     
 ##+x_0       False easting
-class FalseEasting:
+class FalseEasting(Parameter):
     proj4 = "+x_0"
+    projjson = "False easting"
+    projjson_aliases = ("Easting at false origin", "Easting at projection centre")
+    projjson_unit = None
     esri_wkt = "False_Easting"
     ogc_wkt = "false_easting"
     geotiff = "FalseEasting"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+x_0=%s" %self.value
+        return "+x_0=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["false_easting", %s]' % self.value
+        return 'PARAMETER["false_easting", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["False_Easting", %s]' % self.value
+        return 'PARAMETER["False_Easting", %s]' % self.get_text()
     
 ##+y_0       False northing
-class FalseNorthing:
+class FalseNorthing(Parameter):
     proj4 = "+y_0"
+    projjson = "False northing"
+    projjson_aliases = ("Northing at false origin", "Northing at projection centre")
+    projjson_unit = None
     esri_wkt = "False_Northing"
     ogc_wkt = "false_northing"
     geotiff = "FalseNorthing"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+y_0=%s" %self.value
+        return "+y_0=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["false_northing", %s]' % self.value
+        return 'PARAMETER["false_northing", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["False_Northing", %s]' % self.value
+        return 'PARAMETER["False_Northing", %s]' % self.get_text()
 
 ##+h       Satellite height
-class SatelliteHeight:
+class SatelliteHeight(Parameter):
     proj4 = "+h"
+    projjson = "Satellite Height"
+    projjson_unit = None
     ogc_wkt = "satellite_height"
     esri_wkt = "satellite_height"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+h=%s" %self.value
+        return "+h=%s" % self.get_text()
 
     def to_ogc_wkt(self):
-        return 'PARAMETER["satellite_height", %s]' % self.value
+        return 'PARAMETER["satellite_height", %s]' % self.get_text()
 
     def to_esri_wkt(self):
-        return 'PARAMETER["satellite_height", %s]' % self.value
+        return 'PARAMETER["satellite_height", %s]' % self.get_text()
 
 ##+tilt     Tilt angle
-class TiltAngle:
+class TiltAngle(Parameter):
     proj4 = "+tilt"
     
-    def __init__(self, value):
-        self.value = value
 
     def to_proj4(self):
-        return "+tilt=%s" %self.value
+        return "+tilt=%s" % self.get_text()
 
     def to_ogc_wkt(self):
         raise Exception("Parameter not supported by OGC WKT")
@@ -2,6 +2,9 @@
 Named projection classes that can be created or parsed. 
 """
 
+from . import fields
+
+
 def find(projname, crstype, strict=False):
     """
     Search for a projection name located in this module.
@@ -35,11 +38,13 @@ def find(projname, crstype, strict=False):
 
 
 ##+proj      Projection name (see `proj -l`)
-class Projection:
+class Projection(fields.Slotted):
     proj4 = "+proj"
     ogc_wkt = "PROJECTION"
     esri_wkt = "PROJECTION"
 
+    __fields__ = ("name",)
+
     name = None
     
     def __init__(self, **kwargs):
@@ -52,6 +57,9 @@ class Projection:
         """
         self.name = kwargs.get('name', self.name)
 
+    def _state(self):
+        return (self.__class__, self.name._state())
+
     def to_proj4(self):
         return "+proj=%s" %self.name.proj4
 
@@ -61,11 +69,20 @@ class Projection:
     def to_esri_wkt(self):
         return 'PROJECTION["%s"]' %self.name.esri_wkt
 
-class ProjName:
-    def __init__(self, proj4="", ogc_wkt="", esri_wkt=""):
+    def to_projjson(self):
+        return {"name": self.name.projjson or self.name.ogc_wkt.replace("_", " ")}
+
+class ProjName(fields.Slots):
+    __slots__ = ("proj4", "ogc_wkt", "esri_wkt", "projjson")
+
+    def __init__(self, proj4="", ogc_wkt="", esri_wkt="", projjson=""):
         self.proj4 = proj4
         self.ogc_wkt = ogc_wkt
         self.esri_wkt = esri_wkt
+        self.projjson = projjson
+
+    def _state(self):
+        return (self.proj4, self.ogc_wkt, self.esri_wkt, self.projjson)
 
 
 
@@ -76,6 +93,7 @@ class Robinson(Projection):
         proj4 = "robin",
         ogc_wkt = "Robinson",
         esri_wkt = "Robinson",
+        projjson = "Robinson",
         )
 
 class UTM(Projection):
@@ -90,6 +108,7 @@ class ObliqueMercator(Projection):
         proj4 = "omerc",
         ogc_wkt = "Hotine_Oblique_Mercator_Two_Point_Natural_Origin", #"Hotine_Oblique_Mercator"
         esri_wkt = "Hotine_Oblique_Mercator_Two_Point_Natural_Origin", #"Hotine_Oblique_Mercator_Azimuth_Natural_Origin"
+        projjson = "Hotine Oblique Mercator (variant B)",
         )
     
 class AlbersEqualArea(Projection):
@@ -97,6 +116,7 @@ class AlbersEqualArea(Projection):
         proj4 = "aea",
         ogc_wkt = "Albers_Conic_Equal_Area",
         esri_wkt = "Albers",
+        projjson = "Albers Equal Area",
         )
 
 class CylindricalEqualArea(Projection):
@@ -104,6 +124,7 @@ class CylindricalEqualArea(Projection):
         proj4 = "cea",
         ogc_wkt = "Cylindrical_Equal_Area",
         esri_wkt = "Cylindrical_Equal_Area",
+        projjson = "Lambert Cylindrical Equal Area",
         )
     
 class EquiDistantConic(Projection):
@@ -111,6 +132,7 @@ class EquiDistantConic(Projection):
         proj4 = "eqdc",
         ogc_wkt = "Equidistant_Conic",
         esri_wkt = "Equidistant_Conic",
+        projjson = "Equidistant Conic",
         )
 
 class EquiDistantCylindrical(Projection):
@@ -119,6 +141,7 @@ class EquiDistantCylindrical(Projection):
         proj4 = "eqc",
         ogc_wkt = "Equidistant_Cylindrical",
         esri_wkt = "Equidistant_Cylindrical",
+        projjson = "Equidistant Cylindrical",
         )
 
 class EquiRectangular(Projection):
@@ -134,6 +157,7 @@ class TransverseMercator(Projection):
         proj4 = "tmerc",
         ogc_wkt = "Transverse_Mercator",
         esri_wkt = "Transverse_Mercator",
+        projjson = "Transverse Mercator",
         )
 
 class GallStereographic(Projection):
@@ -141,6 +165,7 @@ class GallStereographic(Projection):
         proj4 = "gall",
         ogc_wkt = "Gall_Stereographic",
         esri_wkt = "Gall_Stereographic",
+        projjson = "Gall Stereographic",
         )
 
 class Gnomonic(Projection):
@@ -148,6 +173,7 @@ class Gnomonic(Projection):
         proj4 = "gnom",
         ogc_wkt = "Gnomonic",
         esri_wkt = "Gnomonic",
+        projjson = "Gnomonic",
         )
 
 class LambertAzimuthalEqualArea(Projection):
@@ -155,6 +181,7 @@ class LambertAzimuthalEqualArea(Projection):
         proj4 = "laea",
         ogc_wkt = "Lambert_Azimuthal_Equal_Area",
         esri_wkt = "Lambert_Azimuthal_Equal_Area",
+        projjson = "Lambert Azimuthal Equal Area",
         )
 
 class MillerCylindrical(Projection):
@@ -162,6 +189,7 @@ class MillerCylindrical(Projection):
         proj4 = "mill",
         ogc_wkt = "Miller_Cylindrical",
         esri_wkt = "Miller_Cylindrical",
+        projjson = "Miller Cylindrical",
         )
 
 class Mollweide(Projection):
@@ -169,6 +197,7 @@ class Mollweide(Projection):
         proj4 = "moll",
         ogc_wkt = "Mollweide",
         esri_wkt = "Mollweide",
+        projjson = "Mollweide",
         )
 
 class ObliqueStereographic(Projection):
@@ -176,6 +205,7 @@ class ObliqueStereographic(Projection):
         proj4 = "sterea",
         ogc_wkt = "Oblique_Stereographic",
         esri_wkt = "Oblique Stereographic", #"Stereographic_North_Pole"
+        projjson = "Oblique Stereographic",
         )
 
 class Orthographic(Projection):
@@ -183,6 +213,7 @@ class Orthographic(Projection):
         proj4 = "ortho",
         ogc_wkt = "Orthographic",
         esri_wkt = "Orthographic",
+        projjson = "Orthographic",
         )
 
 class Stereographic(Projection):
@@ -190,6 +221,7 @@ class Stereographic(Projection):
         proj4 = "stere",
         ogc_wkt = "Stereographic",
         esri_wkt = "Stereographic",
+        projjson = "Stereographic",
         )
 
 class PolarStereographic(Projection):
@@ -197,6 +229,7 @@ class PolarStereographic(Projection):
         proj4 = "stere",
         ogc_wkt = "Polar_Stereographic", # could also be just stereographic
         esri_wkt = "Stereographic", # but also spelled with additional _South/North_Pole, for the same projection and diff params (maybe just for humans)?...
+        projjson = "Polar Stereographic (variant B)",
         )
 
 class Sinusoidal(Projection):
@@ -204,6 +237,7 @@ class Sinusoidal(Projection):
         proj4 = "sinu",
         ogc_wkt = "Sinusoidal",
         esri_wkt = "Sinusoidal",
+        projjson = "Sinusoidal",
         )
 
 class VanDerGrinten(Projection):
@@ -211,6 +245,7 @@ class VanDerGrinten(Projection):
         proj4 = "vandg",
         ogc_wkt = "VanDerGrinten",
         esri_wkt = "Van_der_Grinten_I",
+        projjson = "Van Der Grinten",
         )
 
 class LambertConformalConic(Projection):
@@ -218,6 +253,7 @@ class LambertConformalConic(Projection):
         proj4 = "lcc",
         ogc_wkt = "Lambert_Conformal_Conic", # possible has some variants
         esri_wkt = "Lambert_Conformal_Conic",
+        projjson = "Lambert Conic Conformal (2SP)",
         )
 
 class Krovak(Projection):
@@ -225,6 +261,7 @@ class Krovak(Projection):
         proj4 = "krovak",
         ogc_wkt = "Krovak",
         esri_wkt = "Krovak",
+        projjson = "Krovak",
         )
 
 class NearSidedPerspective(Projection):
@@ -232,6 +269,7 @@ class NearSidedPerspective(Projection):
         proj4 = "nsper",
         ogc_wkt = "Near_sided_perspective",
         esri_wkt = "Near_sided_perspective", # not confirmed
+        projjson = "Vertical Perspective",
         )
 
 class TiltedPerspective(Projection):
@@ -246,6 +284,7 @@ class InteruptedGoodeHomolosine(Projection):
         proj4 = "igh",
         ogc_wkt = "Interrupted_Goodes_Homolosine",
         esri_wkt = "Interrupted_Goodes_Homolosine",
+        projjson = "Interrupted Goode Homolosine",
         )
 
 class Larrivee(Projection):
@@ -267,6 +306,7 @@ class Mercator(Projection):
         proj4 = "merc",
         ogc_wkt = "Mercator", # has multiple varieties
         esri_wkt = "Mercator",
+        projjson = "Mercator (variant A)",
         )
 
 class ObliqueCylindricalEqualArea(Projection):
@@ -281,6 +321,7 @@ class Polyconic(Projection):
         proj4 = "poly",
         ogc_wkt = "Polyconic",
         esri_wkt = "Polyconic",
+        projjson = "American Polyconic",
         )
 
 class EckertIV(Projection):
@@ -288,6 +329,7 @@ class EckertIV(Projection):
         proj4 = "eck4",
         ogc_wkt = "Eckert_IV",
         esri_wkt = "Eckert_IV",
+        projjson = "Eckert IV",
         )
 
 class EckertVI(Projection):
@@ -295,6 +337,7 @@ class EckertVI(Projection):
         proj4 = "eck6",
         ogc_wkt = "Eckert_VI",
         esri_wkt = "Eckert_VI",
+        projjson = "Eckert VI",
         )
 
 class AzimuthalEquidistant(Projection):
@@ -302,6 +345,7 @@ class AzimuthalEquidistant(Projection):
         proj4 = "aeqd",
         ogc_wkt = "Azimuthal_Equidistant",
         esri_wkt = "Azimuthal_Equidistant",
+        projjson = "Azimuthal Equidistant",
         )
 
 class GeostationarySatellite(Projection):
@@ -309,6 +353,7 @@ class GeostationarySatellite(Projection):
         proj4 = "geos",
         ogc_wkt = "Geostationary_Satellite",
         esri_wkt = "Geostationary_Satellite",
+        projjson = "Geostationary Satellite (Sweep Y)",
         )
 
 
@@ -1,4 +1,12 @@
 
+from . import parameters
+from . import fields
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def find(unitname, crstype, strict=False):
     if not strict:
@@ -23,15 +31,88 @@ def find(unitname, crstype, strict=False):
         return None
 
 
+# conversion factors between pairs of unit multipliers, so each pair is only divided once
+_factors = {}
+_FACTORS_MAX = 4096
+
+def _unit(unit):
+    # unit classes can be given instead of instances
+    if isinstance(unit, type):
+        unit = unit()
+    return unit
+
+def factor(from_unit, to_unit):
+    """
+    Get the factor that values in one unit are multiplied with to convert them to another unit.
+
+    Arguments:
+
+    - **from_unit**: The pycrs.elements.units.Unit instance or class to convert from.
+    - **to_unit**: The pycrs.elements.units.Unit instance or class to convert to.
+
+    Returns:
+
+    - The conversion factor, as a float. 
+    """
+    from_unit, to_unit = _unit(from_unit), _unit(to_unit)
+    if from_unit.unittype and to_unit.unittype and from_unit.unittype != to_unit.unittype:
+        raise Exception("Cannot convert between %s and %s units" % (from_unit.unittype, to_unit.unittype))
+    key = tuple(unit.unitmultiplier.value if unit.unitmultiplier else None for unit in (from_unit, to_unit))
+    try:
+        return _factors[key]
+    except KeyError:
+        if None in key:
+            raise Exception("Cannot convert units without a unit multiplier")
+        if len(_factors) >= _FACTORS_MAX:
+            _factors.clear()
+        result = _factors[key] = float(key[0]) / float(key[1])
+        return result
+
+def convert(values, from_unit, to_unit, inplace=False):
+    """
+    Convert values from one unit to another, eg from US survey feet to meters, or from
+    degrees to radians.
+
+    Arguments:
+
+    - **values**: A number, a sequence of numbers, or a numpy array. 
+    - **from_unit**: The pycrs.elements.units.Unit instance or class to convert from.
+    - **to_unit**: The pycrs.elements.units.Unit instance or class to convert to.
+    - **inplace** (optional): If True and values is a numpy array of floats, the array is
+        converted in place instead of returning a new array (defaults to False). 
+
+    Returns:
+
+    - The converted values, as a float for a single number, or otherwise as a numpy array
+        if numpy is installed or a list if not. 
+    """
+    multiplier = factor(from_unit, to_unit)
+    if isinstance(values, (int, float)):
+        return values * multiplier
+    elif np is None:
+        return [value * multiplier for value in values]
+    elif inplace and isinstance(values, np.ndarray) and values.dtype.kind == "f" and values.flags.writeable:
+        values *= multiplier
+        return values
+    else:
+        return np.asarray(values, dtype=float) * multiplier
+
+
 ##################
 # Unit base class
 # +unit and +to_meter are what makes up 'UNIT["Meter",1.0]'
-class Unit:
+class Unit(fields.Slotted):
+    proj4 = "+units"
     ogc_wkt = "UNIT"
     esri_wkt = "UNIT"
 
+    __fields__ = ("unitname", "unitmultiplier")
+
     unitname = None
     unitmultiplier = None
+
+    # either "linear" or "angular", or None if it could be either
+    unittype = None
     
     def __init__(self, **kwargs):
         """
@@ -45,28 +126,68 @@ class Unit:
         self.unitname = kwargs.get('unitname', self.unitname)
         self.unitmultiplier = kwargs.get('unitmultiplier', self.unitmultiplier)
 
+    def _state(self):
+        return (self.__class__, self.unitname._state(), self.unitmultiplier._state())
+
+    def convert(self, values, to_unit, inplace=False):
+        """
+        Convert values in this unit to another unit, see pycrs.elements.units.convert().
+
+        Arguments:
+
+        - **values**: A number, a sequence of numbers, or a numpy array. 
+        - **to_unit**: The pycrs.elements.units.Unit instance or class to convert to.
+        - **inplace** (optional): If True and values is a numpy array of floats, the array is
+            converted in place instead of returning a new array (defaults to False). 
+        """
+        return convert(values, self, to_unit, inplace)
+
     def to_proj4(self):
         # always use unit type, or if unknown unit type use meter multiplier
         if isinstance(self, Unknown):
-            return "+to_meter=%r" % self.unitmultiplier.value
+            return "+to_meter=%s" % self.unitmultiplier.get_text()
         else:
             return "+units=%s" % self.unitname.proj4
 
     def to_ogc_wkt(self):
-        return 'UNIT["%s", %r]' %(self.unitname.ogc_wkt, self.unitmultiplier.value)
+        return 'UNIT["%s", %s]' %(self.unitname.ogc_wkt, self.unitmultiplier.get_text())
 
     def to_esri_wkt(self):
-        return 'UNIT["%s", %r]' %(self.unitname.esri_wkt, self.unitmultiplier.value)
+        return 'UNIT["%s", %s]' %(self.unitname.esri_wkt, self.unitmultiplier.get_text())
+
+    def to_projjson(self, unittype="LinearUnit"):
+        """
+        Returns the unit as a PROJJSON unit, either as the short name of the standard
+        "metre" and "degree" units, or as a unit dict. 
+
+        Arguments:
+
+        - **unittype** (optional): The PROJJSON unit type, "LinearUnit" (default) or "AngularUnit". 
+        """
+        name = self.unitname.projjson or self.unitname.ogc_wkt
+        multiplier = self.unitmultiplier.get_number()
+        default = self.__class__.unitmultiplier
+        if name in ("metre", "degree") and default is not None and multiplier == default.value:
+            return name
+        return {"type": unittype, "name": name, "conversion_factor": multiplier}
 
 ##+units     meters, US survey feet, etc.
-class UnitName:
-    def __init__(self, proj4="", ogc_wkt="", esri_wkt=""):
+class UnitName(fields.Slots):
+    __slots__ = ("proj4", "ogc_wkt", "esri_wkt", "projjson")
+
+    def __init__(self, proj4="", ogc_wkt="", esri_wkt="", projjson=""):
         self.proj4 = proj4
         self.ogc_wkt = ogc_wkt
         self.esri_wkt = esri_wkt
+        self.projjson = projjson
+
+    def _state(self):
+        return (self.proj4, self.ogc_wkt, self.esri_wkt, self.projjson)
 
 ##+to_meter  Multiplier to convert map units to 1.0m
-class UnitMultiplier: 
+class UnitMultiplier(parameters.Parameter): 
+    proj4 = "+to_meter"
+    
     def __init__(self, value):
         """
         The multiplier factor for converting coordinate units to the coordinate system reference unit.
@@ -76,7 +197,7 @@ class UnitMultiplier:
 
         - **value**: the meter multiplier, as a float.
         """
-        self.value = value
+        parameters.Parameter.__init__(self, value)
 
 
 ###################################
@@ -87,32 +208,40 @@ class Meter(Unit):
                         proj4 = "m",
                         ogc_wkt = "Meters", # or is it metre?? sometimes even Meter?
                         esri_wkt = "Meter",
+                        projjson = "metre",
                         )
     unitmultiplier = UnitMultiplier(1.0)
+    unittype = "linear"
 
 class Degree(Unit):
     unitname = UnitName(
                         proj4 = "degrees",
                         ogc_wkt = "degree",
                         esri_wkt = "Degree",
+                        projjson = "degree",
                         )
     unitmultiplier = UnitMultiplier(0.017453292519943295) # NOTE: "For angular units, the conversion factor is the scalar value that converts the described units into radians."
+    unittype = "angular"
 
 class US_Feet(Unit):
     unitname = UnitName(
                         proj4 = "us-ft",
                         ogc_wkt = "Foot_US",
                         esri_wkt = "Foot_US",
+                        projjson = "US survey foot",
                         )
     unitmultiplier = UnitMultiplier(0.304800609601219241)
+    unittype = "linear"
 
 class International_Feet(Unit):
     unitname = UnitName(
                         proj4 = "ft",
                         ogc_wkt = "Foot",
                         esri_wkt = "Foot",
+                        projjson = "foot",
                         )
     unitmultiplier = UnitMultiplier(0.3048) 
+    unittype = "linear"
 
 class Unknown(Unit):
     unitname = UnitName(
@@ -0,0 +1,343 @@
+"""
+Vectorized geodesic calculations on the ellipsoid of a coordinate system, such as
+distances, azimuths, polygon areas, and conversion to and from geocentric coordinates.
+Requires numpy.
+
+All functions take longitudes and latitudes in degrees, and work on scalars as well
+as whole numpy arrays at once.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Geodesic calculations require numpy to be installed")
+
+def _result(values):
+    # floats for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+def _wrap_lon(lon):
+    "wrap longitudes in degrees to the range [-180, 180)"
+    return (lon + 180) % 360 - 180
+
+def _reduced_lat(phi, f):
+    "the reduced latitude in radians, for latitude phi in radians"
+    return np.arctan2((1 - f) * np.sin(phi), np.cos(phi))
+
+def _vincenty_coeffs(cos2_alpha, ellips):
+    # the series coefficients A and B for the geodesic with the given equatorial azimuth
+    u2 = cos2_alpha * ellips.ep2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    return A, B
+
+def _delta_sigma(B, sin_sigma, cos_sigma, cos_2sigma_m):
+    return B * sin_sigma * (cos_2sigma_m + B / 4 * (cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sigma_m**2)))
+
+def inverse(ellips, lon1, lat1, lon2, lat2, tolerance=1e-12, max_iter=200):
+    """
+    Solves the inverse geodesic problem with Vincenty's formulae, giving the shortest distance
+    between pairs of points on the ellipsoid, and the azimuths at each end.
+
+    Vincenty's formulae are accurate to within a millimeter, but may fail to converge for
+    points that are nearly antipodal, in which case the results are NaN.
+
+    Arguments:
+
+    - *ellips*: The pycrs.elements.ellipsoids.Ellipsoid instance.
+    - *lon1*, *lat1*: Longitudes and latitudes of the first points.
+    - *lon2*, *lat2*: Longitudes and latitudes of the second points.
+    - *tolerance* (optional): Convergence tolerance in radians (defaults to 1e-12).
+    - *max_iter* (optional): Maximum number of iterations (defaults to 200).
+
+    Returns:
+
+    - A tuple (distance, azi1, azi2) of the distances in meters, and the forward azimuths
+        in degrees clockwise from north at the first and second points.
+    """
+    _require_numpy()
+    b, f = ellips.b, ellips.f
+    lon1, lat1, lon2, lat2 = np.broadcast_arrays(*[np.asarray(val, dtype=float) for val in (lon1, lat1, lon2, lat2)])
+    shape = lon1.shape
+    L = np.radians(_wrap_lon(lon2 - lon1)).ravel()
+    U1 = _reduced_lat(np.radians(lat1), f).ravel()
+    U2 = _reduced_lat(np.radians(lat2), f).ravel()
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    def _iterate(lam, i):
+        # one iteration for the points with index i, returning the new lambda and intermediate terms
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cosU2[i] * sin_lam, cosU1[i] * sinU2[i] - sinU1[i] * cosU2[i] * cos_lam)
+        cos_sigma = sinU1[i] * sinU2[i] + cosU1[i] * cosU2[i] * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        # coincident points have no azimuth
+        sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1[i] * cosU2[i] * sin_lam / sin_sigma)
+        cos2_alpha = 1 - sin_alpha**2
+        # equatorial lines have no midpoint latitude
+        cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1[i] * sinU2[i] / cos2_alpha)
+        C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam = L[i] + (1 - C) * f * sin_alpha * (sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m**2)))
+        return lam, (sin_sigma, cos_sigma, sigma, cos2_alpha, cos_2sigma_m)
+
+    # only keep iterating the points that have not yet converged
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    active = np.arange(len(L))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iter):
+            new, terms = _iterate(lam[active], active)
+            done = np.abs(new - lam[active]) <= tolerance
+            lam[active] = new
+            converged[active[done]] = True
+            active = active[~done]
+            if not len(active):
+                break
+
+        # the final terms for the converged lambdas
+        everything = np.arange(len(L))
+        sin_sigma, cos_sigma, sigma, cos2_alpha, cos_2sigma_m = _iterate(lam, everything)[1]
+    A, B = _vincenty_coeffs(cos2_alpha, ellips)
+    distance = b * A * (sigma - _delta_sigma(B, sin_sigma, cos_sigma, cos_2sigma_m))
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    azi1 = np.degrees(np.arctan2(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam))
+    azi2 = np.degrees(np.arctan2(cosU1 * sin_lam, -sinU1 * cosU2 + cosU1 * sinU2 * cos_lam))
+    distance, azi1, azi2 = [np.where(converged, values, np.nan).reshape(shape) for values in (distance, azi1, azi2)]
+    return _result(distance), _result(azi1), _result(azi2)
+
+def direct(ellips, lon1, lat1, azi1, distance, tolerance=1e-12, max_iter=200):
+    """
+    Solves the direct geodesic problem with Vincenty's formulae, giving the point reached
+    by travelling a distance along the geodesic from a point in a given direction.
+
+    Arguments:
+
+    - *ellips*: The pycrs.elements.ellipsoids.Ellipsoid instance.
+    - *lon1*, *lat1*: Longitudes and latitudes of the starting points.
+    - *azi1*: Forward azimuths at the starting points in degrees clockwise from north.
+    - *distance*: Distances to travel in meters.
+    - *tolerance* (optional): Convergence tolerance in radians (defaults to 1e-12).
+    - *max_iter* (optional): Maximum number of iterations (defaults to 200).
+
+    Returns:
+
+    - A tuple (lon2, lat2, azi2) of the longitudes and latitudes of the reached points,
+        and the forward azimuths there in degrees.
+    """
+    _require_numpy()
+    b, f = ellips.b, ellips.f
+    lon1, lat1, azi1, distance = np.broadcast_arrays(*[np.asarray(val, dtype=float) for val in (lon1, lat1, azi1, distance)])
+    alpha1 = np.radians(azi1)
+    sin_alpha1, cos_alpha1 = np.sin(alpha1), np.cos(alpha1)
+    U1 = _reduced_lat(np.radians(lat1), f)
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sigma1 = np.arctan2(np.tan(U1), cos_alpha1)
+    sin_alpha = cosU1 * sin_alpha1
+    cos2_alpha = 1 - sin_alpha**2
+    A, B = _vincenty_coeffs(cos2_alpha, ellips)
+
+    sigma = distance / (b * A)
+    for _ in range(max_iter):
+        cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+        sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+        sigma_prev = sigma
+        sigma = distance / (b * A) + _delta_sigma(B, sin_sigma, cos_sigma, cos_2sigma_m)
+        if (np.abs(sigma - sigma_prev) <= tolerance).all():
+            break
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+    sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+
+    tmp = sinU1 * sin_sigma - cosU1 * cos_sigma * cos_alpha1
+    lat2 = np.arctan2(sinU1 * cos_sigma + cosU1 * sin_sigma * cos_alpha1, (1 - f) * np.hypot(sin_alpha, tmp))
+    lam = np.arctan2(sin_sigma * sin_alpha1, cosU1 * cos_sigma - sinU1 * sin_sigma * cos_alpha1)
+    C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+    L = lam - (1 - C) * f * sin_alpha * (sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m**2)))
+    lon2 = _wrap_lon(lon1 + np.degrees(L))
+    azi2 = np.degrees(np.arctan2(sin_alpha, -tmp))
+    return _result(lon2), _result(np.degrees(lat2)), _result(azi2)
+
+def _authalic(ellips):
+    "returns a function giving the authalic latitude in radians, and the authalic radius"
+    e2 = ellips.e2
+    if e2 == 0:
+        return (lambda phi: phi), ellips.a
+    e = ellips.e
+    def q(sin_phi):
+        return (1 - e2) * (sin_phi / (1 - e2 * sin_phi**2) - np.log((1 - e * sin_phi) / (1 + e * sin_phi)) / (2 * e))
+    qp = q(1.0)
+    def authalic(phi):
+        return np.arcsin(np.clip(q(np.sin(phi)) / qp, -1, 1))
+    return authalic, ellips.a * np.sqrt(qp / 2)
+
+def polygon_area(ellips, lons, lats, rings=None):
+    """
+    Calculates the area of polygon rings on the ellipsoid.
+
+    The rings are mapped to the sphere with the same surface area as the ellipsoid, where
+    their area is the spherical excess of their edges. Edges are taken to be geodesics of
+    that sphere rather than of the ellipsoid, which for edges up to about 100 km changes the
+    area by less than one part in ten million, and for edges of 2000 km by about one part in
+    twenty thousand.
+
+    Arguments:
+
+    - *ellips*: The pycrs.elements.ellipsoids.Ellipsoid instance.
+    - *lons*, *lats*: Longitudes and latitudes of the ring vertices. The last vertex is
+        connected back to the first, so the ring does not have to be closed.
+    - *rings* (optional): To calculate the areas of many rings at once, the start index of
+        each ring in the vertex arrays. If None, all the vertices are one ring (default).
+
+    Returns:
+
+    - The area in square meters, positive for counterclockwise rings and negative for
+        clockwise rings, or an array of areas if rings is given.
+    """
+    _require_numpy()
+    lons = np.asarray(lons, dtype=float).ravel()
+    lats = np.asarray(lats, dtype=float).ravel()
+    starts = np.asarray([0] if rings is None else rings, dtype=np.intp)
+    ends = np.append(starts[1:], len(lons))
+
+    # each vertex is connected to the next, and the last of each ring back to its first
+    following = np.arange(1, len(lons) + 1)
+    following[ends - 1] = starts
+
+    authalic, radius = _authalic(ellips)
+    t = np.tan(authalic(np.radians(lats)) / 2)
+    dlon = np.radians(_wrap_lon(lons[following] - lons))
+    # spherical excess of the area between each edge and the pole
+    excess = -2 * np.arctan2(np.tan(dlon / 2) * (t + t[following]), 1 + t * t[following])
+    areas = np.add.reduceat(excess, starts) * radius**2
+    total = 4 * np.pi * radius**2
+    # rings that go around a pole are measured from the other side of the pole
+    winding = np.add.reduceat(dlon, starts)
+    areas = np.where(np.abs(winding) > np.pi, areas + total / 2, areas)
+    # areas that are more than half the ellipsoid are given as the opposite, the area outside the ring
+    areas = (areas + total / 2) % total - total / 2
+    if rings is None:
+        return areas[0].item()
+    return areas
+
+# number of points converted at a time, so that the temporary arrays stay small
+CHUNKSIZE = 65536
+
+def _chunked(func, inputs, out, chunksize):
+    """
+    Applies func to chunks of the broadcast inputs along their first axis, writing each of
+    the returned arrays to the corresponding output array, eg to memory mapped arrays.
+    """
+    inputs = [np.asarray(val, dtype=float) for val in inputs]
+    shape = np.broadcast(*inputs).shape
+    if not shape:
+        return tuple(_result(np.asarray(result)) for result in func(*inputs))
+    if out is None:
+        out = tuple(np.empty(shape) for _ in inputs)
+    # broadcast views only, so that scalars are not expanded to the full size
+    inputs = [np.broadcast_to(val, shape) for val in inputs]
+    for start in range(0, shape[0], chunksize or CHUNKSIZE):
+        chunk = slice(start, start + (chunksize or CHUNKSIZE))
+        results = func(*[val[chunk] for val in inputs])
+        for array, result in zip(out, results):
+            array[chunk] = result
+    return out
+
+def _geogcs(crs):
+    # the geographic cs of a projected cs
+    return getattr(crs, "geogcs", crs)
+
+def to_geocentric(crs, lons, lats, heights=0, out=None, chunksize=None):
+    """
+    Converts geodetic longitudes, latitudes and ellipsoidal heights to geocentric (ECEF)
+    coordinates, ie meters along the axes of a cartesian system with its origin at the center
+    of the ellipsoid, the x axis through the Greenwich meridian on the equator, and the z axis
+    through the north pole.
+
+    Arguments:
+
+    - *crs*: The GeogCS instance whose datum ellipsoid and prime meridian the coordinates
+        are given in, or a ProjCS to use its GeogCS.
+    - *lons*, *lats*: Longitudes and latitudes in degrees, relative to the prime meridian.
+    - *heights* (optional): Heights above the ellipsoid in meters (defaults to 0).
+    - *out* (optional): A tuple of three float arrays to write the x, y and z coordinates to,
+        eg memory mapped arrays for inputs that do not fit in memory. If None, new arrays
+        are created (default).
+    - *chunksize* (optional): Number of points converted at a time, along the first axis of
+        the arrays (defaults to CHUNKSIZE).
+
+    Returns:
+
+    - A tuple (x, y, z) of the geocentric coordinates in meters.
+    """
+    _require_numpy()
+    geogcs = _geogcs(crs)
+    ellips = geogcs.datum.ellips
+    a, e2 = ellips.a, ellips.e2
+    pm = geogcs.prime_mer.value or 0
+
+    def _convert(lons, lats, heights):
+        lam = np.radians(lons + pm)
+        phi = np.radians(lats)
+        sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+        # prime vertical radius of curvature
+        N = a / np.sqrt(1 - e2 * sin_phi**2)
+        return ((N + heights) * cos_phi * np.cos(lam),
+                (N + heights) * cos_phi * np.sin(lam),
+                (N * (1 - e2) + heights) * sin_phi)
+
+    return _chunked(_convert, (lons, lats, heights), out, chunksize)
+
+def from_geocentric(crs, x, y, z, out=None, chunksize=None):
+    """
+    Converts geocentric (ECEF) coordinates to geodetic longitudes, latitudes and ellipsoidal
+    heights, the inverse of to_geocentric().
+
+    Uses Vermeille's closed form solution, which is exact without any iterations, for all
+    points further than about 40 km from the center of the earth.
+
+    Arguments:
+
+    - *crs*: The GeogCS instance whose datum ellipsoid and prime meridian to convert to, or
+        a ProjCS to use its GeogCS.
+    - *x*, *y*, *z*: Geocentric coordinates in meters.
+    - *out* (optional): A tuple of three float arrays to write the longitudes, latitudes and
+        heights to. If None, new arrays are created (default).
+    - *chunksize* (optional): Number of points converted at a time, along the first axis of
+        the arrays (defaults to CHUNKSIZE).
+
+    Returns:
+
+    - A tuple (lon, lat, height) of the longitudes and latitudes in degrees relative to the
+        prime meridian, and the heights above the ellipsoid in meters.
+    """
+    _require_numpy()
+    geogcs = _geogcs(crs)
+    ellips = geogcs.datum.ellips
+    a, e2 = ellips.a, ellips.e2
+    e4 = e2**2
+    pm = geogcs.prime_mer.value or 0
+
+    def _convert(x, y, z):
+        rho = np.hypot(x, y)
+        p = (rho / a)**2
+        q = (1 - e2) * (z / a)**2
+        r = (p + q - e4) / 6
+        s = e4 * p * q / (4 * r**3)
+        t = np.cbrt(1 + s + np.sqrt(s * (2 + s)))
+        u = r * (1 + t + 1 / t)
+        v = np.sqrt(u**2 + e4 * q)
+        w = e2 * (u + v - q) / (2 * v)
+        k = np.sqrt(u + v + w**2) - w
+        D = k * rho / (k + e2)
+        dist = np.hypot(D, z)
+        lat = np.degrees(2 * np.arctan2(z, D + dist))
+        height = (k + e2 - 1) / k * dist
+        lon = _wrap_lon(np.degrees(np.arctan2(y, x)) - pm)
+        return lon, lat, height
+
+    return _chunked(_convert, (x, y, z), out, chunksize)
@@ -0,0 +1,235 @@
+"""
+Datum shifts with NTv2 grid shift files (.gsb), such as the grids published for shifting
+between NAD27 and NAD83, which are far more accurate than the towgs84 parameters of a datum.
+Requires numpy.
+
+The grids are memory-mapped rather than loaded into memory, so that only the parts of a
+national grid that points fall in are read from disk.
+"""
+
+import mmap
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the size of each header record and of each grid node
+_RECORD = 16
+
+# the angular units that grid bounds and shifts can be given in, in degrees
+_GS_TYPES = {"SECONDS": 1 / 3600.0, "MINUTES": 1 / 60.0, "DEGREES": 1.0}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Grid shifts require numpy to be installed")
+
+def _result(values):
+    # floats for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+
+class GridShift(object):
+    """
+    A datum shift defined by an NTv2 grid shift file, which is memory-mapped rather than
+    loaded into memory.
+
+    The file consists of one or more sub-grids of latitude and longitude shifts at regularly
+    spaced nodes. Sub-grids can contain denser child grids for some areas, and each point is
+    shifted with the densest sub-grid that contains it, by bilinear interpolation between the
+    four nodes around it.
+    """
+
+    def __init__(self, filepath):
+        """
+        Arguments:
+
+        - **filepath**: The filepath of the NTv2 grid shift file.
+        """
+        _require_numpy()
+        self.filepath = filepath
+        with open(filepath, "rb") as fobj:
+            self._mmap = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        # files can be written with either byte order, which the count of overview records tells
+        if struct.unpack_from("<i", self._mmap, 8)[0] == 11:
+            self._endian = "<"
+        elif struct.unpack_from(">i", self._mmap, 8)[0] == 11:
+            self._endian = ">"
+        else:
+            raise ValueError("%r is not a valid NTv2 grid shift file" % filepath)
+
+        overview = self._header(0, 11)
+        self.source = overview["SYSTEM_F"].strip()
+        self.target = overview["SYSTEM_T"].strip()
+        gs_type = overview["GS_TYPE"].strip().upper()
+        if gs_type not in _GS_TYPES:
+            raise ValueError("Unknown NTv2 grid units %r" % gs_type)
+        unit = _GS_TYPES[gs_type]
+
+        # the bounds and spacing of each sub-grid in degrees, with longitudes positive east
+        self.names = []
+        bounds = []
+        self._grids = []
+        parents = []
+        offset = overview["NUM_OREC"] * _RECORD
+        for _ in range(overview["NUM_FILE"]):
+            header = self._header(offset, overview["NUM_SREC"])
+            offset += overview["NUM_SREC"] * _RECORD
+            south, north = header["S_LAT"] * unit, header["N_LAT"] * unit
+            # the file gives longitudes positive west
+            west, east = -header["W_LONG"] * unit, -header["E_LONG"] * unit
+            latinc, loninc = header["LAT_INC"] * unit, header["LONG_INC"] * unit
+            rows = int(round((north - south) / latinc)) + 1
+            cols = int(round((east - west) / loninc)) + 1
+            count = header["GS_COUNT"]
+            if rows * cols != count:
+                raise ValueError("Sub-grid %r of %r has %i nodes instead of %i" % (header["SUB_NAME"], filepath, count, rows * cols))
+            # the nodes start in the south east corner, and go west along each row, with the
+            # latitude and longitude shift and their accuracies
+            nodes = np.frombuffer(self._mmap, dtype=self._endian + "f4", count=count * 4, offset=offset)
+            self._grids.append((south, east, latinc, loninc, rows, cols, nodes.reshape(count, 4), unit))
+            self.names.append(header["SUB_NAME"].strip())
+            parents.append(header["PARENT"].strip())
+            bounds.append((west, south, east, north))
+            offset += count * _RECORD
+        self.bounds = np.array(bounds, dtype=float).reshape(-1, 4)
+
+        # the sub-grids at the top of the hierarchy, and the children of each sub-grid
+        self._children = [[] for _ in self.names]
+        self._top = []
+        for i, parent in enumerate(parents):
+            if parent in self.names and parent != self.names[i]:
+                self._children[self.names.index(parent)].append(i)
+            else:
+                self._top.append(i)
+
+    def __len__(self):
+        return len(self._grids)
+
+    def _header(self, offset, count):
+        "the values of count header records, by their label"
+        header = {}
+        for i in range(count):
+            label = self._mmap[offset + i * _RECORD:offset + i * _RECORD + 8].decode("ascii").strip().upper()
+            value = offset + i * _RECORD + 8
+            if label in ("NUM_OREC", "NUM_SREC", "NUM_FILE", "GS_COUNT"):
+                header[label] = struct.unpack_from(self._endian + "i", self._mmap, value)[0]
+            elif label in ("S_LAT", "N_LAT", "E_LONG", "W_LONG", "LAT_INC", "LONG_INC"):
+                header[label] = struct.unpack_from(self._endian + "d", self._mmap, value)[0]
+            else:
+                header[label] = self._mmap[value:value + 8].decode("ascii", "replace")
+        return header
+
+    def _interpolate(self, k, lons, lats):
+        "the longitude and latitude shifts in degrees within sub-grid k"
+        south, east, latinc, loninc, rows, cols, nodes, unit = self._grids[k]
+        # the position in the grid, with columns counted westward from the east edge
+        x = (east - lons) / loninc
+        y = (lats - south) / latinc
+        col = np.clip(np.floor(x), 0, max(cols - 2, 0)).astype(np.int64)
+        row = np.clip(np.floor(y), 0, max(rows - 2, 0)).astype(np.int64)
+        fx, fy = x - col, y - row
+        i = row * cols + col
+        right, up = min(cols - 1, 1), min(rows - 1, 1) * cols
+        # only the nodes that are indexed are read from disk
+        shifts = [nodes[index, :2].astype(float) for index in (i, i + right, i + up, i + up + right)]
+        lower = shifts[0] + (shifts[1] - shifts[0]) * fx[:, None]
+        upper = shifts[2] + (shifts[3] - shifts[2]) * fx[:, None]
+        shift = (lower + (upper - lower) * fy[:, None]) * unit
+        # the longitude shift is positive west
+        return -shift[:, 1], shift[:, 0]
+
+    def _shift_grids(self, lons, lats, index, grids, dlons, dlats):
+        """
+        Finds the shifts of the points with the given index from the densest of the grids and
+        their children that contain them, returning the index of the points outside all of them.
+        """
+        for k in grids:
+            if not len(index):
+                break
+            west, south, east, north = self.bounds[k]
+            x, y = lons[index], lats[index]
+            inside = (x >= west) & (x <= east) & (y >= south) & (y <= north)
+            if not inside.any():
+                continue
+            within, index = index[inside], index[~inside]
+            if self._children[k]:
+                within = self._shift_grids(lons, lats, within, self._children[k], dlons, dlats)
+            if len(within):
+                dlons[within], dlats[within] = self._interpolate(k, lons[within], lats[within])
+        return index
+
+    def shifts(self, lons, lats):
+        """
+        Gets the shifts at points in the source datum of the grid.
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees.
+
+        Returns:
+
+        - A tuple (dlon, dlat) of the shifts in degrees, which are NaN for points outside the grid.
+        """
+        lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        shape = lons.shape
+        lons, lats = lons.ravel(), lats.ravel()
+        dlons = np.full(lons.shape, np.nan)
+        dlats = np.full(lons.shape, np.nan)
+        self._shift_grids(lons, lats, np.arange(len(lons)), self._top, dlons, dlats)
+        return _result(dlons.reshape(shape)), _result(dlats.reshape(shape))
+
+    def forward(self, lons, lats):
+        """
+        Shifts points from the source datum of the grid to the target datum, eg from NAD27
+        to NAD83.
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees.
+
+        Returns:
+
+        - A tuple (lon, lat) of the shifted longitudes and latitudes, which are NaN for points
+            outside the grid.
+        """
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        dlons, dlats = self.shifts(lons, lats)
+        return _result(np.asarray(lons + dlons)), _result(np.asarray(lats + dlats))
+
+    def inverse(self, lons, lats, tolerance=1e-12, max_iter=10):
+        """
+        Shifts points from the target datum of the grid back to the source datum, eg from NAD83
+        to NAD27. Since the grid is defined in the source datum, the shifts are found iteratively.
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees.
+        - **tolerance** (optional): Convergence tolerance in degrees (defaults to 1e-12).
+        - **max_iter** (optional): Maximum number of iterations (defaults to 10).
+
+        Returns:
+
+        - A tuple (lon, lat) of the shifted longitudes and latitudes, which are NaN for points
+            outside the grid.
+        """
+        lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        guess_lons, guess_lats = lons, lats
+        for _ in range(max_iter):
+            dlons, dlats = self.shifts(guess_lons, guess_lats)
+            new_lons, new_lats = lons - dlons, lats - dlats
+            change = np.maximum(np.abs(new_lons - guess_lons), np.abs(new_lats - guess_lats))
+            guess_lons, guess_lats = new_lons, new_lats
+            # points outside the grid stay NaN
+            if not (change > tolerance).any():
+                break
+        return _result(np.asarray(guess_lons)), _result(np.asarray(guess_lats))
+
+    def close(self):
+        "Closes the memory-mapped file."
+        self._grids = []
+        self._mmap.close()
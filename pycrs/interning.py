@@ -0,0 +1,102 @@
+"""
+Opt-in interning of coordinate system objects, so that identical coordinate systems
+can share a single canonical instance instead of each keeping their own object tree.
+"""
+
+import threading
+import weakref
+
+
+class InternPool(object):
+    """
+    A pool of canonical CS instances, keyed by their values.
+
+    Only weak references are kept, so canonical instances that are no longer used
+    anywhere else are dropped from the pool. The pool can safely be shared between
+    threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refs = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._refs)
+
+    def intern(self, crs):
+        """
+        Returns the canonical instance that is equal to the given CS, or registers
+        and returns the given CS if there is no such instance yet.
+
+        Arguments:
+
+        - **crs**: The GeogCS or ProjCS instance to intern.
+
+        Returns:
+
+        - The canonical CS instance. Since it is shared, it should not be modified.
+        """
+        key = crs._state()
+        with self._lock:
+            canonical = self._refs.get(key)
+            # a canonical instance that has since been modified no longer qualifies
+            if canonical is not None and canonical._state() == key:
+                return canonical
+            self._refs[key] = crs
+            return crs
+
+    def clear(self):
+        """
+        Removes all instances from the pool.
+        """
+        with self._lock:
+            self._refs.clear()
+
+
+default_pool = InternPool()
+
+_active = None
+
+
+def intern(crs, pool=None):
+    """
+    Returns the canonical instance that is equal to the given CS, using the default
+    pool unless another pool is given.
+
+    Arguments:
+
+    - **crs**: The GeogCS or ProjCS instance to intern.
+    - **pool** (optional): The InternPool instance to use.
+
+    Returns:
+
+    - The canonical CS instance. Since it is shared, it should not be modified.
+    """
+    if pool is None:
+        pool = default_pool
+    return pool.intern(crs)
+
+def enable(pool=None):
+    """
+    Enables interning of all CS instances returned by the pycrs.parse and pycrs.load
+    functions, using the default pool unless another pool is given.
+    """
+    global _active
+    if pool is None:
+        pool = default_pool
+    _active = pool
+
+def disable():
+    """
+    Disables interning of parsed CS instances.
+    """
+    global _active
+    _active = None
+
+def _parsed(crs):
+    # called on every newly parsed crs
+    pool = _active
+    if pool is None:
+        return crs
+    return pool.intern(crs)
+
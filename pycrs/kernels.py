@@ -0,0 +1,319 @@
+"""
+Compiled projection kernels, that project longitudes and latitudes to the x and y
+coordinates of a projected coordinate system and back again. Requires numpy.
+
+Compiling a ProjCS calculates all the terms that only depend on the projection
+parameters and the ellipsoid once, so projecting a batch of points only costs the
+arithmetic that depends on the points themselves.
+"""
+
+import math
+
+from .elements import parameters
+from .elements import projections
+from .elements import units
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Projecting coordinates requires numpy to be installed")
+
+def _result(values):
+    # floats for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+def _wrap_lon(lon):
+    "wrap longitudes in degrees to the range [-180, 180), skipping the work if they already are"
+    if lon.size and (lon.min() < -180 or lon.max() >= 180):
+        return (lon + 180) % 360 - 180
+    return lon
+
+def _param(crs, classes, default=None):
+    "the value of the first parameter that is an instance of any of the given classes"
+    for param in crs.params:
+        if isinstance(param, classes):
+            return float(param.value)
+    return default
+
+
+#################
+# SHARED TERMS
+#################
+
+def _conformal_tan(phi, e):
+    "tan of the conformal latitude, for latitudes phi in radians"
+    sin_phi = np.sin(phi)
+    if e == 0:
+        return np.tan(phi)
+    # infinite at the poles
+    with np.errstate(divide="ignore"):
+        return np.sinh(np.arctanh(sin_phi) - e * np.arctanh(e * sin_phi))
+
+def _sin_series(coeffs, angle):
+    """
+    Sums the series coeffs[0] * sin(2 * angle) + coeffs[1] * sin(4 * angle) + ... with
+    Clenshaw's recurrence, which only needs one sine and cosine. Also works for complex angles.
+    """
+    two_cos = 2 * np.cos(2 * angle)
+    b1 = b2 = 0
+    for coeff in reversed(coeffs):
+        b1, b2 = coeff + two_cos * b1 - b2, b1
+    return b1 * np.sin(2 * angle)
+
+def _conformal_inverse(e2):
+    """
+    Returns a function giving the latitude from the conformal latitude, as a series in the
+    eccentricity, which is accurate to about ten micrometers on the earth ellipsoids.
+    """
+    e4, e6, e8 = e2**2, e2**3, e2**4
+    coeffs = (e2 / 2 + 5 * e4 / 24 + e6 / 12 + 13 * e8 / 360,
+              7 * e4 / 48 + 29 * e6 / 240 + 811 * e8 / 11520,
+              7 * e6 / 120 + 81 * e8 / 1120,
+              4279 * e8 / 161280)
+    def latitude(chi):
+        return chi + _sin_series(coeffs, chi)
+    return latitude
+
+
+#################
+# KERNELS
+#################
+
+# each function takes the crs, its ellipsoid, and the factor from meters to the crs unit,
+# and returns a (forward, inverse) pair of functions working on radians and crs units,
+# before false easting and northing
+
+def _mercator(crs, ellips, to_unit):
+    a, e, e2 = ellips.a, ellips.e, ellips.e2
+    lat_ts = _param(crs, (parameters.LatitudeTrueScale, parameters.LatitudeFirstStndParallel))
+    if lat_ts is not None:
+        # scale is true at the given latitude
+        phi_ts = math.radians(lat_ts)
+        k0 = math.cos(phi_ts) / math.sqrt(1 - e2 * math.sin(phi_ts)**2)
+    else:
+        k0 = _param(crs, parameters.ScalingFactor, 1.0)
+    scale = a * k0 * to_unit
+
+    if e == 0:
+        # on a sphere, eg web mercator, the conformal latitude is the latitude itself
+        def forward(lam, phi):
+            # infinite at the poles
+            with np.errstate(divide="ignore"):
+                return scale * lam, scale * np.arctanh(np.sin(phi))
+
+        def inverse(x, y):
+            return x / scale, np.arctan(np.sinh(y / scale))
+
+        return forward, inverse
+
+    latitude = _conformal_inverse(e2)
+
+    def forward(lam, phi):
+        return scale * lam, scale * np.arcsinh(_conformal_tan(phi, e))
+
+    def inverse(x, y):
+        return x / scale, latitude(np.arctan(np.sinh(y / scale)))
+
+    return forward, inverse
+
+def _lambert_conformal_conic(crs, ellips, to_unit):
+    a, e, e2 = ellips.a, ellips.e, ellips.e2
+    lat0 = _param(crs, parameters.LatitudeOrigin, 0.0)
+    lat1 = _param(crs, parameters.LatitudeFirstStndParallel, lat0)
+    lat2 = _param(crs, parameters.LatitudeSecondStndParallel, lat1)
+    k0 = _param(crs, parameters.ScalingFactor, 1.0)
+    phi0, phi1, phi2 = math.radians(lat0), math.radians(lat1), math.radians(lat2)
+
+    def m(phi):
+        return math.cos(phi) / math.sqrt(1 - e2 * math.sin(phi)**2)
+    def t(phi):
+        sin_phi = math.sin(phi)
+        return math.tan(math.pi / 4 - phi / 2) / ((1 - e * sin_phi) / (1 + e * sin_phi))**(e / 2)
+
+    if phi1 == phi2:
+        n = math.sin(phi1)
+    else:
+        n = (math.log(m(phi1)) - math.log(m(phi2))) / (math.log(t(phi1)) - math.log(t(phi2)))
+    F = m(phi1) / (n * t(phi1)**n)
+    aF = a * F * k0 * to_unit
+    rho0 = aF * t(phi0)**n
+    sign = 1 if n > 0 else -1
+    latitude = _conformal_inverse(e2)
+
+    def forward(lam, phi):
+        # t(phi)**n from the tan of the conformal latitude, which is zero rather than nan at the pole
+        rho = aF * np.exp(-n * np.arcsinh(_conformal_tan(phi, e)))
+        theta = n * lam
+        return rho * np.sin(theta), rho0 - rho * np.cos(theta)
+
+    def inverse(x, y):
+        dy = rho0 - y
+        rho = sign * np.hypot(x, dy)
+        theta = np.arctan2(sign * x, sign * dy)
+        with np.errstate(divide="ignore"):
+            chi = np.pi / 2 - 2 * np.arctan((rho / aF)**(1 / n))
+        return theta / n, latitude(chi)
+
+    return forward, inverse
+
+# Kruger's series for the transverse mercator in the third flattening, to sixth order,
+# as given by Karney (2011), Transverse Mercator with an accuracy of a few nanometers
+def _kruger_coeffs(n):
+    n2, n3, n4, n5, n6 = n**2, n**3, n**4, n**5, n**6
+    alpha = (n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180 - 127 * n5 / 288 + 7891 * n6 / 37800,
+             13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440 + 281 * n5 / 630 - 1983433 * n6 / 1935360,
+             61 * n3 / 240 - 103 * n4 / 140 + 15061 * n5 / 26880 + 167603 * n6 / 181440,
+             49561 * n4 / 161280 - 179 * n5 / 168 + 6601661 * n6 / 7257600,
+             34729 * n5 / 80640 - 3418889 * n6 / 1995840,
+             212378941 * n6 / 319334400)
+    beta = (n / 2 - 2 * n2 / 3 + 37 * n3 / 96 - n4 / 360 - 81 * n5 / 512 + 96199 * n6 / 604800,
+            n2 / 48 + n3 / 15 - 437 * n4 / 1440 + 46 * n5 / 105 - 1118711 * n6 / 3870720,
+            17 * n3 / 480 - 37 * n4 / 840 - 209 * n5 / 4480 + 5569 * n6 / 90720,
+            4397 * n4 / 161280 - 11 * n5 / 504 - 830251 * n6 / 7257600,
+            4583 * n5 / 161280 - 108847 * n6 / 3991680,
+            20648693 * n6 / 638668800)
+    return alpha, beta
+
+def _transverse_mercator(crs, ellips, to_unit):
+    e, e2, n = ellips.e, ellips.e2, ellips.n
+    lat0 = _param(crs, parameters.LatitudeOrigin, 0.0)
+    k0 = _param(crs, parameters.ScalingFactor, 1.0)
+    alpha, beta = _kruger_coeffs(n)
+    scale = k0 * ellips.a / (1 + n) * (1 + n**2 / 4 + n**4 / 64 + n**6 / 256) * to_unit
+    latitude = _conformal_inverse(e2)
+
+    # the northing of the latitude of origin on the central meridian
+    xi0 = math.atan(_conformal_tan(math.radians(lat0), e))
+    y0 = scale * (xi0 + _sin_series(alpha, xi0))
+
+    # the series are summed for the complex coordinate xi + i eta, which gives both
+    # the northing and easting terms at once
+    def forward(lam, phi):
+        tau = _conformal_tan(phi, e)
+        cos_lam = np.cos(lam)
+        zeta = np.arctan2(tau, cos_lam) + 1j * np.arcsinh(np.sin(lam) / np.hypot(tau, cos_lam))
+        zeta = zeta + _sin_series(alpha, zeta)
+        return scale * zeta.imag, scale * zeta.real - y0
+
+    def inverse(x, y):
+        zeta = (y + y0) / scale + 1j * (x / scale)
+        zeta = zeta - _sin_series(beta, zeta)
+        xi, eta = zeta.real, zeta.imag
+        chi = np.arcsin(np.clip(np.sin(xi) / np.cosh(eta), -1, 1))
+        return np.arctan2(np.sinh(eta), np.cos(xi)), latitude(chi)
+
+    return forward, inverse
+
+# projection classes that can be compiled, and the function that compiles them
+KERNELS = {projections.Mercator: _mercator,
+           projections.LambertConformalConic: _lambert_conformal_conic,
+           projections.TransverseMercator: _transverse_mercator,
+           }
+
+
+#################
+# USER FUNCTIONS
+#################
+
+class Kernel(object):
+    """
+    A ProjCS compiled to a pair of functions for projecting coordinates, with all the
+    constants of its projection calculated in advance. Created with compile().
+
+    Longitudes and latitudes are in degrees relative to the prime meridian, and x and y are
+    in the linear unit of the ProjCS, increasing towards the east and the north.
+    """
+    __slots__ = ("_forward", "_inverse", "_lon0", "_x0", "_y0")
+
+    def __init__(self, crs):
+        """
+        Arguments:
+
+        - **crs**: The ProjCS instance to compile.
+        """
+        _require_numpy()
+        build = None
+        for cls in type(crs.proj).__mro__:
+            build = KERNELS.get(cls)
+            if build:
+                break
+        if not build:
+            raise Exception("Projecting coordinates is not supported for the %s projection" % type(crs.proj).__name__)
+        to_unit = units.factor(units.Meter, crs.unit)
+        self._forward, self._inverse = build(crs, crs.geogcs.datum.ellips, to_unit)
+        self._lon0 = _param(crs, (parameters.CentralMeridian, parameters.LongitudeCenter), 0.0)
+        self._x0 = _param(crs, parameters.FalseEasting, 0.0)
+        self._y0 = _param(crs, parameters.FalseNorthing, 0.0)
+
+    def forward(self, lons, lats):
+        """
+        Projects longitudes and latitudes to x and y coordinates.
+
+        Arguments:
+
+        - **lons**, **lats**: Longitudes and latitudes in degrees, as numbers or numpy arrays.
+
+        Returns:
+
+        - A tuple (x, y) of the projected coordinates.
+        """
+        lam = np.radians(_wrap_lon(np.asarray(lons, dtype=float) - self._lon0))
+        phi = np.radians(np.asarray(lats, dtype=float))
+        x, y = self._forward(lam, phi)
+        if self._x0:
+            x = x + self._x0
+        if self._y0:
+            y = y + self._y0
+        return _result(np.asarray(x)), _result(np.asarray(y))
+
+    def inverse(self, x, y):
+        """
+        Unprojects x and y coordinates to longitudes and latitudes.
+
+        Arguments:
+
+        - **x**, **y**: Projected coordinates, as numbers or numpy arrays.
+
+        Returns:
+
+        - A tuple (lon, lat) of the longitudes and latitudes in degrees.
+        """
+        x = np.asarray(x, dtype=float) - self._x0
+        y = np.asarray(y, dtype=float) - self._y0
+        lam, phi = self._inverse(x, y)
+        lons = _wrap_lon(np.degrees(lam) + self._lon0)
+        return _result(np.asarray(lons)), _result(np.asarray(np.degrees(phi)))
+
+# compiled kernels of recently used crs, by the values of all their elements
+_compiled = {}
+_COMPILED_MAX = 256
+
+def compile(crs):
+    """
+    Compiles a ProjCS to a kernel for projecting coordinates, see Kernel. Kernels are
+    reused for crs with the same values, and compiled again if the crs is changed.
+
+    Supported projections are those in KERNELS, currently Mercator, Lambert Conformal Conic,
+    and Transverse Mercator.
+
+    Arguments:
+
+    - *crs*: The ProjCS instance to compile.
+
+    Returns:
+
+    - A Kernel instance, with forward() and inverse() methods.
+    """
+    key = crs._state()
+    try:
+        return _compiled[key]
+    except KeyError:
+        if len(_compiled) >= _COMPILED_MAX:
+            _compiled.clear()
+        kernel = _compiled[key] = Kernel(crs)
+        return kernel
@@ -2,13 +2,19 @@
 Convenience functions for loading from different sources.
 """
 
+import collections
+import io
+import itertools
 import json
+import multiprocessing
+import re
 import sys
 try:
     import urllib.request as urllib2
 except ImportError:
     import urllib2
 from . import parse
+from . import database
 
 PY3 = (int(sys.version_info[0]) > 2)
 
@@ -26,7 +32,7 @@ def from_url(url, format=None):
     Arguments:
 
     - *url*: The url where the crs string is to be read from. 
-    - *format* (optional): Which format to parse the crs string as. One of "ogc wkt", "esri wkt", or "proj4".
+    - *format* (optional): Which format to parse the crs string as. One of "ogc wkt", "esri wkt", "proj4", or "projjson".
         If None, tries to autodetect the format for you (default).
 
     Returns:
@@ -35,10 +41,6 @@ def from_url(url, format=None):
     """
     # first get string from url
     string = urllib2.urlopen(url).read()
-    
-    if PY3 is True:
-        # decode str into string
-        string = string.decode('utf-8')
 
     # then determine parser
     if format:
@@ -48,6 +50,10 @@ def from_url(url, format=None):
     else:
         # unknown format
         func = parse.from_unknown_text
+    
+    if PY3 is True and not (format and format.endswith("_wkt")):
+        # decode str into string, except for wkt which is parsed directly from the bytes
+        string = string.decode('utf-8')
 
     # then load
     crs = func(string)
@@ -56,19 +62,26 @@ def from_url(url, format=None):
 def from_file(filepath):
     """
     Returns the crs object from a file, with the format determined from the filename extension.
+    Files ending in .json can contain either a PROJJSON crs, or geojson with a crs member. 
 
     Arguments:
 
     - *filepath*: filepath to be loaded, including extension. 
     """
     if filepath.endswith(".prj"):
-        string = open(filepath, "r").read()
-        return parse.from_unknown_wkt(string)
+        # parsed directly from the bytes, only decoding the parts that are used
+        with open(filepath, "rb") as fobj:
+            data = fobj.read()
+        return parse.from_unknown_wkt(data)
     
     elif filepath.endswith((".geojson",".json")):
         raw = open(filepath).read()
         geoj = json.loads(raw)
-        if "crs" in geoj:
+        if geoj.get("type") in ("GeographicCRS", "GeodeticCRS", "ProjectedCRS", "BoundCRS"):
+            # a PROJJSON crs object rather than a geojson file
+            return parse.from_projjson(geoj)
+
+        elif "crs" in geoj:
             crsinfo = geoj["crs"]
             
             if crsinfo["type"] == "name":
@@ -95,3 +108,169 @@ def from_file(filepath):
 
                                       
         
+
+
+
+#################
+# CATALOGS
+#################
+
+# the parser of each catalog format, by name, so they can be sent to worker processes
+_CATALOG_PARSERS = {"proj4": "from_proj4", "ogcwkt": "from_ogc_wkt", "esriwkt": "from_esri_wkt",
+                    None: "from_unknown_text"}
+
+# quoted strings and brackets, for finding where each wkt block ends
+_CATALOG_BRACKETS = re.compile(r""""[^"]*"|\[|\]""")
+
+def _catalog_format(format):
+    if format is None:
+        return None
+    format = format.lower().replace(" ", "").replace("_", "")
+    if format not in _CATALOG_PARSERS:
+        raise ValueError("Unsupported catalog format %r, must be one of: proj4, ogc wkt, esri wkt" % format)
+    return format
+
+def _table_entries(header, lines, format):
+    "yield the ((codetype, code), format, text) entries of a tab-delimited crs table"
+    fields = header.rstrip("\r\n").split("\t")
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        row = dict(zip(fields, line.split("\t")))
+        key = (row.get("codetype"), row.get("code"))
+        if format:
+            yield key, format, row.get(format) or ""
+        else:
+            # the first of the formats that the row has
+            for rowformat in database.FORMATS:
+                if row.get(rowformat, "").strip():
+                    yield key, rowformat, row[rowformat]
+                    break
+            else:
+                yield key, None, ""
+
+def _block_entries(lines, format):
+    """
+    Yield the (linenumber, format, text) entries of a text catalog, where each line
+    without square brackets is a definition, and wkt definitions can span several
+    lines or follow each other on the same line.
+    """
+    depth = 0
+    parts = []
+    start = None
+    for lineno,line in enumerate(lines, 1):
+        if depth == 0 and "[" not in line:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield lineno, format, line
+            continue
+        pos = 0
+        for match in _CATALOG_BRACKETS.finditer(line):
+            token = match.group()
+            if token == "[":
+                if depth == 0:
+                    start = lineno
+                depth += 1
+            elif token == "]" and depth:
+                depth -= 1
+                if depth == 0:
+                    # end of block
+                    parts.append(line[pos:match.end()])
+                    yield start, format, "".join(parts).strip()
+                    parts = []
+                    pos = match.end()
+        if depth:
+            parts.append(line[pos:])
+    if depth:
+        # unbalanced brackets, left for the parser to report
+        yield start, format, "".join(parts).strip()
+
+def _catalog_entries(lines, format):
+    first = next(lines, "")
+    if first.lstrip(u"\ufeff").startswith("codetype\t"):
+        return _table_entries(first, lines, format)
+    else:
+        return _block_entries(itertools.chain([first], lines), format)
+
+def _parse_entries(entries, strict):
+    "parse a batch of catalog entries, returning (key, crs, error) tuples"
+    results = []
+    for key,format,text in entries:
+        try:
+            crs = getattr(parse, _CATALOG_PARSERS[format])(text, strict)
+            results.append((key, crs, None))
+        except Exception as err:
+            results.append((key, None, err))
+    return results
+
+def _batches(entries, batchsize):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batchsize:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_catalog(source, format=None, strict=False, workers=None, batchsize=64):
+    """
+    Reads a catalog of many crs definitions, and yields the parsed crs one at a time,
+    so that catalogs of any size can be read with constant memory.
+
+    The catalog can either be a tab-delimited crs table like those written by
+    pycrs.utils.build_crs_table(), with a header line and the fields codetype, code,
+    proj4, ogcwkt, and esriwkt, or a text file with one definition per line. WKT
+    definitions in text files can also span several lines, or follow each other
+    directly. Empty lines and lines starting with # are skipped.
+
+    Arguments:
+
+    - *source*: The filepath of the catalog, or an open text file object.
+    - *format* (optional): The format to parse the definitions as. One of "proj4", "ogc wkt",
+        or "esri wkt". For tables, this is the column that is read. If None, autodetects the
+        format of each definition, or for tables reads the first column the row has (default).
+    - *strict* (optional): When True, the parser is strict about names having to match
+        exactly with upper and lowercases. Default is not strict (False).
+    - *workers* (optional): The number of processes to parse the definitions with. If None
+        or 1, everything is parsed in the current process (default).
+    - *batchsize* (optional): The number of definitions sent to a worker process at a time
+        (defaults to 64).
+
+    Returns:
+
+    - A generator of (key, crs, error) tuples in the order of the catalog, where key is the
+        (codetype, code) of table rows or else the line number where the definition starts.
+        If the definition could not be parsed, crs is None and error is the exception that
+        was raised, otherwise error is None.
+    """
+    format = _catalog_format(format)
+    if hasattr(source, "read"):
+        reader = source
+    else:
+        reader = io.open(source, encoding="utf-8")
+    try:
+        entries = _catalog_entries(iter(reader), format)
+        if not workers or workers <= 1:
+            for batch in _batches(entries, batchsize):
+                for result in _parse_entries(batch, strict):
+                    yield result
+        else:
+            pool = multiprocessing.Pool(workers)
+            try:
+                # only keep a few batches in flight at a time, so memory stays constant
+                pending = collections.deque()
+                for batch in _batches(entries, batchsize):
+                    pending.append(pool.apply_async(_parse_entries, (batch, strict)))
+                    if len(pending) >= 2 * workers:
+                        for result in pending.popleft().get():
+                            yield result
+                while pending:
+                    for result in pending.popleft().get():
+                        yield result
+            finally:
+                pool.terminate()
+    finally:
+        if reader is not source:
+            reader.close()
@@ -14,8 +14,13 @@ from .elements import parameters
 from .elements import cs as containers
 from .elements import units
 from .elements import projections
+from .elements import directions
 from . import utils
+from . import interning
 
+import inspect
+import json
+import re
 import warnings
 
 
@@ -80,15 +85,19 @@ def from_sr_code(code):
     crs = from_proj4(proj4)
     return crs
 
-def from_ogc_wkt(string, strict=False):
+def from_ogc_wkt(string, strict=False, lazy=False):
     """
     Parse crs as ogc wkt formatted string and return the resulting crs object.
 
     Arguments:
 
-    - *string*: The OGC WKT representation as a string.
+    - *string*: The OGC WKT representation as a string, or as bytes, eg from a memory-mapped file.
     - *strict* (optional): When True, the parser is strict about names having to match
         exactly with upper and lowercases. Default is not strict (False).
+    - *lazy* (optional): When True, the geogcs, params and unit of a projected crs are
+        only parsed when they are first accessed, which is faster when only the name or
+        projection is needed. Parsing errors in those elements are then also only raised
+        on first access. Default is to parse everything right away (False).
 
     Returns:
 
@@ -96,17 +105,21 @@ def from_ogc_wkt(string, strict=False):
     """
     # parse arguments into components
     # use args to create crs
-    return _from_wkt(string, "ogc", strict)
+    return _from_wkt(string, "ogc", strict, lazy)
 
-def from_esri_wkt(string, strict=False):
+def from_esri_wkt(string, strict=False, lazy=False):
     """
     Parse crs as esri wkt formatted string and return the resulting crs object.
 
     Arguments:
 
-    - *string*: The ESRI WKT representation as a string.
+    - *string*: The ESRI WKT representation as a string, or as bytes, eg from a memory-mapped file.
     - *strict* (optional): When True, the parser is strict about names having to match
         exactly with upper and lowercases. Default is not strict (False).
+    - *lazy* (optional): When True, the geogcs, params and unit of a projected crs are
+        only parsed when they are first accessed, which is faster when only the name or
+        projection is needed. Parsing errors in those elements are then also only raised
+        on first access. Default is to parse everything right away (False).
 
     Returns:
 
@@ -114,35 +127,180 @@ def from_esri_wkt(string, strict=False):
     """
     # parse arguments into components
     # use args to create crs
-    return _from_wkt(string, "esri", strict)
+    return _from_wkt(string, "esri", strict, lazy)
 
-def from_unknown_wkt(string, strict=False):
+def from_unknown_wkt(string, strict=False, lazy=False):
     """
     Given an unknown wkt string, detect if uses ogc or esri flavor, and parse the crs accordingly.
 
     Arguments:
 
-    - *string*: The unknown WKT representation as a string.
+    - *string*: The unknown WKT representation as a string, or as bytes, eg from a memory-mapped file.
     - *strict* (optional): When True, the parser is strict about names having to match
         exactly with upper and lowercases. Default is not strict (False).
+    - *lazy* (optional): When True, the geogcs, params and unit of a projected crs are
+        only parsed when they are first accessed, which is faster when only the name or
+        projection is needed. Parsing errors in those elements are then also only raised
+        on first access. Default is to parse everything right away (False).
 
     Returns:
     - A CS instance of the indicated type. 
     """
     # parse arguments into components
     # use args to create crs
-    return _from_wkt(string, None, strict)
+    return _from_wkt(string, None, strict, lazy)
+
+# quoted strings, brackets, commas, and everything in between
+_WKT_TOKENS = re.compile(r""""[^"]*"|'[^']*'|[\[\],]|[^\[\],"']+|["']""")
+_WKT_HEADER = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# the text of an arg, including any quoted strings, followed by the delimiter that ends it
+_WKT_ARGS = r"""((?:[^\[\],"']+|"[^"]*"|'[^']*')*)(?:(\[)|(\])|(,)|(["']))?"""
+_WKT_ARGS_TEXT = re.compile(_WKT_ARGS)
+_WKT_ARGS_BYTES = re.compile(_WKT_ARGS.encode("ascii"))
+# the kinds of delimiters, as the number of the last matched group
+_END, _OPEN, _CLOSE, _COMMA, _QUOTE = 1, 2, 3, 4, 5
+
+# elements that are never read when parsing, so their content is skipped
+_WKT_UNREAD = ("AUTHORITY", "AXIS", "EXTENSION")
+
+def _wkt_value(string):
+    try:
+        return float(string)
+    except ValueError:
+        # remove newlines and multi spaces
+        return " ".join(string.split())
+
+def _wkt_header(parts):
+    # the element name is the first alphabetic part of the text before the bracket
+    match = _WKT_HEADER.search("".join(parts))
+    return match.group() if match else ""
+
+def _decode_text(data):
+    # wkt files are mostly ascii, but names may be written in either utf8 or latin1
+    data = bytes(data)
+    try:
+        return data.decode("utf8")
+    except UnicodeDecodeError:
+        return data.decode("latin1")
+
+def _wkt_span_end(matches):
+    "consume the args up to and including the closing bracket, and return its position"
+    depth = 1
+    for match in matches:
+        kind = match.lastindex
+        if kind == _OPEN:
+            depth += 1
+        elif kind == _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return match.start(_CLOSE)
+        elif kind == _QUOTE:
+            raise FormatError("The WKT string has an unterminated quote")
+        elif kind == _END:
+            break
+    raise FormatError("The WKT string has unbalanced square brackets")
+
+def _wkt_content(matches, text):
+    """
+    Consume the args up to and including the closing bracket, and return the list of
+    args, splitting on every comma, except not while inside quotes or square brackets.
+    Each arg is matched as a whole together with the delimiter that ends it, and only the
+    text of the args that are used is taken from the string, by the text() function.
+    """
+    items = []
+    elem = None
+    for match in matches:
+        kind = match.lastindex
+        if kind == _COMMA or kind == _CLOSE:
+            # end of arg
+            items.append(elem if elem else _wkt_value(text(match.group(1))))
+            if kind == _CLOSE:
+                return items
+            elem = None
+        elif kind == _OPEN:
+            # subelem, any further brackets in the same arg are ignored
+            if elem:
+                _wkt_span_end(matches)
+                continue
+            header = _wkt_header([text(match.group(1))])
+            if header in _WKT_UNREAD:
+                # only keep the span of the content
+                elem = (header, (match.end(), _wkt_span_end(matches)))
+            else:
+                elem = (header, _wkt_content(matches, text))
+        elif kind == _QUOTE:
+            raise FormatError("The WKT string has an unterminated quote")
+        else:
+            break
+    raise FormatError("The WKT string has unbalanced square brackets")
+
+def _tokenize_wkt(string):
+    """
+    Split a WKT string into a list of nested (header, content) tuples, one for each toplevel
+    element, where content is the list of args and nested elements inside the brackets.
+    Quoted args keep their quotes, and args that are numbers are converted to floats.
+    Element headers are only the alphabetic part of the element name. The content of
+    elements that are never read, such as AUTHORITY, is left as the (start, end) span
+    of the string. 
+
+    The string can also be given as bytes, bytearray, memoryview or a memory-mapped
+    file, in which case only the text of the args is decoded, without copying the rest.
+    """
+    if isinstance(string, (str, type(u""))):
+        matches = _WKT_ARGS_TEXT.finditer(string)
+        text = lambda arg: arg
+    else:
+        matches = _WKT_ARGS_BYTES.finditer(string)
+        text = _decode_text
+    crstuples = []
+    parts = [] # the text since the last toplevel element
+    for match in matches:
+        kind = match.lastindex
+        if kind == _OPEN:
+            parts.append(text(match.group(1)))
+            crstuples.append((_wkt_header(parts), _wkt_content(matches, text)))
+            parts = []
+        elif kind == _QUOTE:
+            raise FormatError("The WKT string has an unterminated quote")
+        elif kind == _END:
+            break
+        else:
+            parts.append(text(match.group()))
+    return crstuples
+
+def _detect_wkttype(crstuples):
+    "autodetect whether tokenized wkt is 'ogc' or 'esri' style"
+    topheader,topcontent = crstuples[0]
+    if topheader == "PROJCS":
+        geogcsheader,geogcscontent = topcontent[1]
+    elif topheader == "GEOGCS":
+        geogcsheader,geogcscontent = topheader,topcontent
+
+    # datum elem should be second under geogcs
+    datumheader, datumcontent = geogcscontent[1]
+    datumname = datumcontent[0].upper().strip('"')
+    
+    # esri wkt datums all use "D_" before the datum name
+    if datumname.startswith("D_"):
+        return "esri"
+    else:
+        return "ogc"
 
-def _from_wkt(string, wkttype=None, strict=False):
+def _from_wkt(string, wkttype=None, strict=False, lazy=False):
     """
     Internal method for parsing wkt, with minor differences depending on ogc or esri style.
 
     Arguments:
 
-    - *string*: The OGC or ESRI WKT representation as a string.
+    - *string*: The OGC or ESRI WKT representation as a string, or as bytes.
     - *wkttype* (optional): How to parse the WKT string, as either 'ogc', 'esri', or None. If None, tries to autodetect the wkt type before parsing (default). 
     - *strict* (optional): When True, the parser is strict about names having to match
         exactly with upper and lowercases. Default is not strict (False).
+    - *lazy* (optional): When True, the geogcs, params and unit of a projected crs are
+        only parsed when they are first accessed, which is faster when only the name or
+        projection is needed. Parsing errors in those elements are then also only raised
+        on first access. Default is to parse everything right away (False).
 
     Returns:
 
@@ -156,128 +314,12 @@ def _from_wkt(string, wkttype=None, strict=False):
     if wkttype: wkttype = wkttype.lower()
     assert wkttype in ("ogc","esri",None)
     
-    # remove newlines and multi spaces
-    string = " ".join(string.split())
-    
-    # parse arguments into components
-    def _consume_bracket(chars, char):
-        "char must be the opening bracket"
-        consumed = ""
-        depth = 1
-        while char and depth > 0:
-            consumed += char
-            char = next(chars, None)
-            # update depth level
-            if char == "[":
-                depth += 1
-            elif char == "]":
-                depth -= 1
-        consumed += char # consume the last closing char too
-        return consumed
-    
-    def _consume_quote(chars, char, quotechar):
-        "char and quotechar must be the opening quote char"
-        consumed = ""
-        # consume the first opening char
-        consumed += char 
-        char = next(chars, None)
-        # consume inside
-        while char and char != quotechar:
-            consumed += char
-            char = next(chars, None)
-        # consume the last closing char too
-        consumed += char 
-        return consumed
-    
-    def _next_elem(chars, char):
-        "char must be the first char of the text that precedes brackets"
-        header = ""
-        # skip until next header
-        while not char.isalpha():
-            char = next(chars, None)
-        # first consume the element text header
-        while char.isalpha():
-            header += char
-            char = next(chars, None)
-        # skip until next brackets (in case of spaces)
-        while char != "[":
-            char = next(chars, None)
-        # then consume the element bracket contents
-        if char == "[":
-            content = _consume_bracket(chars, char)
-        char = next(chars, None)
-        # split content into args list
-        content = content[1:-1] # remove enclosing brackets
-        content = _split_except(content)
-        # recursively load all subelems
-        for i,item in enumerate(content):
-            if isinstance(item, str) and "[" in item:
-                chars = (char for char in item)
-                char = next(chars)
-                item = _next_elem(chars, char)
-                content[i] = item
-        return header, content
-    
-    def _clean_value(string):
-        string = string.strip()
-        try: string = float(string)
-        except: pass
-        return string
-    
-    def _split_except(string):
-        "split the string on every comma, except not while inside quotes or square brackets"
-        chars = (char for char in string)
-        char = next(chars)
-        items = []
-        consumed = ""
-        while char:
-            # dont split on quotes, just consume it
-            if char in ("'", '"'):
-                consumed += _consume_quote(chars, char, char)
-            # dont split inside brackets, just consume it
-            elif char == "[":
-                consumed += _consume_bracket(chars, char)
-            # new splitchar found, add what has been consumed so far as an item, reset, and start consuming until next splitchar
-            elif char == ",":
-                consumed = _clean_value(consumed)
-                items.append(consumed)
-                consumed = ""
-            # consume normal char
-            elif char:
-                consumed += char
-            # next
-            char = next(chars, None)
-        # append last item too
-        consumed = _clean_value(consumed)
-        items.append(consumed)
-        return items
-    
     # load into nested tuples and arglists
-    crstuples = []
-    chars = (char for char in string)
-    char = next(chars)
-    while char:
-        header,content = _next_elem(chars, char)
-        crstuples.append((header, content))
-        char = next(chars, None)
+    crstuples = _tokenize_wkt(string)
 
     # autodetect wkttype if not specified
     if not wkttype:
-        topheader,topcontent = crstuples[0]
-        if topheader == "PROJCS":
-            geogcsheader,geogcscontent = topcontent[1]
-        elif topheader == "GEOGCS":
-            geogcsheader,geogcscontent = topheader,topcontent
-
-        # datum elem should be second under geogcs
-        datumheader, datumcontent = geogcscontent[1]
-        datumname = datumcontent[0].upper().strip('"')
-        
-        # esri wkt datums all use "D_" before the datum name
-        if datumname.startswith("D_"):
-            wkttype = "esri"
-        else:
-            wkttype = "ogc"
+        wkttype = _detect_wkttype(crstuples)
 
     # parse into actual crs objects
     def _parse_top(header, content):
@@ -287,10 +329,6 @@ def _from_wkt(string, wkttype=None, strict=False):
             # find name
             csname = content[0].strip('"')
             
-            # find geogcs elem (by running parse again)
-            subheader, subcontent = content[1]
-            geogcs = _parse_top(subheader, subcontent)
-            
             # find projection elem
             for part in content:
                 if isinstance(part, tuple):
@@ -304,33 +342,41 @@ def _from_wkt(string, wkttype=None, strict=False):
             else:
                 raise NotImplementedError("Unsupported projection: The specified projection name %r could not be found in the list of supported projections" % projname)
             
+            # find geogcs elem (by running parse again)
+            def _geogcs():
+                subheader, subcontent = content[1]
+                return _parse_top(subheader, subcontent)
+            
             # find params
-            params = []
-            for part in content:
-                if isinstance(part, tuple):
-                    subheader,subcontent = part
-                    if subheader == "PARAMETER":
-                        name, value = subcontent[0].strip('"'), subcontent[1]
-                        itemclass = parameters.find(name, "%s_wkt" % wkttype, strict)
-                        if itemclass:
-                            item = itemclass(value)
-                            params.append(item)
+            def _params():
+                params = []
+                for part in content:
+                    if isinstance(part, tuple):
+                        subheader,subcontent = part
+                        if subheader == "PARAMETER":
+                            name, value = subcontent[0].strip('"'), subcontent[1]
+                            itemclass = parameters.find(name, "%s_wkt" % wkttype, strict)
+                            if itemclass:
+                                item = itemclass(value)
+                                params.append(item)
+                return params
                             
             # find unit
-            for part in content:
-                if isinstance(part, tuple):
-                    subheader,subcontent = part
-                    if subheader == "UNIT":
-                        break
-            unitname,value = subcontent[0].strip('"'), subcontent[1]
-            unitclass = units.find(unitname, "%s_wkt" % wkttype, strict)
-            if unitclass:
-                unit = unitclass()
-            else:
-                unit = units.Unknown()
+            def _linunit():
+                for part in content:
+                    if isinstance(part, tuple):
+                        subheader,subcontent = part
+                        if subheader == "UNIT":
+                            break
+                unitname,value = subcontent[0].strip('"'), subcontent[1]
+                unitclass = units.find(unitname, "%s_wkt" % wkttype, strict)
+                if unitclass:
+                    unit = unitclass()
+                else:
+                    unit = units.Unknown()
 
-            unit.unitmultiplier.value = value # override default multiplier
-            linunit = unit
+                unit.unitmultiplier = units.UnitMultiplier(value) # override default multiplier
+                return unit
             
             # find twin axis maybe
 ##            if len(content) >= 6:
@@ -339,7 +385,11 @@ def _from_wkt(string, wkttype=None, strict=False):
 ##                twinax = None
             
             # put it all together
-            projcs = containers.ProjCS(csname, geogcs, proj, params, linunit) #, twinax)
+            if lazy:
+                # keep the token slices, and only parse them on first access
+                projcs = containers.ProjCS._deferred(csname, proj, {"geogcs": _geogcs, "params": _params, "unit": _linunit})
+            else:
+                projcs = containers.ProjCS(csname, _geogcs(), proj, _params(), _linunit()) #, twinax)
             return projcs
 
         elif header.upper() == "GEOGCS":
@@ -365,7 +415,8 @@ def _from_wkt(string, wkttype=None, strict=False):
                 ellipsoid = ellipsclass()
             else:
                 if datum.ellips:
-                    ellipsoid = datum.ellips
+                    # fresh copy, so the datum's shared default is never modified
+                    ellipsoid = datum.ellips.__class__()
                 elif not datum.ellips:
                     ellipsoid = ellipsoids.Unknown()
 
@@ -405,7 +456,7 @@ def _from_wkt(string, wkttype=None, strict=False):
                 unit = unitclass()
             else:
                 unit = units.Unknown()
-            unit.unitmultiplier.value = value # override default multiplier
+            unit.unitmultiplier = units.UnitMultiplier(value) # override default multiplier
             angunit = unit
             
             # twin axis
@@ -420,7 +471,65 @@ def _from_wkt(string, wkttype=None, strict=False):
     crs = _parse_top(header, content)
         
     # use args to create crs
-    return crs
+    return interning._parsed(crs)
+
+def _proj4_partdict(proj4):
+    "split a proj4 string into a dict of +key:value params in a single pass, ignoring flags without a value"
+    partdict = {}
+    for part in proj4.split():
+        key, sep, value = part.partition("=")
+        if sep:
+            partdict[key] = value
+    return partdict
+
+def _build_proj4_table():
+    """
+    Map each proj4 param key to the element class that it is parsed as, based on
+    the proj4 attributes declared on the classes in the parameters, units, and
+    projections modules. 
+    """
+    table = {}
+    for module in (parameters, units, projections):
+        for item in vars(module).values():
+            if not inspect.isclass(item):
+                continue
+            # only keys defined on the class itself, not inherited from a base class
+            keys = [vars(item).get("proj4")] + list(vars(item).get("proj4_aliases", ()))
+            for key in keys:
+                if isinstance(key, str) and key.startswith("+"):
+                    table.setdefault(key, item)
+    return table
+
+_PROJ4_TABLE = _build_proj4_table()
+
+# params that are set on the ellipsoid rather than added as projection params
+_PROJ4_ELLIPS_ATTRS = {
+    parameters.SemiMajorRadius: "semimaj_ax",
+    parameters.SemiMinorRadius: "semimin_ax",
+    parameters.Flattening: "flat",
+    parameters.InverseFlattening: "inv_flat",
+    }
+
+# the proj4 params of each +init code, so each code is only looked up once
+_init_cache = {}
+
+def _init_partdict(init):
+    """
+    Get the proj4 params dict of a +init code such as "EPSG:4326", looking it up in
+    the offline code tables or online the first time, and from memory after that.
+    The returned dict is shared and must not be modified. 
+    """
+    try:
+        codetype, code = init.split(":")
+    except ValueError:
+        raise FormatError("The +init code %r must be given as authority:code, eg EPSG:4326" % init)
+    key = codetype.strip().lower(), code.strip()
+    if key not in _init_cache:
+        if key[0] not in ("epsg", "esri"):
+            raise FormatError("Unsupported +init authority %r, must be either EPSG or ESRI" % codetype)
+        initproj4 = utils.crscode_to_string(key[0], key[1], "proj4")
+        _init_cache[key] = _proj4_partdict(initproj4)
+    return _init_cache[key]
 
 def from_proj4(proj4, strict=False):
     """
@@ -439,65 +548,70 @@ def from_proj4(proj4, strict=False):
     # parse arguments into components
     # use args to create crs
 
-    # TODO: SLIGTHLY MESSY STILL, CLEANUP..
-
-    params = []
-
     if isinstance(proj4, dict):
         # add leading + sign as expected below, proj4 dicts do not have that
         partdict = dict([('+'+k,v) for k,v in proj4.items()])
     else: 
-        partdict = dict([part.split("=") for part in proj4.split()
-                         if len(part.split("=")) == 2 ])
+        partdict = _proj4_partdict(proj4)
 
     # INIT CODES
     # eg, +init=EPSG:1234
     if "+init" in partdict:
 
-        # first, get the default proj4 string of the +init code
-        codetype, code = partdict["+init"].split(":")
-        codetype = codetype.upper()
-        if codetype == "EPSG":
-            initproj4 = utils.crscode_to_string("epsg", code, "proj4")
-        elif codetype == "ESRI":
-            initproj4 = utils.crscode_to_string("esri", code, "proj4")
-
-        # make the default into param dict
-        initpartdict = dict([part.split("=") for part in initproj4.split()
-                             if len(part.split("=")) == 2 ])
+        # start with the default params of the +init code
+        initpartdict = dict(_init_partdict(partdict["+init"]))
 
         # override the default with any custom params specified along with the +init code
         initpartdict.update(partdict)
-
-        # rerun from_proj4() again on the derived proj4 params as if it was not made with the +init code
         del initpartdict["+init"]
-        string = " ".join("%s=%s" % (key,val) for key,val in initpartdict.items())
-        return from_proj4(string)
+        partdict = initpartdict
 
-    # DATUM
+    # SORT PARAMS
 
-    # datum param is required
-    if "+datum" in partdict:
-        
-        # get predefined datum def
-        datumname = partdict["+datum"]
-        datumclass = datums.find(datumname, "proj4", strict)
-        if datumclass:
-            datum = datumclass()
+    # Because proj4 has no element hierarchy, each param is looked up in the table
+    # ...of proj4 keys to see which element it belongs to, in a single pass. 
+    projname = unitname = to_meter = None
+    ellipsparams = []
+    params = []
+    prime_mer = datumshift = None
+    for key,value in partdict.items():
+        itemclass = _PROJ4_TABLE.get(key)
+        if itemclass is None:
+            continue
+        elif key != itemclass.proj4 and itemclass.proj4 in partdict:
+            # alias of a param that was also given under its main name, which takes precedence
+            continue
+        elif itemclass is projections.Projection:
+            projname = value
+        elif itemclass is units.Unit:
+            unitname = value
+        elif itemclass is units.UnitMultiplier:
+            to_meter = value
+        elif itemclass in _PROJ4_ELLIPS_ATTRS:
+            ellipsparams.append((_PROJ4_ELLIPS_ATTRS[itemclass], itemclass(value)))
+        elif itemclass is parameters.PrimeMeridian:
+            prime_mer = parameters.PrimeMeridian(value)
+        elif itemclass is parameters.DatumShift:
+            datumshift = parameters.DatumShift(value.split(","))
         else:
-            datum = datums.Unknown()
+            params.append(itemclass(value))
+    datumname = partdict.get("+datum")
+    ellipsname = partdict.get("+ellps")
+
+    # DATUM
 
+    # get predefined datum def
+    datumclass = datums.find(datumname, "proj4", strict) if datumname else None
+    if datumclass:
+        datum = datumclass()
     else:
         datum = datums.Unknown()
 
     # ELLIPS
 
-    # ellipse param is required
+    # get predefined ellips def
     ellips = None
-    if "+ellps" in partdict:
-
-        # get predefined ellips def
-        ellipsname = partdict["+ellps"]
+    if ellipsname:
         ellipsclass = ellipsoids.find(ellipsname, "proj4", strict)
         if ellipsclass:
             ellips = ellipsclass()
@@ -506,39 +620,17 @@ def from_proj4(proj4, strict=False):
 
     if not ellips:
         if datum.ellips:
-            ellips = datum.ellips
+            # fresh copy, so the datum's shared default is never modified
+            ellips = datum.ellips.__class__()
         elif not datum.ellips:
             ellips = ellipsoids.Unknown()
 
-    # TO WGS 84 COEFFS
-    if "+towgs84" in partdict:
-        coeffs = partdict["+towgs84"].split(",")
-        datumshift = parameters.DatumShift(coeffs)
-
-        # TODO: if no datum, use ellips + towgs84 params to create the correct datum
-        # ...??
-
     # COMBINE DATUM AND ELLIPS
 
-    ## create datum and ellips param objs
-
     # +ellps loads all the required ellipsoid parameters
-    # here we set or overwrite the parameters manually
-    if "+a" in partdict:
-        # semimajor radius
-        ellips.semimaj_ax = parameters.SemiMajorRadius(partdict["+a"])        
-
-    if "+b" in partdict:
-        # semiminor radius
-        ellips.semimin_ax = parameters.SemiMinorRadius(partdict["+b"])
-
-    if "+f" in partdict:
-        # flattening
-        ellips.flat = parameters.Flattening(partdict["+f"])
-
-    if "+rf" in partdict:
-        # inverse flattening
-        ellips.inv_flat = parameters.InverseFlattening(partdict["+rf"])
+    # here we set or overwrite the parameters manually (+a, +b, +f, +rf)
+    for attr,param in ellipsparams:
+        setattr(ellips, attr, param)
 
     # check that ellipsoid is sufficiently defined
     if ellips.semimaj_ax and ellips.semimin_ax:
@@ -556,24 +648,17 @@ def from_proj4(proj4, strict=False):
     else:
         raise FormatError("The format string is missing the required +ellps element, or the alternative manual specification of the +a with +b or +f/+rf elements: \n\t %s" % partdict)
     
-    if "+datum" in partdict:
-        datum.ellips = ellips
-
-    elif "+towgs84" in partdict:
-        datum.ellips = ellips
+    datum.ellips = ellips
+    if datumshift and not datumname:
+        # TODO: if no datum, use ellips + towgs84 params to create the correct datum
+        # ...??
         datum.datumshift = datumshift
 
-    else:
-        datum.ellips = ellips
-
     # PRIME MERIDIAN
 
-    # set default
-    prime_mer = parameters.PrimeMeridian(0)
-
-    # overwrite with user input
-    if "+pm" in partdict:
-        prime_mer = parameters.PrimeMeridian(partdict["+pm"])
+    # default if not set by user input
+    if prime_mer is None:
+        prime_mer = parameters.PrimeMeridian(0)
 
     # ANGULAR UNIT    
 
@@ -586,10 +671,9 @@ def from_proj4(proj4, strict=False):
 
     # PROJECTION
     
-    if "+proj" in partdict:
+    if projname:
 
         # get predefined proj def
-        projname = partdict["+proj"]
         projclass = projections.find(projname, "proj4", strict)
         if projclass:
             proj = projclass()
@@ -604,121 +688,210 @@ def from_proj4(proj4, strict=False):
 
     if proj:
 
-        # Because proj4 has no element hierarchy, using automatic element find() would
-        # ...would not be very effective, as that would need a try-fail approach for each
-        # ...element type (parameter, projection, datum, ellipsoid, unit).
-        # ...Instead load each element individually.
-
-        # CENTRAL MERIDIAN
-
-        if "+lon_0" in partdict:
-            val = partdict["+lon_0"]
-            obj = parameters.CentralMeridian(val)
-            params.append(obj)
-
-        # FALSE EASTING
-
-        if "+x_0" in partdict:
-            val = partdict["+x_0"]
-            obj = parameters.FalseEasting(val)
-            params.append(obj)
-
-        # FALSE NORTHING
-
-        if "+y_0" in partdict:
-            val = partdict["+y_0"]
-            obj = parameters.FalseNorthing(val)
-            params.append(obj)
-
-        # SCALING FACTOR
-        
-        if "+k_0" in partdict or "+k" in partdict:
-            if "+k_0" in partdict: val = partdict["+k_0"]
-            elif "+k" in partdict: val = partdict["+k"]
-            obj = parameters.ScalingFactor(val)
-            params.append(obj)
-
-        # LATITUDE ORIGIN
-
-        if "+lat_0" in partdict:
-            val = partdict["+lat_0"]
-            obj = parameters.LatitudeOrigin(val)
-            params.append(obj)
-
-        # LATITUDE TRUE SCALE
-
-        if "+lat_ts" in partdict:
-            val = partdict["+lat_ts"]
-            obj = parameters.LatitudeTrueScale(val)
-            params.append(obj)
-
-        # LONGITUDE CENTER
-
-        if "+lonc" in partdict:
-            val = partdict["+lonc"]
-            obj = parameters.LongitudeCenter(val)
-            params.append(obj)
-
-        # AZIMUTH
-
-        if "+alpha" in partdict:
-            val = partdict["+alpha"]
-            obj = parameters.Azimuth(val)
-            params.append(obj)
-
-        # STD PARALLEL 1
-
-        if "+lat_1" in partdict:
-            val = partdict["+lat_1"]
-            obj = parameters.LatitudeFirstStndParallel(val)
-            params.append(obj)
-            
-        # STD PARALLEL 2
-
-        if "+lat_2" in partdict:
-            val = partdict["+lat_2"]
-            obj = parameters.LatitudeSecondStndParallel(val)
-            params.append(obj)
-            
-        # SATELLITE HEIGHT
-        if "+h" in partdict:
-            val = partdict["+h"]
-            obj = parameters.SatelliteHeight(val)
-            params.append(obj)
-
-        # TILT ANGLE
-        if "+tilt" in partdict:
-            val = partdict["+tilt"]
-            obj = parameters.TiltAngle(val)
-            params.append(obj)
-
         # UNIT
 
         # get values
-        if "+units" in partdict:
+        if unitname:
             # unit name takes precedence over to_meter
-            unitname = partdict["+units"]
             unitclass = units.find(unitname, "proj4", strict)
             if unitclass:
                 unit = unitclass() # takes meter multiplier from name, ignoring any custom meter multiplier
             else:
                 raise FormatError("The specified unit name %r does not appear to be a valid unit name" % unitname)
-        elif "+to_meter" in partdict:
+        elif to_meter:
             # no unit name specified, only to_meter conversion factor
             unit = units.Unknown()
-            unit.unitmultiplier.value = partdict["+to_meter"]
+            unit.unitmultiplier = units.UnitMultiplier(to_meter)
         else:
             # if nothing specified, defaults to meter
             unit = units.Meter()
 
+        # proj4 gives the false easting and northing in meters, but the crs keeps them in its unit
+        params = containers._convert_false_origin(params, units.Meter, unit)
+
         # PROJCS
 
         projcs = containers.ProjCS("Unknown", geogcs, proj, params, unit)
-        return projcs
+        return interning._parsed(projcs)
 
     else:
         # means projdef was None, ie unprojected longlat geogcs
-        return geogcs
+        return interning._parsed(geogcs)
+
+
+def _build_projjson_params():
+    """
+    Map the lowercase PROJJSON name of each conversion parameter to the parameter
+    class that it is parsed as, based on the projjson attributes declared on the
+    classes in the parameters module. 
+    """
+    table = {}
+    for item in vars(parameters).values():
+        if not inspect.isclass(item):
+            continue
+        names = [vars(item).get("projjson")] + list(vars(item).get("projjson_aliases", ()))
+        for name in names:
+            if isinstance(name, str):
+                table.setdefault(name.lower(), item)
+    return table
+
+_PROJJSON_PARAMS = _build_projjson_params()
+
+_PROJJSON_DIRECTIONS = dict((item.projjson, item) for item in directions.Direction.__subclasses__())
+
+def _projjson_find(module, name, strict):
+    # the predefined elements are found by their PROJJSON name, or else by their WKT names
+    for crstype in ("projjson", "ogc_wkt", "esri_wkt"):
+        item = module.find(name, crstype, strict)
+        if item:
+            return item
+
+def _projjson_number(value):
+    # numbers can also be given as a value with a unit
+    if isinstance(value, dict):
+        return value["value"]
+    return value
+
+def _projjson_unit(unit, strict):
+    # units are either given as a short name, or as a dict with the name and conversion factor
+    if isinstance(unit, dict):
+        unitname, factor = unit["name"], unit.get("conversion_factor")
+    else:
+        unitname, factor = unit, None
+    unitclass = units.find(unitname, "projjson", strict)
+    if unitclass:
+        unit = unitclass()
+    else:
+        unit = units.Unknown()
+    if factor is not None:
+        unit.unitmultiplier = units.UnitMultiplier(factor) # override default multiplier
+    return unit
+
+def _projjson_axes(cs):
+    # the axis directions, or None for the default east and north
+    try:
+        twin_ax = tuple(_PROJJSON_DIRECTIONS[axis["direction"].lower()]() for axis in cs["axis"][:2])
+    except (KeyError, AttributeError):
+        return None
+    if len(twin_ax) == 2:
+        return twin_ax
+
+def _projjson_geogcs(obj, strict):
+    # datum, which for recent definitions such as wgs84 can also be a datum ensemble
+    datumobj = obj.get("datum") or obj.get("datum_ensemble")
+    if not datumobj:
+        raise FormatError("The PROJJSON geographic crs has no datum")
+    datumname = datumobj["name"]
+    if "datum_ensemble" in obj and datumname.endswith(" ensemble"):
+        datumname = datumname[:-len(" ensemble")]
+    datumclass = _projjson_find(datums, datumname, strict)
+    if datumclass:
+        datum = datumclass()
+    else:
+        datum = datums.Unknown()
+
+    ## datum ellipsoid
+    ellipsobj = datumobj["ellipsoid"]
+    ellipsclass = _projjson_find(ellipsoids, ellipsobj.get("name", ""), strict)
+    if ellipsclass:
+        ellipsoid = ellipsclass()
+    elif datum.ellips:
+        # fresh copy, so the datum's shared default is never modified
+        ellipsoid = datum.ellips.__class__()
+    else:
+        ellipsoid = ellipsoids.Unknown()
+    if "radius" in ellipsobj:
+        ellipsoid.semimaj_ax = parameters.SemiMajorRadius(_projjson_number(ellipsobj["radius"]))
+        ellipsoid.flat = parameters.Flattening(0.0)
+    else:
+        ellipsoid.semimaj_ax = parameters.SemiMajorRadius(_projjson_number(ellipsobj["semi_major_axis"]))
+        if "inverse_flattening" in ellipsobj:
+            ellipsoid.inv_flat = parameters.InverseFlattening(_projjson_number(ellipsobj["inverse_flattening"]))
+        else:
+            ellipsoid.semimin_ax = parameters.SemiMinorRadius(_projjson_number(ellipsobj["semi_minor_axis"]))
+    datum.ellips = ellipsoid
+    datum.datumshift = None
+
+    # prime mer
+    primeobj = datumobj.get("prime_meridian") or obj.get("prime_meridian")
+    if primeobj:
+        prime_mer = parameters.PrimeMeridian(_projjson_number(primeobj.get("longitude", 0)))
+    else:
+        prime_mer = parameters.PrimeMeridian(0)
+
+    # angunit and twin axis
+    cs = obj.get("coordinate_system", {})
+    axes = cs.get("axis") or [{}]
+    angunit = _projjson_unit(axes[0].get("unit", "degree"), strict)
+    twin_ax = _projjson_axes(cs)
+
+    return containers.GeogCS(obj.get("name", "Unknown"), datum, prime_mer, angunit, twin_ax)
+
+def _projjson_projcs(obj, strict):
+    geogcs = _projjson_geogcs(obj["base_crs"], strict)
+
+    # projection
+    conversion = obj["conversion"]
+    projname = conversion["method"]["name"]
+    projclass = _projjson_find(projections, projname, strict)
+    if projclass:
+        proj = projclass()
+    else:
+        raise NotImplementedError("Unsupported projection: The specified projection name %r could not be found in the list of supported projections" % projname)
+
+    # params
+    params = []
+    for paramobj in conversion.get("parameters", []):
+        itemclass = _PROJJSON_PARAMS.get(paramobj["name"].lower())
+        if itemclass:
+            params.append(itemclass(_projjson_number(paramobj["value"])))
+
+    # unit and twin axis
+    cs = obj.get("coordinate_system", {})
+    axes = cs.get("axis") or [{}]
+    unit = _projjson_unit(axes[0].get("unit", "metre"), strict)
+    twin_ax = _projjson_axes(cs)
+
+    return containers.ProjCS(obj.get("name", "Unknown"), geogcs, proj, params, unit, twin_ax)
+
+def _projjson_crs(obj, strict):
+    crstype = obj.get("type")
+    if crstype in ("GeographicCRS", "GeodeticCRS"):
+        return _projjson_geogcs(obj, strict)
+    elif crstype == "ProjectedCRS":
+        return _projjson_projcs(obj, strict)
+    elif crstype == "BoundCRS":
+        # a crs with a transformation to wgs84, ie a datum shift
+        crs = _projjson_crs(obj["source_crs"], strict)
+        values = [_projjson_number(param["value"]) for param in obj["transformation"].get("parameters", [])]
+        if len(values) in (3, 7):
+            geogcs = crs.geogcs if isinstance(crs, containers.ProjCS) else crs
+            geogcs.datum.datumshift = parameters.DatumShift(values)
+        return crs
+    else:
+        raise FormatError("Unsupported PROJJSON crs type %r, must be one of GeographicCRS, GeodeticCRS, ProjectedCRS, or BoundCRS" % crstype)
+
+def from_projjson(projjson, strict=False):
+    """
+    Parse crs as PROJJSON formatted string or dict and return the resulting crs object.
+
+    Arguments:
+
+    - *projjson*: The PROJJSON representation as a JSON string or as the dict it decodes to.
+    - *strict* (optional): When True, the parser is strict about names having to match
+        exactly with upper and lowercases. Default is not strict (False).
+
+    Returns:
+
+    - A CS instance of the indicated type. 
+    """
+    if not isinstance(projjson, dict):
+        try:
+            projjson = json.loads(projjson)
+        except ValueError:
+            raise FormatError("The PROJJSON string is not valid JSON")
+    crs = _projjson_crs(projjson, strict)
+    return interning._parsed(crs)
 
 
 ##def from_ogc_urn(string, strict=False):
@@ -746,7 +919,7 @@ def from_proj4(proj4, strict=False):
 ##    pass
 
 
-def from_unknown_text(text, strict=False):
+def from_unknown_text(text, strict=False, lazy=False):
     """
     Detect crs string format and parse into crs object with appropriate function.
 
@@ -755,6 +928,8 @@ def from_unknown_text(text, strict=False):
     - *text*: The crs text representation of unknown type. 
     - *strict* (optional): When True, the parser is strict about names having to match
         exactly with upper and lowercases. Default is not strict (False).
+    - *lazy* (optional): When True, WKT text is parsed lazily, as described for
+        from_unknown_wkt(). Default is to parse everything right away (False).
 
     Returns:
 
@@ -765,7 +940,10 @@ def from_unknown_text(text, strict=False):
         crs = from_proj4(text, strict)
 
     elif text.startswith(("PROJCS[","GEOGCS[")):
-        crs = from_unknown_wkt(text, strict)
+        crs = from_unknown_wkt(text, strict, lazy)
+
+    elif text.startswith("{"):
+        crs = from_projjson(text, strict)
 
     #elif text.startswith("urn:"):
     #    crs = from_ogc_urn(text, strict)
@@ -784,6 +962,127 @@ def from_unknown_text(text, strict=False):
     return crs
 
 
+_PEEK_FIELDS = ("name", "projection", "datum", "geographic")
+
+# the proj4 projection names of unprojected geographic crs
+_PROJ4_GEOGRAPHIC = ("longlat", "latlong", "lonlat", "latlon")
+
+# quoted strings and brackets, for skipping past elements
+_WKT_BRACKETS = re.compile(r""""[^"]*"|'[^']*'|[\[\]]""")
+
+def _wkt_skip(text, pos):
+    "return the position after the closing bracket of the element whose content starts at pos"
+    depth = 1
+    for match in _WKT_BRACKETS.finditer(text, pos):
+        token = match.group()
+        if token == "[":
+            depth += 1
+        elif token == "]":
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return len(text)
+
+def _peek_wkt(text, wanted):
+    found = {}
+    headers = [] # the headers of the elements that are currently open
+    argnums = [] # the number of the current arg in each open element
+    parts = []
+    pos = 0
+    while pos < len(text):
+        match = _WKT_TOKENS.match(text, pos)
+        token = match.group()
+        pos = match.end()
+        if token == "[":
+            header = _wkt_header(parts).upper()
+            parts = []
+            if not headers:
+                # the toplevel element tells if it is geographic, in which case it has no projection
+                found["geographic"] = header == "GEOGCS"
+                if header == "GEOGCS":
+                    found["projection"] = None
+            elif not (header == "PROJECTION" or (header in ("GEOGCS", "DATUM") and "datum" in wanted and "datum" not in found)):
+                # skip elements that have none of the requested fields
+                pos = _wkt_skip(text, pos)
+                continue
+            headers.append(header)
+            argnums.append(0)
+        elif not headers:
+            parts.append(token)
+        elif token == "]":
+            headers.pop()
+            argnums.pop()
+            parts = []
+            if not headers:
+                break
+        elif token == ",":
+            argnums[-1] += 1
+            parts = []
+        elif token[0] in "\"'" and len(token) > 1 and argnums[-1] == 0:
+            # names are the first arg of their element
+            if len(headers) == 1:
+                found.setdefault("name", token[1:-1])
+            elif headers[-1] == "DATUM":
+                found.setdefault("datum", token[1:-1])
+            elif headers[-1] == "PROJECTION":
+                found.setdefault("projection", token[1:-1])
+        else:
+            parts.append(token)
+        if all(field in found for field in wanted):
+            break
+    return found
+
+def _peek_proj4(proj4, wanted):
+    # proj4 has no crs name
+    found = {"name": None}
+    if isinstance(proj4, dict):
+        items = ((key.lstrip("+"), value) for key,value in proj4.items())
+    else:
+        items = (part.lstrip("+").partition("=")[::2] for part in proj4.split())
+    for key,value in items:
+        if key == "proj":
+            found["geographic"] = value in _PROJ4_GEOGRAPHIC
+            found["projection"] = None if found["geographic"] else value
+        elif key == "datum":
+            found["datum"] = value
+        else:
+            continue
+        if all(field in found for field in wanted):
+            break
+    return found
+
+def peek(text, fields=None):
+    """
+    Quickly read some basic metadata from a crs string, without parsing the full crs,
+    and without looking up any codes. Reading stops as soon as the requested fields
+    are found. 
+
+    Arguments:
+
+    - *text*: The OGC WKT, ESRI WKT, or proj4 representation of the crs, as a string (or a dict for proj4).
+    - *fields* (optional): A list of the fields to read, any of "name", "projection",
+        "datum", and "geographic". Default is to read all of them. 
+
+    Returns:
+
+    - A dict of the requested fields. The names are given as they are written in the crs
+        string, or None if not given, and "geographic" is True for unprojected crs. 
+        Since proj4 has no crs name, the name of proj4 crs is always None. 
+    """
+    wanted = _PEEK_FIELDS if fields is None else tuple(fields)
+    for field in wanted:
+        if field not in _PEEK_FIELDS:
+            raise ValueError("Unknown crs metadata field %r, must be one of: %s" % (field, ", ".join(_PEEK_FIELDS)))
+
+    if isinstance(text, dict) or text.lstrip().startswith("+"):
+        found = _peek_proj4(text, wanted)
+    elif text.lstrip().startswith(("PROJCS[","GEOGCS[")):
+        found = _peek_wkt(text, wanted)
+    else: raise FormatError("Could not auto-detect the type of crs format, make sure it is either OGC WKT, ESRI WKT, or proj4")
+
+    return dict((field, found.get(field)) for field in wanted)
+
+
 ##def from_geotiff_parameters(**params):
 ##    pass
 
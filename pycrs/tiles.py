@@ -0,0 +1,134 @@
+"""
+Tile math for the web mercator tile pyramid used by web maps, where each zoom level z
+divides the square web mercator world into 2**z by 2**z tiles, numbered from the
+north-west corner. Requires numpy.
+
+All functions work on scalars as well as whole numpy arrays at once.
+"""
+
+import math
+
+from . import parse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# the web mercator projection, EPSG:3857
+WEB_MERCATOR = "+proj=merc +a=6378137 +b=6378137 +lat_ts=0.0 +lon_0=0.0 +x_0=0.0 +y_0=0 +k=1.0 +units=m +nadgrids=@null +wktext +no_defs"
+
+# half the width of the world in web mercator meters, which is also the half height of the tile pyramid
+EXTENT = math.pi * 6378137
+
+# the latitude of the north and south edges of the tile pyramid
+MAX_LATITUDE = math.degrees(math.atan(math.sinh(math.pi)))
+
+_crs = None
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Tile calculations require numpy to be installed")
+
+def _result(values):
+    # python numbers for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+def web_mercator():
+    """
+    Returns the web mercator ProjCS that the tiles are defined in.
+    """
+    global _crs
+    if _crs is None:
+        _crs = parse.from_proj4(WEB_MERCATOR)
+    return _crs
+
+def lonlat_to_tile(lons, lats, zoom):
+    """
+    Finds the tiles containing WGS84 longitudes and latitudes. Latitudes north or south of
+    MAX_LATITUDE are given the tiles along the top or bottom edge of the pyramid.
+
+    Arguments:
+
+    - *lons*, *lats*: Longitudes and latitudes in degrees.
+    - *zoom*: The zoom level.
+
+    Returns:
+
+    - A tuple (tx, ty) of the integer tile columns and rows.
+    """
+    _require_numpy()
+    lats = np.clip(np.asarray(lats, dtype=float), -MAX_LATITUDE, MAX_LATITUDE)
+    x, y = web_mercator().project(lons, lats)
+    return xy_to_tile(x, y, zoom)
+
+def xy_to_tile(x, y, zoom):
+    """
+    Finds the tiles containing web mercator coordinates.
+
+    Arguments:
+
+    - *x*, *y*: Web mercator coordinates in meters.
+    - *zoom*: The zoom level.
+
+    Returns:
+
+    - A tuple (tx, ty) of the integer tile columns and rows.
+    """
+    _require_numpy()
+    count = 2**zoom
+    per_meter = count / (2 * EXTENT)
+    tx = np.clip(np.floor((np.asarray(x, dtype=float) + EXTENT) * per_meter), 0, count - 1).astype(np.int64)
+    ty = np.clip(np.floor((EXTENT - np.asarray(y, dtype=float)) * per_meter), 0, count - 1).astype(np.int64)
+    return _result(tx), _result(ty)
+
+def tile_bounds(tx, ty, zoom, lonlat=False):
+    """
+    Gets the bounds of tiles.
+
+    Arguments:
+
+    - *tx*, *ty*: The tile columns and rows.
+    - *zoom*: The zoom level.
+    - *lonlat* (optional): If True, gives the bounds in WGS84 longitudes and latitudes instead
+        of web mercator meters (defaults to False).
+
+    Returns:
+
+    - A tuple (xmin, ymin, xmax, ymax) of the tile bounds.
+    """
+    _require_numpy()
+    size = 2 * EXTENT / 2**zoom
+    xmin = np.asarray(tx, dtype=float) * size - EXTENT
+    ymax = EXTENT - np.asarray(ty, dtype=float) * size
+    xmax, ymin = xmin + size, ymax - size
+    if lonlat:
+        # longitudes are proportional to the tile column, and are calculated directly so that
+        # the east edge of the last column is exactly 180 rather than wrapped around to -180
+        tx = np.asarray(tx, dtype=float)
+        xmin, xmax = tx * 360 / 2**zoom - 180, (tx + 1) * 360 / 2**zoom - 180
+        crs = web_mercator()
+        ymin = crs.unproject(np.zeros_like(ymin), ymin)[1]
+        ymax = crs.unproject(np.zeros_like(ymax), ymax)[1]
+    return tuple(_result(np.asarray(val)) for val in (xmin, ymin, xmax, ymax))
+
+def tile_to_lonlat(tx, ty, zoom):
+    """
+    Gets the WGS84 longitudes and latitudes of the north-west corners of tiles.
+
+    Arguments:
+
+    - *tx*, *ty*: The tile columns and rows, which may also be fractional to get positions
+        within the tiles.
+    - *zoom*: The zoom level.
+
+    Returns:
+
+    - A tuple (lon, lat) of the longitudes and latitudes in degrees.
+    """
+    _require_numpy()
+    size = 2 * EXTENT / 2**zoom
+    x = np.asarray(tx, dtype=float) * size - EXTENT
+    y = EXTENT - np.asarray(ty, dtype=float) * size
+    return web_mercator().unproject(x, y)
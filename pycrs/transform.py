@@ -0,0 +1,417 @@
+"""
+Vectorized transformation of coordinates and bounding boxes between coordinate systems,
+via the longitudes and latitudes of their geographic coordinate systems. Requires numpy.
+
+Coordinates are only shifted between datums with a grid shift file, see pycrs.gridshift.
+Otherwise the two coordinate systems should use the same datum, or one where the difference
+does not matter.
+"""
+
+from .elements import cs as containers
+from .elements import units
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Transforming coordinates requires numpy to be installed")
+
+def _result(values):
+    # floats for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+def _wrap_lon(lon):
+    return (lon + 180) % 360 - 180
+
+def _geogcs(crs):
+    return crs.geogcs if isinstance(crs, containers.ProjCS) else crs
+
+def _to_degrees(crs):
+    "the factor from the angular unit of a GeogCS to degrees"
+    if crs.angunit is None or crs.angunit.unitmultiplier is None or crs.angunit.unitmultiplier.value is None:
+        return 1.0
+    return units.factor(crs.angunit, units.Degree)
+
+def _to_lonlat(crs, x, y):
+    if isinstance(crs, containers.ProjCS):
+        return crs.unproject(x, y)
+    factor = _to_degrees(crs)
+    if factor != 1:
+        return x * factor, y * factor
+    return x, y
+
+def _from_lonlat(crs, lons, lats):
+    if isinstance(crs, containers.ProjCS):
+        return crs.project(lons, lats)
+    factor = _to_degrees(crs)
+    if factor != 1:
+        return lons / factor, lats / factor
+    return lons, lats
+
+def _normalized(name):
+    "a datum name in lowercase without the esri D_ prefix, spaces or underscores"
+    name = name.lower()
+    if name.startswith("d_"):
+        name = name[2:]
+    return "".join(char for char in name if char.isalnum())
+
+def _datum_names(crs):
+    "the normalized names of the datum of a coordinate system, in all the crs formats"
+    name = _geogcs(crs).datum.name
+    names = set(_normalized(getattr(name, attr, None) or "") for attr in ("proj4", "ogc_wkt", "esri_wkt", "projjson"))
+    names.discard("")
+    return names
+
+def _shift_datum(gridshift, from_crs, to_crs, lons, lats):
+    "shift longitudes and latitudes between the datums of two coordinate systems with a grid"
+    # the grid can name its datums after any of the names the datums are known by
+    source, target = _normalized(gridshift.source), _normalized(gridshift.target)
+    from_names, to_names = _datum_names(from_crs), _datum_names(to_crs)
+    if source in from_names and target in to_names:
+        return gridshift.forward(lons, lats)
+    elif target in from_names and source in to_names:
+        return gridshift.inverse(lons, lats)
+    raise ValueError("The grid shifts from %s to %s, not between the datums of the coordinate systems" % (gridshift.source, gridshift.target))
+
+def transform(from_crs, to_crs, x, y, gridshift=None):
+    """
+    Transforms coordinates from one coordinate system to another.
+
+    Arguments:
+
+    - *from_crs*: The GeogCS or ProjCS instance of the given coordinates.
+    - *to_crs*: The GeogCS or ProjCS instance to transform them to.
+    - *x*, *y*: The coordinates, ie longitudes and latitudes for a GeogCS.
+    - *gridshift* (optional): A pycrs.gridshift.GridShift instance to shift the coordinates
+        between the datums of the two coordinate systems, in whichever direction matches
+        the source and target datums of the grid. If None, the coordinates are not shifted
+        (default).
+
+    Returns:
+
+    - A tuple (x, y) of the transformed coordinates.
+    """
+    _require_numpy()
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    lons, lats = _to_lonlat(from_crs, x, y)
+    # longitudes are relative to the prime meridian of each geographic cs
+    from_mer = _geogcs(from_crs).prime_mer.value or 0
+    to_mer = _geogcs(to_crs).prime_mer.value or 0
+    if gridshift is not None:
+        # the grids are relative to greenwich
+        if from_mer:
+            lons, from_mer = _wrap_lon(np.asarray(lons) + from_mer), 0
+        lons, lats = _shift_datum(gridshift, from_crs, to_crs, lons, lats)
+    shift = from_mer - to_mer
+    if shift:
+        lons = _wrap_lon(np.asarray(lons) + shift)
+    x, y = _from_lonlat(to_crs, lons, lats)
+    return _result(np.asarray(x)), _result(np.asarray(y))
+
+
+#################
+# BOUNDING BOXES
+#################
+
+def _edges(bboxes, count):
+    """
+    Divides the four edges of each box into count segments each, returning the box index
+    and the start and end coordinates of each segment, going around the box.
+    """
+    xmin, ymin, xmax, ymax = bboxes.T
+    t = np.arange(count) / float(count)
+    # the start of each segment, with each edge as a row of each box
+    xs = np.stack([xmin[:, None] + (xmax - xmin)[:, None] * t, np.broadcast_to(xmax[:, None], (len(bboxes), count)),
+                   xmax[:, None] - (xmax - xmin)[:, None] * t, np.broadcast_to(xmin[:, None], (len(bboxes), count))], axis=1)
+    ys = np.stack([np.broadcast_to(ymin[:, None], (len(bboxes), count)), ymin[:, None] + (ymax - ymin)[:, None] * t,
+                   np.broadcast_to(ymax[:, None], (len(bboxes), count)), ymax[:, None] - (ymax - ymin)[:, None] * t], axis=1)
+    xs, ys = xs.reshape(len(bboxes), -1), ys.reshape(len(bboxes), -1)
+    # each segment ends where the next starts
+    return (np.repeat(np.arange(len(bboxes)), xs.shape[1]), xs.ravel(), ys.ravel(),
+            np.roll(xs, -1, axis=1).ravel(), np.roll(ys, -1, axis=1).ravel())
+
+def _lon_bounds(boxes, lons, count):
+    """
+    The longitude bounds of each box, as the smallest range that contains all its longitudes,
+    which crosses the antimeridian when xmin is larger than xmax.
+    """
+    order = np.lexsort((lons, boxes))
+    boxes, lons = boxes[order], lons[order]
+    starts = np.searchsorted(boxes, np.arange(count))
+    ends = np.searchsorted(boxes, np.arange(count), side="right")
+    # the gaps between consecutive longitudes, where each box wraps from its last to its first
+    following = np.arange(1, len(lons) + 1)
+    following[ends - 1] = starts
+    gaps = (lons[following] - lons) % 360
+    gaps[ends - 1] = np.where(ends - starts == 1, 360, gaps[ends - 1])
+    # the bounds are everything but the largest gap of each box
+    largest = np.maximum.reduceat(gaps, starts)
+    first = np.minimum.reduceat(np.where(gaps == np.repeat(largest, ends - starts), np.arange(len(lons)), len(lons)), starts)
+    return lons[following[first]], lons[first]
+
+def transform_bbox(from_crs, to_crs, bboxes, tolerance=None, max_iter=12, initial=4):
+    """
+    Transforms bounding boxes from one coordinate system to another, giving the bounds of the
+    whole transformed box rather than just of its corners.
+
+    The edges of the boxes are densified adaptively, by splitting each segment of an edge for as
+    long as its transformed midpoint is further than the tolerance from the middle of its transformed
+    end points. Boxes that contain a pole include it in their bounds. When transforming to a GeogCS,
+    boxes that cross the antimeridian are given an xmin larger than their xmax.
+
+    Arguments:
+
+    - *from_crs*: The GeogCS or ProjCS instance of the given boxes.
+    - *to_crs*: The GeogCS or ProjCS instance to transform them to.
+    - *bboxes*: A single (xmin, ymin, xmax, ymax) box, or a sequence or numpy array of boxes.
+        Boxes in a GeogCS can cross the antimeridian by giving an xmin larger than xmax.
+    - *tolerance* (optional): The maximum distance in the units of to_crs between the transformed
+        edges and the densified ones. If None, uses a ten thousandth of the size of the box after
+        transforming only its corners (default).
+    - *max_iter* (optional): The maximum number of times a segment is split (defaults to 12).
+    - *initial* (optional): The number of segments each edge is divided into to begin with, to
+        find extremes that fall between the corners (defaults to 4).
+
+    Returns:
+
+    - The transformed (xmin, ymin, xmax, ymax) box, or a numpy array of boxes if given many.
+    """
+    _require_numpy()
+    bboxes = np.array(bboxes, dtype=float)
+    single = bboxes.ndim == 1
+    bboxes = bboxes.reshape(-1, 4)
+    count = len(bboxes)
+    geographic_src = not isinstance(from_crs, containers.ProjCS)
+    geographic_dst = not isinstance(to_crs, containers.ProjCS)
+    if geographic_src:
+        # boxes crossing the antimeridian continue past 180
+        crossing = bboxes[:, 0] > bboxes[:, 2]
+        bboxes[crossing, 2] += 360 / _to_degrees(from_crs)
+
+    def _xy_error(mx, my, ax, ay, bx, by):
+        if geographic_dst:
+            # the middle of the segment, the short way around
+            half = 180 / _to_degrees(to_crs)
+            midx = ax + ((bx - ax + half) % (2 * half) - half) / 2
+            dx = (mx - midx + half) % (2 * half) - half
+        else:
+            dx = mx - (ax + bx) / 2
+        return np.hypot(dx, my - (ay + by) / 2)
+
+    boxes, ax, ay, bx, by = _edges(bboxes, initial)
+    tax, tay = [np.asarray(val) for val in transform(from_crs, to_crs, ax, ay)]
+    # the ends of each segment are the starts of the next
+    following = np.arange(len(ax)).reshape(count, -1)
+    following = np.roll(following, -1, axis=1).ravel()
+    tbx, tby = tax[following], tay[following]
+    allboxes, allx, ally = [boxes], [tax], [tay]
+
+    if tolerance is None:
+        corners = initial * np.arange(4)
+        cx, cy = tax.reshape(count, -1)[:, corners], tay.reshape(count, -1)[:, corners]
+        with np.errstate(invalid="ignore"):
+            tolerance = np.hypot(np.nanmax(cx, axis=1) - np.nanmin(cx, axis=1),
+                                 np.nanmax(cy, axis=1) - np.nanmin(cy, axis=1)) / 10000.0
+    tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), (count,))
+
+    for _ in range(max_iter):
+        mx, my = (ax + bx) / 2, (ay + by) / 2
+        tmx, tmy = [np.asarray(val) for val in transform(from_crs, to_crs, mx, my)]
+        allboxes.append(boxes)
+        allx.append(tmx)
+        ally.append(tmy)
+        with np.errstate(invalid="ignore"):
+            split = _xy_error(tmx, tmy, tax, tay, tbx, tby) > tolerance[boxes]
+        if not split.any():
+            break
+        # each split segment becomes two, from the start to the middle and from the middle to the end
+        boxes = np.concatenate([boxes[split], boxes[split]])
+        ax, ay = np.concatenate([ax[split], mx[split]]), np.concatenate([ay[split], my[split]])
+        bx, by = np.concatenate([mx[split], bx[split]]), np.concatenate([my[split], by[split]])
+        tax, tay = np.concatenate([tax[split], tmx[split]]), np.concatenate([tay[split], tmy[split]])
+        tbx, tby = np.concatenate([tmx[split], tbx[split]]), np.concatenate([tmy[split], tby[split]])
+
+    # poles inside the boxes are part of their bounds
+    polar = np.zeros(count, dtype=bool)
+    for lat in (90, -90):
+        px, py = [np.asarray(val) for val in transform(_geogcs(to_crs), from_crs, 0.0, lat)]
+        tx, ty = [np.asarray(val) for val in transform(_geogcs(to_crs), to_crs, 0.0, lat)]
+        if not np.isfinite([px, py, tx, ty]).all():
+            continue
+        if geographic_src:
+            inside = (bboxes[:, 1] <= py) & (py <= bboxes[:, 3])
+        else:
+            inside = (bboxes[:, 0] <= px) & (px <= bboxes[:, 2]) & (bboxes[:, 1] <= py) & (py <= bboxes[:, 3])
+        allboxes.append(np.nonzero(inside)[0])
+        allx.append(np.full(inside.sum(), tx))
+        ally.append(np.full(inside.sum(), ty))
+        polar |= inside
+
+    boxes, xs, ys = np.concatenate(allboxes), np.concatenate(allx), np.concatenate(ally)
+    valid = np.isfinite(xs) & np.isfinite(ys)
+    boxes, xs, ys = boxes[valid], xs[valid], ys[valid]
+    result = np.full((count, 4), np.nan)
+    # boxes where no points could be transformed stay nan
+    seen, boxes = np.unique(boxes, return_inverse=True)
+    for column, func, values in ((0, np.minimum, xs), (1, np.minimum, ys), (2, np.maximum, xs), (3, np.maximum, ys)):
+        out = np.full(len(seen), np.inf if func is np.minimum else -np.inf)
+        func.at(out, boxes, values)
+        result[seen, column] = out
+    if geographic_dst and len(seen):
+        factor = _to_degrees(to_crs)
+        xmin, xmax = _lon_bounds(boxes, _wrap_lon(xs * factor), len(seen))
+        result[seen, 0] = xmin / factor
+        result[seen, 2] = xmax / factor
+        # every longitude meets at the poles
+        result[polar, 0] = -180 / factor
+        result[polar, 2] = 180 / factor
+    if single:
+        return tuple(result[0].tolist())
+    return result
+
+
+#################
+# GRIDS
+#################
+
+def _fill(out, rows, cols, size, corners, exact=False):
+    """
+    Fills the cells of the given size starting at the given rows and columns, by bilinear
+    interpolation between their corner values, except for their last row and column which
+    belong to the next cells. If exact is True, the values of all the points of the cells
+    are given instead, in row order.
+    """
+    height, width = out.shape
+    # a view of the grid as size by size blocks, so that whole cells are written at once
+    blocks = out[:height - 1, :width - 1].reshape((height - 1) // size, size, (width - 1) // size, size).swapaxes(1, 2)
+    if exact:
+        blocks[rows // size, cols // size] = np.stack(corners, axis=-1).reshape(-1, size, size)
+        return
+    steps = np.arange(size) / float(size)
+    topleft, topright, bottomleft, bottomright = [corner[:, None, None] for corner in corners]
+    # interpolated down the left and right edges, and then across
+    left = topleft + (bottomleft - topleft) * steps[:, None]
+    across = (topright + (bottomright - topright) * steps[:, None]) - left
+    # a batch of cells at a time, so that the interpolated values stay small
+    batch = max(1, 2**20 // size**2)
+    for start in range(0, len(rows), batch):
+        chunk = slice(start, start + batch)
+        values = across[chunk] * steps
+        values += left[chunk]
+        blocks[rows[chunk] // size, cols[chunk] // size] = values
+
+def transform_grid(from_crs, to_crs, xs, ys, max_error, step=32):
+    """
+    Transforms every point of a regular grid, such as the pixel centers of a raster, by
+    transforming only as many points as needed and interpolating the rest.
+
+    The grid is divided into cells of step by step points. The corners of each cell are
+    transformed exactly, and the cell is checked by also transforming the points a quarter,
+    half and three quarters of the way across it in each direction. If any of these are
+    further than max_error from where they would be interpolated to, the cell is divided
+    into four, until the cells are a single point apart, and otherwise the points inside
+    the cell are interpolated bilinearly from its corners.
+
+    Arguments:
+
+    - *from_crs*: The GeogCS or ProjCS instance of the grid coordinates.
+    - *to_crs*: The GeogCS or ProjCS instance to transform them to.
+    - *xs*: The evenly spaced x coordinates of the grid columns.
+    - *ys*: The evenly spaced y coordinates of the grid rows.
+    - *max_error*: The maximum error allowed at the checked points, in the units of to_crs.
+    - *step* (optional): The size of the largest cells in grid points, which is rounded up to
+        a power of two (defaults to 32).
+
+    Returns:
+
+    - A tuple (x, y, error) of the transformed x and y coordinates as 2D arrays with a row for
+        each grid row, and the largest error found at any of the checked points.
+    """
+    _require_numpy()
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    height, width = len(ys), len(xs)
+    x0, dx = xs[0], (xs[-1] - xs[0]) / max(width - 1, 1)
+    y0, dy = ys[0], (ys[-1] - ys[0]) / max(height - 1, 1)
+
+    def _exact(rows, cols):
+        # the transformed coordinates of grid points, which may be outside the grid
+        return [np.asarray(val) for val in transform(from_crs, to_crs, x0 + cols * dx, y0 + rows * dy)]
+
+    size = 1
+    while size < step:
+        size *= 2
+    # the grid is padded to whole cells, plus the last row and column of the last cells
+    padheight = -(-max(height - 1, 1) // size) * size + 1
+    padwidth = -(-max(width - 1, 1) // size) * size + 1
+    outx = np.empty((padheight, padwidth))
+    outy = np.empty((padheight, padwidth))
+    lastrow = _exact(np.full(padwidth, padheight - 1), np.arange(padwidth))
+    lastcol = _exact(np.arange(padheight), np.full(padheight, padwidth - 1))
+    outx[-1], outy[-1] = lastrow
+    outx[:, -1], outy[:, -1] = lastcol
+
+    rows, cols = np.meshgrid(np.arange(0, padheight - 1, size), np.arange(0, padwidth - 1, size), indexing="ij")
+    rows, cols = rows.ravel(), cols.ravel()
+    # the corner values of each cell, in the order top left, top right, bottom left, bottom right
+    corners = [_exact(rows + i, cols + j) for i, j in ((0, 0), (0, size), (size, 0), (size, size))]
+    corners = (np.array([val[0] for val in corners]), np.array([val[1] for val in corners]))
+    error = 0.0
+
+    while len(rows):
+        if size <= 2:
+            # the remaining points of the cells are few enough to transform them all
+            points = [(corners[0][0], corners[1][0])]
+            if size == 2:
+                points.extend(_exact(rows + i, cols + j) for i, j in ((0, 1), (1, 0), (1, 1)))
+            for out, axis in ((outx, 0), (outy, 1)):
+                _fill(out, rows, cols, size, [val[axis] for val in points], exact=True)
+            break
+        half, quarter = size // 2, size // 4
+        # every quarter point of the cell, since errors that cancel out at the center and the
+        # middle of the edges, such as across the equator, only show between them
+        offsets = [(i, j) for i in range(0, size + 1, quarter) for j in range(0, size + 1, quarter)
+                   if i % size or j % size]
+        offrows = np.array([i for i, j in offsets])[:, None]
+        offcols = np.array([j for i, j in offsets])[:, None]
+        points = _exact((rows + offrows).ravel(), (cols + offcols).ravel())
+        points = [val.reshape(len(offsets), len(rows)) for val in points]
+        fy, fx = offrows / float(size), offcols / float(size)
+        cellerror = np.zeros(len(rows))
+        for axis in (0, 1):
+            topleft, topright, bottomleft, bottomright = corners[axis]
+            predicted = (topleft + (topright - topleft) * fx) * (1 - fy) + (bottomleft + (bottomright - bottomleft) * fx) * fy
+            cellerror = np.maximum(cellerror, np.abs(points[axis] - predicted).max(axis=0))
+        # the centers of the edges and of the cell, as top, left, center, right, bottom
+        exact = [(points[0][offsets.index(offset)], points[1][offsets.index(offset)])
+                 for offset in ((0, half), (half, 0), (half, half), (half, size), (size, half))]
+        with np.errstate(invalid="ignore"):
+            accept = cellerror <= max_error
+        if accept.any():
+            error = max(error, cellerror[accept].max())
+            _fill(outx, rows[accept], cols[accept], size, corners[0][:, accept])
+            _fill(outy, rows[accept], cols[accept], size, corners[1][:, accept])
+        # the other cells are divided into four, with corners among the nine known points
+        split = ~accept
+        rows, cols = rows[split], cols[split]
+        corner = [(corners[0][k][split], corners[1][k][split]) for k in range(4)]
+        middle = [(val[0][split], val[1][split]) for val in exact]
+        known = [[corner[0], middle[0], corner[1]],
+                 [middle[1], middle[2], middle[3]],
+                 [corner[2], middle[4], corner[3]]]
+        quadrants = ((0, 0), (0, 1), (1, 0), (1, 1))
+        corners = tuple(np.concatenate([np.array([known[i + a][j + b][axis] for a, b in quadrants])
+                                        for i, j in quadrants], axis=1)
+                        for axis in (0, 1))
+        rows = np.concatenate([rows + i * half for i, j in quadrants])
+        cols = np.concatenate([cols + j * half for i, j in quadrants])
+        size = half
+
+    if (padheight, padwidth) != (height, width):
+        outx, outy = np.ascontiguousarray(outx[:height, :width]), np.ascontiguousarray(outy[:height, :width])
+    return outx, outy, float(error)
@@ -0,0 +1,289 @@
+"""
+Direct translation of crs strings from one format to another, without building
+the full tree of crs objects in between.
+"""
+
+import re
+
+from .elements import cs as containers
+from .elements import datums
+from .elements import ellipsoids
+from .elements import parameters
+from .elements import projections
+from .elements import units
+from . import parse
+
+
+class _Unsupported(Exception):
+    "raised for crs strings that are only translated via the crs objects"
+
+
+#################
+# TEMPLATES
+#################
+
+# placeholder written by the stand-in elements, and replaced with a named format field
+_MARK = "\x00%s\x00"
+_MARK_PATTERN = re.compile("\x00(\\w+)\x00")
+
+class _Slot(object):
+    # stands in for an element or parameter value when rendering a template
+    def __init__(self, key):
+        self.key = key
+
+    def to_ogc_wkt(self):
+        return _MARK % self.key
+
+    def to_esri_wkt(self):
+        return _MARK % self.key
+
+def _slot_param(cls, key):
+    # a parameter whose value is written as a placeholder
+    param = cls.__new__(cls)
+    param.value = param._text = _MARK % key
+    return param
+
+def _compile(rendered):
+    # escape any literal % and turn the placeholders into named format fields
+    return _MARK_PATTERN.sub(r"%(\1)s", rendered.replace("%", "%%"))
+
+def _render(cls, wkttype):
+    "render an element class with stand-ins for all its variable parts"
+    if issubclass(cls, containers.ProjCS):
+        elem = cls(_MARK % "name", _Slot("geogcs"), _Slot("proj"), [_Slot("params")], _Slot("unit"))
+    elif issubclass(cls, containers.GeogCS):
+        elem = cls(_MARK % "name", _Slot("datum"), _Slot("prime_mer"), _Slot("angunit"))
+    elif issubclass(cls, datums.Datum):
+        elem = cls()
+        elem.ellips = _Slot("ellips")
+        elem.datumshift = None
+    elif issubclass(cls, ellipsoids.Ellipsoid):
+        elem = cls()
+        elem.semimaj_ax = _slot_param(parameters.SemiMajorRadius, "semimaj_ax")
+        elem.inv_flat = _slot_param(parameters.InverseFlattening, "inv_flat")
+    elif issubclass(cls, units.Unit):
+        elem = cls()
+        elem.unitmultiplier = _slot_param(units.UnitMultiplier, "value")
+    elif issubclass(cls, (parameters.DatumShift, parameters.PrimeMeridian)):
+        # not written from a single value
+        raise _Unsupported("No template for %s" % cls.__name__)
+    elif issubclass(cls, parameters.Parameter):
+        elem = _slot_param(cls, "value")
+    else:
+        elem = cls()
+    if issubclass(cls, containers.CS):
+        # bypass the serialization cache, which the stand-ins cannot be compared for
+        if wkttype == "ogc":
+            return elem._build_ogc_wkt()
+        else:
+            return elem._build_esri_wkt()
+    elif wkttype == "ogc":
+        return elem.to_ogc_wkt()
+    else:
+        return elem.to_esri_wkt()
+
+_templates = {}
+
+def _template(cls, wkttype):
+    """
+    Get the output template of an element class, compiled once from the output of
+    its own to_ogc_wkt() or to_esri_wkt() method, so translated strings are always
+    written exactly as the crs objects would write them.
+    """
+    key = cls, wkttype
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = _compile(_render(cls, wkttype))
+    return template
+
+
+#################
+# REGISTRY LOOKUPS
+#################
+
+_found = {}
+_FOUND_MAX = 4096
+
+def _find(module, name, crstype, strict):
+    "memoized module.find(), since translating only needs the class"
+    key = module.__name__, name, crstype, strict
+    try:
+        return _found[key]
+    except KeyError:
+        if len(_found) >= _FOUND_MAX:
+            _found.clear()
+        item = _found[key] = module.find(name, crstype, strict)
+        return item
+
+def _value_text(value):
+    # the text of a parsed wkt value, as written back out by a parameter holding it
+    if isinstance(value, float):
+        return str(value)
+    return parameters.Parameter(value).get_text()
+
+def _subelem(content, header):
+    # the first subelement with the given header
+    for part in content:
+        if isinstance(part, tuple) and part[0] == header:
+            return part[1]
+    raise _Unsupported("No %s element" % header)
+
+
+#################
+# WKT TO WKT
+#################
+
+# follows the same steps as the object path in parse._from_wkt(), but writes the
+# output directly instead of creating the elements
+
+def _wkt_geogcs(content, wkttype, target, strict):
+    csname = content[0].strip('"')
+    crstype = "%s_wkt" % wkttype
+
+    # datum
+    subheader, subcontent = content[1]
+    datumclass = _find(datums, subcontent[0].strip('"'), crstype, strict) or datums.Unknown
+    for part in subcontent[1:]:
+        if not isinstance(part, tuple) or (wkttype == "ogc" and part[0] == "TOWGS84"):
+            raise _Unsupported("Datum shift is only translated via the crs objects")
+
+    ## datum ellipsoid
+    subsubheader, subsubcontent = subcontent[1]
+    ellipsclass = _find(ellipsoids, subsubcontent[0].strip('"'), crstype, strict)
+    if not ellipsclass:
+        ellipsclass = datumclass.ellips.__class__ if datumclass.ellips else ellipsoids.Unknown
+    if subsubcontent[2] == 0:
+        # spheroids are written with the inverse flattening of the ellipsoid class if it has one, or else 0
+        inv_flat = ellipsclass.inv_flat.get_text() if ellipsclass.inv_flat else 0
+    else:
+        inv_flat = _value_text(subsubcontent[2])
+    ellips = _template(ellipsclass, target) % {"semimaj_ax": _value_text(subsubcontent[1]), "inv_flat": inv_flat}
+    datum = _template(datumclass, target) % {"ellips": ellips}
+
+    # prime mer
+    prime_mer = parameters.PrimeMeridian(content[2][1][1])
+    if target == "ogc":
+        prime_mer = prime_mer.to_ogc_wkt()
+    else:
+        prime_mer = prime_mer.to_esri_wkt()
+
+    # angunit
+    subheader, subcontent = content[3]
+    unitclass = _find(units, subcontent[0].strip('"'), crstype, strict) or units.Unknown
+    angunit = _template(unitclass, target) % {"value": _value_text(subcontent[1])}
+
+    return _template(containers.GeogCS, target) % {"name": csname, "datum": datum, "prime_mer": prime_mer, "angunit": angunit}
+
+def _wkt_projcs(content, wkttype, target, strict):
+    csname = content[0].strip('"')
+    crstype = "%s_wkt" % wkttype
+
+    # geogcs
+    subheader, subcontent = content[1]
+    geogcs = _wkt_geogcs(subcontent, wkttype, target, strict)
+
+    # projection
+    projname = _subelem(content, "PROJECTION")[0].strip('"')
+    projclass = _find(projections, projname, crstype, strict)
+    if not projclass:
+        raise _Unsupported("Unsupported projection %r" % projname)
+    proj = _template(projclass, target) % {}
+
+    # params
+    params = []
+    for part in content:
+        if isinstance(part, tuple) and part[0] == "PARAMETER":
+            name, value = part[1][0].strip('"'), part[1][1]
+            itemclass = _find(parameters, name, crstype, strict)
+            if itemclass:
+                params.append(_template(itemclass, target) % {"value": _value_text(value)})
+
+    # unit
+    subcontent = _subelem(content, "UNIT")
+    unitclass = _find(units, subcontent[0].strip('"'), crstype, strict) or units.Unknown
+    unit = _template(unitclass, target) % {"value": _value_text(subcontent[1])}
+
+    return _template(containers.ProjCS, target) % {"name": csname, "geogcs": geogcs, "proj": proj,
+                                                   "params": ", ".join(params), "unit": unit}
+
+def _wkt_to_wkt(string, wkttype, target, strict):
+    crstuples = parse._tokenize_wkt(string)
+    if not wkttype:
+        wkttype = parse._detect_wkttype(crstuples)
+    header, content = crstuples[0]
+    if header.upper() == "PROJCS":
+        return _wkt_projcs(content, wkttype, target, strict)
+    elif header.upper() == "GEOGCS":
+        return _wkt_geogcs(content, wkttype, target, strict)
+    else:
+        raise _Unsupported("Unsupported crs element %r" % header)
+
+
+#################
+# USER FUNCTIONS
+#################
+
+_FORMATS = ("ogc_wkt", "esri_wkt", "unknown_wkt", "proj4", "projjson")
+
+def _format_name(format):
+    format = format.lower().replace(" ", "_")
+    if format not in _FORMATS:
+        raise ValueError("Unsupported crs format %r, must be one of: %s" % (format, ", ".join(_FORMATS)))
+    return format
+
+def _detect_format(text):
+    # same detection as parse.from_unknown_text()
+    if isinstance(text, dict) or text.startswith("+"):
+        return "proj4"
+    elif text.startswith(("PROJCS[","GEOGCS[")):
+        return "unknown_wkt"
+    elif text.startswith("{"):
+        return "projjson"
+    else:
+        raise parse.FormatError("Could not auto-detect the type of crs format, make sure it is one of the supported formats")
+
+def translate(text, to_format, from_format=None, strict=False):
+    """
+    Converts a crs string from one format to another, giving exactly the same result
+    as parsing it and converting the resulting CS instance, but faster.
+
+    Translating between the two WKT flavors is done directly from the parsed WKT
+    elements, without creating the crs objects in between. All other combinations
+    go via the crs objects.
+
+    Arguments:
+
+    - **text**: The crs string to translate.
+    - **to_format**: The format to translate to. One of "ogc wkt", "esri wkt", "proj4", or "projjson".
+    - **from_format** (optional): The format of the given crs string. One of "ogc wkt",
+        "esri wkt", "proj4", or "projjson". If None, autodetects the format (default).
+    - **strict** (optional): When True, the parser is strict about names having to match
+        exactly with upper and lowercases. Default is not strict (False).
+
+    Returns:
+
+    - The translated crs string.
+    """
+    to_format = _format_name(to_format)
+    if from_format:
+        from_format = _format_name(from_format)
+    else:
+        from_format = _detect_format(text)
+
+    # direct path
+    if from_format.endswith("_wkt") and to_format in ("ogc_wkt", "esri_wkt"):
+        wkttype = from_format[:-len("_wkt")]
+        if wkttype == "unknown":
+            wkttype = None
+        try:
+            return _wkt_to_wkt(text, wkttype, to_format[:-len("_wkt")], strict)
+        except _Unsupported:
+            # anything not handled directly is left to the object path, which also
+            # raises the appropriate errors for it
+            pass
+
+    # object path
+    crs = getattr(parse, "from_%s" % from_format)(text, strict)
+    if to_format == "projjson":
+        return crs.to_projjson(as_string=True)
+    return getattr(crs, "to_%s" % to_format)()
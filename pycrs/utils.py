@@ -11,6 +11,8 @@ except ImportError:
 import re
 import json
 
+from . import database
+
 EPSG_URL = 'http://prj2epsg.org/search.json'
 
 
@@ -78,7 +80,8 @@ def build_crs_table(savepath):
 def crscode_to_string(codetype, code, format):
     """
     Lookup crscode and return in specified format.
-    Uses epsg.io for epsg code, or spatialreference.org for esri or sr codes.
+    First looks in any offline code tables loaded with pycrs.database.load_code_table(),
+    otherwise uses epsg.io for epsg code, or spatialreference.org for esri or sr codes.
 
     Arguments:
 
@@ -90,6 +93,10 @@ def crscode_to_string(codetype, code, format):
 
     - Crs string in the specified format. 
     """
+    result = database.lookup_string(codetype, code, format)
+    if result is not None:
+        return result
+    
     if codetype == 'epsg':
         # use epsg.io which is more up-to-date, but can only lookup epsg codes
         if format == 'ogcwkt':
@@ -0,0 +1,142 @@
+"""
+Batch projection of points to the Universal Transverse Mercator (UTM) zones of the
+WGS84 datum, where each point is projected to the zone it falls in. Requires numpy.
+
+Zones are identified by the EPSG code of their coordinate system, ie 32601 to 32660 for
+the zones of the northern hemisphere, and 32701 to 32760 for the southern hemisphere.
+"""
+
+from . import parse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_crs = {}
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("UTM projection requires numpy to be installed")
+
+def _result(values):
+    # python numbers for scalar input, arrays otherwise
+    return values.item() if values.ndim == 0 else values
+
+def zone_crs(code):
+    """
+    Returns the ProjCS of a UTM zone.
+
+    Arguments:
+
+    - *code*: The EPSG code of the zone, eg 32633 for zone 33 north.
+
+    Returns:
+
+    - The ProjCS instance, using the Transverse Mercator projection.
+    """
+    code = int(code)
+    crs = _crs.get(code)
+    if crs is None:
+        if not (32601 <= code <= 32660 or 32701 <= code <= 32760):
+            raise ValueError("%i is not the EPSG code of a WGS84 UTM zone" % code)
+        zone, south = code % 100, code > 32700
+        proj4 = "+proj=tmerc +lat_0=0 +lon_0=%i +k=0.9996 +x_0=500000 +y_0=%i +datum=WGS84 +units=m +no_defs" % (zone * 6 - 183, 10000000 if south else 0)
+        crs = _crs[code] = parse.from_proj4(proj4)
+    return crs
+
+def zones(lons, lats):
+    """
+    Finds the UTM zones that points fall in, including the exceptions for southwestern
+    Norway and Svalbard.
+
+    Arguments:
+
+    - *lons*, *lats*: Longitudes and latitudes in degrees.
+
+    Returns:
+
+    - The EPSG codes of the zones.
+    """
+    _require_numpy()
+    lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    lons = (lons + 180) % 360 - 180
+    zone = np.clip(np.floor((lons + 180) / 6).astype(np.int64) + 1, 1, 60)
+    # southwestern norway is part of zone 32
+    zone = np.where((lats >= 56) & (lats < 64) & (lons >= 3) & (lons < 12), 32, zone)
+    # svalbard only uses the odd zones 31 to 37
+    svalbard = (lats >= 72) & (lats < 84) & (lons >= 0) & (lons < 42)
+    zone = np.where(svalbard, np.searchsorted([9, 21, 33], lons, side="right") * 2 + 31, zone)
+    return _result(zone + np.where(lats < 0, 32700, 32600))
+
+def _by_zone(codes, func):
+    """
+    Calls func(code, index) once for each zone, with the indexes of the points in that zone,
+    grouping them with a single sort instead of a pass over all the points per zone.
+    """
+    flat = codes.ravel()
+    order = np.argsort(flat, kind="stable")
+    unique, starts = np.unique(flat[order], return_index=True)
+    ends = np.append(starts[1:], len(flat))
+    for code, start, end in zip(unique, starts, ends):
+        func(code, order[start:end])
+
+def project(lons, lats, codes=None):
+    """
+    Projects points to the UTM zones they fall in, or to the given zones.
+
+    Arguments:
+
+    - *lons*, *lats*: Longitudes and latitudes in degrees.
+    - *codes* (optional): The EPSG codes of the zones to project each point to. If None,
+        each point is projected to the zone it falls in, see zones() (default).
+
+    Returns:
+
+    - A tuple (eastings, northings, codes) of the projected coordinates in meters, and the
+        EPSG codes of the zones.
+    """
+    _require_numpy()
+    lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    if codes is None:
+        codes = np.asarray(zones(lons, lats))
+    else:
+        codes = np.broadcast_to(np.asarray(codes, dtype=np.int64), lons.shape)
+    flatlons, flatlats = lons.ravel(), lats.ravel()
+    eastings = np.empty(flatlons.shape)
+    northings = np.empty(flatlons.shape)
+
+    def _project(code, index):
+        eastings[index], northings[index] = zone_crs(code).project(flatlons[index], flatlats[index])
+
+    _by_zone(codes, _project)
+    return (_result(eastings.reshape(lons.shape)), _result(northings.reshape(lons.shape)),
+            _result(np.array(codes)))
+
+def unproject(eastings, northings, codes):
+    """
+    Unprojects UTM coordinates in any mix of zones to longitudes and latitudes.
+
+    Arguments:
+
+    - *eastings*, *northings*: The projected coordinates in meters.
+    - *codes*: The EPSG codes of the zone of each point.
+
+    Returns:
+
+    - A tuple (lon, lat) of the longitudes and latitudes in degrees.
+    """
+    _require_numpy()
+    eastings, northings, codes = np.broadcast_arrays(np.asarray(eastings, dtype=float),
+                                                     np.asarray(northings, dtype=float),
+                                                     np.asarray(codes, dtype=np.int64))
+    flateast, flatnorth = eastings.ravel(), northings.ravel()
+    lons = np.empty(flateast.shape)
+    lats = np.empty(flateast.shape)
+
+    def _unproject(code, index):
+        lons[index], lats[index] = zone_crs(code).unproject(flateast[index], flatnorth[index])
+
+    _by_zone(codes, _unproject)
+    return _result(lons.reshape(eastings.shape)), _result(lats.reshape(eastings.shape))
@@ -0,0 +1,318 @@
+
+import pycrs
+import gc
+import json
+import timeit
+
+
+
+###########################
+# Sample crs definitions
+
+PROJ4 = [
+    "+proj=robin +lon_0=0 +x_0=0 +y_0=0 +ellps=WGS84 +datum=WGS84 +units=m +no_defs",
+    "+proj=lcc +lat_1=33 +lat_2=45 +lat_0=39 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=us-ft +no_defs",
+    "+proj=tmerc +lat_0=0 +lon_0=9 +k=0.9996 +x_0=500000 +y_0=0 +ellps=intl +towgs84=-87,-98,-121,0,0,0,0 +units=m +no_defs",
+    "+proj=aea +lat_1=24 +lat_2=31.5 +lat_0=24 +lon_0=-84 +x_0=400000 +y_0=0 +ellps=GRS80 +units=m +no_defs",
+    "+proj=stere +lat_0=90 +lat_ts=70 +lon_0=-45 +k=1 +x_0=0 +y_0=0 +ellps=WGS84 +to_meter=2 +no_defs",
+    ]
+
+def sample_crs(n):
+    return [pycrs.parse.from_proj4(PROJ4[i % len(PROJ4)]) for i in range(n)]
+
+
+
+###########################
+# Benchmarks
+
+def bench_memory(n=10000):
+    """Bytes held in memory per parsed ProjCS instance, with attributes in __slots__ and in a __dict__ per instance."""
+    import tracemalloc
+    plainclasses = {}
+    copies = {}
+    def plain(obj):
+        "a copy of an element with its attributes in a __dict__, as all elements had before they used __slots__"
+        if id(obj) in copies:
+            return copies[id(obj)][1]
+        elif isinstance(obj, (pycrs.elements.fields.Slots, pycrs.elements.directions.Direction)):
+            cls = plainclasses.setdefault(type(obj), type(type(obj).__name__, (object,), {}))
+            copy = cls()
+            if isinstance(obj, pycrs.elements.fields.Slots):
+                for name, value in obj.__getstate__().items():
+                    setattr(copy, name, plain(value))
+        elif isinstance(obj, (list, tuple)):
+            copy = (tuple if isinstance(obj, tuple) else list)(plain(item) for item in obj)
+        else:
+            return obj
+        # elements shared between instances stay shared, except directions which were not shared before
+        if not isinstance(obj, pycrs.elements.directions.Direction):
+            copies[id(obj)] = (obj, copy)
+        return copy
+    sample_crs(len(PROJ4)) # warm up any lookup tables
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    crslist = sample_crs(n)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    plainlist = [plain(crs) for crs in crslist]
+    copies.clear()
+    gc.collect()
+    plainafter = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("memory, __dict__ attributes: %i bytes per ProjCS (%i instances)" % ((plainafter - after) / float(n), len(plainlist)))
+    print("memory, __slots__ attributes: %i bytes per ProjCS (%i instances)" % ((after - before) / float(n), len(crslist)))
+
+def bench_cache(n=20000):
+    """Time per ProjCS to write OGC WKT and proj4 when cached, and when rebuilt."""
+    crslist = sample_crs(len(PROJ4))
+    for name, cached, build in [("ogc wkt", lambda crs: crs.to_ogc_wkt(), lambda crs: crs._build_ogc_wkt()),
+                                ("proj4", lambda crs: crs.to_proj4(), lambda crs: " ".join(crs._proj4_entries()))]:
+        [cached(crs) for crs in crslist]
+        hitsecs = timeit.timeit(lambda: [cached(crs) for crs in crslist], number=n) / (n * len(crslist))
+        buildsecs = timeit.timeit(lambda: [build(crs) for crs in crslist], number=n // 10) / (n // 10 * len(crslist))
+        print("%s, cached: %.2f us, rebuilt: %.2f us" % (name, hitsecs * 1e6, buildsecs * 1e6))
+
+def bench_pickle(n=2000):
+    """Size and dump/load time per ProjCS, with pickle and with the binary codec."""
+    import pickle
+    from pycrs import codec
+    crslist = sample_crs(len(PROJ4))
+    # the full nested instance state, as pickled before CS objects had a compact __reduce__
+    def full_dumps(crs):
+        return pickle.dumps((crs.__class__, crs.__getstate__()), pickle.HIGHEST_PROTOCOL)
+    def full_loads(data):
+        cls, state = pickle.loads(data)
+        crs = cls.__new__(cls)
+        crs.__setstate__(state)
+        return crs
+    for name, dumps, loads in [("full pickle", full_dumps, full_loads),
+                               ("pickle", lambda crs: pickle.dumps(crs, pickle.HIGHEST_PROTOCOL), pickle.loads),
+                               ("codec", codec.encode, codec.decode)]:
+        size = sum(len(dumps(crs)) for crs in crslist) / float(len(crslist))
+        secs = timeit.timeit(lambda: [dumps(crs) for crs in crslist], number=n) / (n * len(crslist))
+        data = [dumps(crs) for crs in crslist]
+        loadsecs = timeit.timeit(lambda: [loads(item) for item in data], number=n) / (n * len(crslist))
+        print("%s: %i bytes per ProjCS, dump %.1f us, load %.1f us" % (name, size, secs * 1e6, loadsecs * 1e6))
+
+def bench_projjson(n=2000):
+    """Time per ProjCS to write and parse PROJJSON, compared to OGC WKT."""
+    crslist = sample_crs(len(PROJ4))
+    # the serialization caches are bypassed, to time the actual writing
+    for name, dumps, loads in [("ogc wkt", lambda crs: crs._build_ogc_wkt(), pycrs.parse.from_ogc_wkt),
+                               ("projjson dict", lambda crs: crs.to_projjson(), pycrs.parse.from_projjson),
+                               ("projjson string", lambda crs: json.dumps(crs.to_projjson()), pycrs.parse.from_projjson)]:
+        secs = timeit.timeit(lambda: [dumps(crs) for crs in crslist], number=n) / (n * len(crslist))
+        data = [dumps(crs) for crs in crslist]
+        loadsecs = timeit.timeit(lambda: [loads(item) for item in data], number=n) / (n * len(crslist))
+        print("%s: write %.1f us, parse %.1f us" % (name, secs * 1e6, loadsecs * 1e6))
+
+def bench_translate(n=2000):
+    """Time per ProjCS to translate OGC WKT to ESRI WKT, directly and via the crs objects."""
+    data = [crs.to_ogc_wkt() for crs in sample_crs(len(PROJ4))]
+    for name, func in [("objects", lambda wkt: pycrs.parse.from_ogc_wkt(wkt).to_esri_wkt()),
+                       ("translate", lambda wkt: pycrs.translate.translate(wkt, "esri wkt", "ogc wkt"))]:
+        secs = timeit.timeit(lambda: [func(wkt) for wkt in data], number=n) / (n * len(data))
+        print("ogc wkt to esri wkt, %s: %.1f us" % (name, secs * 1e6))
+
+def bench_peek(n=2000):
+    """Time per ProjCS to read the name and projection, with peek and with full parsing."""
+    crslist = sample_crs(len(PROJ4))
+    for fmt, data in [("ogc wkt", [crs.to_ogc_wkt() for crs in crslist]), ("proj4", PROJ4)]:
+        for name, func in [("parse", pycrs.parse.from_unknown_text),
+                           ("peek", lambda text: pycrs.parse.peek(text, ["name", "projection"]))]:
+            secs = timeit.timeit(lambda: [func(text) for text in data], number=n) / (n * len(data))
+            print("%s, %s: %.1f us" % (fmt, name, secs * 1e6))
+
+def bench_lazy(n=2000):
+    """Time per ProjCS to parse OGC WKT and read the name and projection, eagerly and lazily."""
+    data = [crs.to_ogc_wkt() for crs in sample_crs(len(PROJ4))]
+    for name, lazy in [("eager", False), ("lazy", True)]:
+        def func(wkt):
+            crs = pycrs.parse.from_ogc_wkt(wkt, lazy=lazy)
+            return crs.name, crs.proj
+        secs = timeit.timeit(lambda: [func(wkt) for wkt in data], number=n) / (n * len(data))
+        print("ogc wkt name and projection, %s: %.1f us" % (name, secs * 1e6))
+
+def bench_wkt_bytes(n=2000):
+    """Time per ProjCS to parse OGC WKT given as text, and as bytes in memory."""
+    data = [crs.to_ogc_wkt() for crs in sample_crs(len(PROJ4))]
+    for name, items in [("str", data),
+                        ("bytes", [wkt.encode("utf8") for wkt in data]),
+                        ("memoryview", [memoryview(wkt.encode("utf8")) for wkt in data])]:
+        secs = timeit.timeit(lambda: [pycrs.parse.from_ogc_wkt(item) for item in items], number=n) / (n * len(items))
+        print("ogc wkt from %s: %.1f us" % (name, secs * 1e6))
+
+def bench_catalog(n=20000):
+    """Time per definition to read a text catalog of OGC WKT, in one and in several processes."""
+    import os
+    import tempfile
+    crslist = sample_crs(len(PROJ4))
+    handle, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(handle, "w") as fobj:
+        for i in range(n):
+            fobj.write(crslist[i % len(crslist)].to_ogc_wkt() + "\n")
+    try:
+        for workers in (None, 4):
+            secs = timeit.timeit(lambda: sum(1 for _ in pycrs.load.iter_catalog(path, workers=workers)), number=1) / n
+            print("catalog, %s workers: %.1f us" % (workers or 1, secs * 1e6))
+    finally:
+        os.remove(path)
+
+def bench_ellipsoid(n=100000):
+    """Time to get the derived ellipsoid constants, cached and recalculated."""
+    ellips = sample_crs(1)[0].geogcs.datum.ellips
+    for name, func in [("cached", lambda: ellips.e2),
+                       ("derived", lambda: ellips._derive()["e2"])]:
+        secs = timeit.timeit(func, number=n) / n
+        print("ellipsoid constants, %s: %.2f us" % (name, secs * 1e6))
+
+def bench_geodesic(n=1000000):
+    """Points per second for geodesic distances, and polygon areas of 10 vertex rings."""
+    import numpy as np
+    ellips = pycrs.parse.from_proj4(PROJ4[0]).geogcs.datum.ellips
+    lons = np.random.uniform(-180, 180, n + 1)
+    lats = np.random.uniform(-80, 80, n + 1)
+    secs = timeit.timeit(lambda: ellips.geodesic_inverse(lons[:-1], lats[:-1], lons[1:], lats[1:]), number=1)
+    print("geodesic inverse: %.0f points per second" % (n / secs))
+    secs = timeit.timeit(lambda: ellips.geodesic_direct(lons, lats, 45.0, 100000.0), number=1)
+    print("geodesic direct: %.0f points per second" % (n / secs))
+    secs = timeit.timeit(lambda: ellips.polygon_area(lons, lats, rings=np.arange(0, n, 10)), number=1)
+    print("polygon area: %.0f points per second" % (n / secs))
+
+def bench_units(n=10000000):
+    """Values per second for converting a numpy array from US survey feet to meters."""
+    import numpy as np
+    from pycrs.elements import units
+    values = np.random.uniform(-1e6, 1e6, n)
+    for name, inplace in [("new array", False), ("in place", True)]:
+        secs = timeit.timeit(lambda: units.convert(values, units.US_Feet, units.Meter, inplace=inplace), number=1)
+        print("unit conversion, %s: %.0f values per second" % (name, n / secs))
+
+def bench_geocentric(n=10000000):
+    """Points per second for converting to and from geocentric coordinates."""
+    import numpy as np
+    geogcs = pycrs.parse.from_proj4(PROJ4[0]).geogcs
+    lons = np.random.uniform(-180, 180, n)
+    lats = np.random.uniform(-90, 90, n)
+    heights = np.random.uniform(-100, 1000, n)
+    secs = timeit.timeit(lambda: geogcs.to_geocentric(lons, lats, heights), number=1)
+    print("to geocentric: %.0f points per second" % (n / secs))
+    x, y, z = geogcs.to_geocentric(lons, lats, heights)
+    secs = timeit.timeit(lambda: geogcs.from_geocentric(x, y, z), number=1)
+    print("from geocentric: %.0f points per second" % (n / secs))
+
+def bench_kernels(n=10000):
+    """Time to project small batches of points, and points per second for large arrays."""
+    import numpy as np
+    # the lcc and tmerc samples, and their central meridians
+    for proj4, lon0 in ((PROJ4[1], -96), (PROJ4[2], 9)):
+        crs = pycrs.parse.from_proj4(proj4)
+        name = crs.proj.__class__.__name__
+        for size in (10, 1000):
+            lons = np.random.uniform(lon0 - 5, lon0 + 5, size)
+            lats = np.random.uniform(30, 50, size)
+            secs = timeit.timeit(lambda: crs.project(lons, lats), number=n) / n
+            kernel = pycrs.kernels.compile(crs)
+            kernelsecs = timeit.timeit(lambda: kernel.forward(lons, lats), number=n) / n
+            print("%s, %i points: %.1f us, kernel only: %.1f us" % (name, size, secs * 1e6, kernelsecs * 1e6))
+        lons = np.random.uniform(lon0 - 5, lon0 + 5, 1000000)
+        lats = np.random.uniform(30, 50, 1000000)
+        secs = timeit.timeit(lambda: crs.project(lons, lats), number=1)
+        print("%s: %.0f points per second" % (name, 1000000 / secs))
+
+def bench_web_mercator(n=10000000):
+    """Points per second for projecting to web mercator and finding map tiles."""
+    import numpy as np
+    from pycrs import tiles
+    crs = tiles.web_mercator()
+    lons = np.random.uniform(-180, 180, n)
+    lats = np.random.uniform(-85, 85, n)
+    secs = timeit.timeit(lambda: crs.project(lons, lats), number=1)
+    print("web mercator project: %.0f points per second" % (n / secs))
+    x, y = crs.project(lons, lats)
+    secs = timeit.timeit(lambda: crs.unproject(x, y), number=1)
+    print("web mercator unproject: %.0f points per second" % (n / secs))
+    secs = timeit.timeit(lambda: tiles.lonlat_to_tile(lons, lats, 12), number=1)
+    print("lonlat to tile: %.0f points per second" % (n / secs))
+
+def bench_utm(n=1000000):
+    """Points per second for projecting to UTM, for points in one zone and spread over all zones."""
+    import numpy as np
+    from pycrs import utm
+    for name, lons, lats in [("one zone", np.random.uniform(6, 12, n), np.random.uniform(40, 50, n)),
+                             ("all zones", np.random.uniform(-180, 180, n), np.random.uniform(-80, 84, n))]:
+        secs = timeit.timeit(lambda: utm.project(lons, lats), number=1)
+        print("utm, %s: %.0f points per second" % (name, n / secs))
+
+def bench_bbox(n=10000):
+    """Boxes per second for transforming bounding boxes with densified edges."""
+    import numpy as np
+    wgs84 = pycrs.parse.from_proj4("+proj=longlat +datum=WGS84 +no_defs")
+    crs = pycrs.parse.from_proj4(PROJ4[1])
+    corners = np.column_stack([np.random.uniform(-120, -80, n), np.random.uniform(25, 45, n)])
+    bboxes = np.column_stack([corners, corners + np.random.uniform(0.1, 10, (n, 2))])
+    secs = timeit.timeit(lambda: pycrs.transform.transform_bbox(wgs84, crs, bboxes), number=1)
+    print("bbox transform: %.0f boxes per second" % (n / secs))
+
+def bench_grid(width=2000, height=1000):
+    """Grid points per second for approximate and exact transformation of a regular grid."""
+    import numpy as np
+    wgs84 = pycrs.parse.from_proj4("+proj=longlat +datum=WGS84 +no_defs")
+    crs = pycrs.parse.from_proj4(PROJ4[1])
+    lons = np.linspace(-125, -66, width)
+    lats = np.linspace(50, 24, height)
+    secs = timeit.timeit(lambda: pycrs.transform.transform_grid(wgs84, crs, lons, lats, max_error=100), number=1)
+    print("approximate grid transform: %.0f points per second" % (width * height / secs))
+    secs = timeit.timeit(lambda: pycrs.transform.transform(wgs84, crs, *np.meshgrid(lons, lats)), number=1)
+    print("exact grid transform: %.0f points per second" % (width * height / secs))
+
+def bench_gridshift(n=1000000):
+    """Points per second for shifting points with a memory-mapped NTv2 grid, forward and inverse."""
+    import os
+    import tempfile
+    import numpy as np
+    from testgridshift import write_ntv2
+    handle, path = tempfile.mkstemp(suffix=".gsb")
+    os.close(handle)
+    # a single grid over the conterminous us with smoothly varying shifts, at 5 minute spacing
+    lats, lons = np.meshgrid(np.linspace(20, 50, 361), np.linspace(60, 130, 841), indexing="ij")
+    latshifts = 0.5 + 0.1 * np.sin(np.radians(lons * 5))
+    lonshifts = -2 + 0.05 * (lats - 20) + 0.1 * np.cos(np.radians(lats * 5))
+    write_ntv2(path, [("GRID", "NONE", 20, 50, 60, 130, 300, latshifts, lonshifts)])
+    grid = pycrs.gridshift.GridShift(path)
+    try:
+        lons = np.random.uniform(-125, -66, n)
+        lats = np.random.uniform(24, 49, n)
+        for name, func in [("forward", grid.forward), ("inverse", grid.inverse)]:
+            secs = timeit.timeit(lambda: func(lons, lats), number=1)
+            print("ntv2 grid shift, %s: %.0f points per second" % (name, n / secs))
+    finally:
+        grid.close()
+        os.remove(path)
+
+
+###########################
+# Run all
+
+if __name__ == "__main__":
+    bench_memory()
+    bench_cache()
+    bench_pickle()
+    bench_projjson()
+    bench_translate()
+    bench_peek()
+    bench_lazy()
+    bench_wkt_bytes()
+    bench_catalog()
+    bench_ellipsoid()
+    bench_geodesic()
+    bench_units()
+    bench_geocentric()
+    bench_kernels()
+    bench_web_mercator()
+    bench_utm()
+    bench_bbox()
+    bench_grid()
+    bench_gridshift()
+
@@ -0,0 +1,62 @@
+"""
+Tests that the values stored by CS instances, such as their serialized strings, are
+cleared when their elements change, and only then. Run directly, or with pytest.
+"""
+
+import gc
+
+import pycrs
+from pycrs.elements import fields
+
+PROJ4 = "+proj=robin +lon_0=10 +datum=WGS84 +units=m +no_defs"
+
+
+def test_nested():
+    crs = pycrs.parse.from_proj4(PROJ4)
+    assert "+lon_0=10 " in crs.to_proj4()
+    crs.params[0].value = 12.5
+    assert "+lon_0=12.5 " in crs.to_proj4()
+    crs.geogcs.datum.ellips.semimaj_ax.value = 6378000.0
+    assert "6378000" in crs.to_ogc_wkt()
+    crs.params.append(pycrs.elements.parameters.ScalingFactor(0.9))
+    assert "+k_0=0.9 " in crs.to_proj4()
+    del crs.params[-1]
+    assert "+k_0" not in crs.to_proj4()
+
+def test_independent():
+    # changing one crs leaves the values stored by other crs instances alone
+    crs, other = pycrs.parse.from_proj4(PROJ4), pycrs.parse.from_proj4(PROJ4)
+    crs.to_proj4(), other.to_proj4()
+    version = fields.version()
+    crs.params[0].value = 12.5
+    assert other._cache and fields.version() == version
+    assert "+lon_0=12.5 " in crs.to_proj4() and "+lon_0=10 " in other.to_proj4()
+
+def test_shared():
+    # elements that are part of several crs instances clear the values stored by all of them
+    crs, other = pycrs.parse.from_proj4(PROJ4), pycrs.parse.from_proj4(PROJ4)
+    other.params[0] = crs.params[0]
+    crs.to_proj4(), other.to_proj4()
+    crs.params[0].value = 12.5
+    assert "+lon_0=12.5 " in crs.to_proj4() and "+lon_0=12.5 " in other.to_proj4()
+
+def test_reused():
+    # elements are taken over from crs instances that no longer exist
+    crs = pycrs.parse.from_proj4(PROJ4)
+    param = crs.params[0]
+    crs.to_proj4()
+    del crs
+    gc.collect()
+    other = pycrs.parse.from_proj4(PROJ4)
+    other.params[0] = param
+    other.to_proj4()
+    version = fields.version()
+    param.value = 12.5
+    assert "+lon_0=12.5 " in other.to_proj4() and fields.version() == version
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
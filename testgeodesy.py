@@ -0,0 +1,123 @@
+"""
+Tests the geodesic calculations against reference values computed with GeographicLib
+for the WGS84 ellipsoid. Run directly, or with pytest.
+"""
+
+import math
+
+import pycrs
+from pycrs import geodesy
+
+ELLIPS = pycrs.parse.from_proj4("+proj=longlat +datum=WGS84 +no_defs").datum.ellips
+
+# the tolerances of Vincenty's formulae against GeographicLib, in meters and degrees
+DISTANCE_TOL = 1e-4
+AZIMUTH_TOL = 1e-7
+POSITION_TOL = 1e-8
+
+# lon1, lat1, lon2, lat2, distance, azi1, azi2
+INVERSE = [
+    (10, 50, 10.001, 50.0005, 90.737006, 52.1986711425, 52.1994371898),
+    (-0.1278, 51.5074, 2.3522, 48.8566, 343923.120091, 148.0459280393, 149.9514052963),
+    (-74.006, 40.7128, 139.6917, 35.6895, 10872799.519317, -26.9982498282, -154.9259712189),
+    (151.2093, -33.8688, -70.6693, -33.4489, 11368984.480281, 145.3344889482, 34.4737392793),
+    (179.5, 10, -179.5, -10, 2214481.072107, 177.1039951317, 177.1039951317),
+    (0, 89.9, 180, 89.9, 22338.795683, 0.0, 180.0),
+    (-60, -89, 120, -89.5, 167540.840362, 180.0, 0.0),
+    (0, 0, 90, 0, 10018754.171395, 90.0, 90.0),
+    (0, 0, 179, 0, 19926188.851996, 90.0, 90.0),
+    (30, 0, 30, 60, 6654072.819491, 0.0, 0.0),
+    # nearly antipodal pairs that still converge
+    (0, 0, 179.5, 0.5, 19936288.578965, 25.6718728683, 154.3270854699),
+    (0, 10, 180, -9.99, 20002825.381306, 0.0, 180.0),
+    (-45, -20, 134, 19.8, 19924057.424219, 113.6693877395, 66.1670566358),
+]
+
+# nearly antipodal pairs that Vincenty's formulae do not converge for
+NEARLY_ANTIPODAL = [
+    (0, -30, 179.8, 29.9, 19989832.82761, 161.8905247363, 18.0907372457),
+    (0, 0, 179.7, 0, 19995624.889961, 29.8287683957, 150.1712316043),
+    (0, 0, 179.9, 0.1, 19992082.107914, 8.1737077117, 171.8262798377),
+    (0, 0, 179.98, 0.0, 20003894.536733, 1.9007055268, 178.0992944732),
+]
+
+# lon1, lat1, azi1, distance, lon2, lat2, azi2
+DIRECT = [
+    (10, 50, 45, 1000, 10.009863904, 50.0063567897, 45.0075565406),
+    (-74.006, 40.7128, -27, 10872799.519317, 139.6936364354, 35.6887608394, -154.9246112991),
+    (0, 0, 90, 20003931, 179.6983695977, -0.0, 90.0),
+    (0, 0, 0, 10001965.729, 0.0, 89.9999999972, 0.0),
+    (179.9, -45, 120, 500000, -174.3913105796, -47.1101334888, 115.8873616895),
+    (-120, 89.5, 10, 300000, 47.7347914231, 87.8047662666, 177.7327561686),
+    (0, -30, 161.8905247363, 19989832.82761, 179.8, 29.9, 18.0907372458),
+    (20, 5, -135, 19990000, -159.592479953, -4.9825193816, -44.9984835144),
+]
+
+
+def _angle_diff(a, b):
+    "the difference between two angles in degrees, so that eg 180 and -180 are the same"
+    return abs((a - b + 180) % 360 - 180)
+
+def test_inverse():
+    for lon1, lat1, lon2, lat2, distance, azi1, azi2 in INVERSE:
+        result = geodesy.inverse(ELLIPS, lon1, lat1, lon2, lat2)
+        assert abs(result[0] - distance) < DISTANCE_TOL, (lon1, lat1, lon2, lat2, result)
+        assert _angle_diff(result[1], azi1) < AZIMUTH_TOL, (lon1, lat1, lon2, lat2, result)
+        assert _angle_diff(result[2], azi2) < AZIMUTH_TOL, (lon1, lat1, lon2, lat2, result)
+
+def test_inverse_coincident():
+    distance, azi1, azi2 = geodesy.inverse(ELLIPS, 12.5, 41.9, 12.5, 41.9)
+    assert distance == 0
+
+def test_inverse_nearly_antipodal():
+    # pairs that do not converge must give NaN rather than a wrong distance
+    for lon1, lat1, lon2, lat2, distance, azi1, azi2 in NEARLY_ANTIPODAL:
+        result = geodesy.inverse(ELLIPS, lon1, lat1, lon2, lat2)
+        if math.isnan(result[0]):
+            assert math.isnan(result[1]) and math.isnan(result[2])
+        else:
+            assert abs(result[0] - distance) < DISTANCE_TOL, (lon1, lat1, lon2, lat2, result)
+            assert _angle_diff(result[1], azi1) < AZIMUTH_TOL, (lon1, lat1, lon2, lat2, result)
+
+def test_inverse_arrays():
+    # all pairs at once give the same results as one by one
+    rows = INVERSE + NEARLY_ANTIPODAL
+    lon1, lat1, lon2, lat2 = [[row[i] for row in rows] for i in range(4)]
+    distances, azi1s, azi2s = geodesy.inverse(ELLIPS, lon1, lat1, lon2, lat2)
+    assert distances.shape == (len(rows),)
+    for i, row in enumerate(rows):
+        distance, azi1, azi2 = geodesy.inverse(ELLIPS, *row[:4])
+        if math.isnan(distance):
+            assert math.isnan(distances[i])
+        else:
+            assert abs(distances[i] - distance) < 1e-6 and _angle_diff(azi1s[i], azi1) < 1e-10
+
+def test_direct():
+    for lon1, lat1, azi1, distance, lon2, lat2, azi2 in DIRECT:
+        result = geodesy.direct(ELLIPS, lon1, lat1, azi1, distance)
+        assert _angle_diff(result[0], lon2) < POSITION_TOL, (lon1, lat1, azi1, distance, result)
+        assert abs(result[1] - lat2) < POSITION_TOL, (lon1, lat1, azi1, distance, result)
+        assert _angle_diff(result[2], azi2) < AZIMUTH_TOL, (lon1, lat1, azi1, distance, result)
+
+def test_direct_arrays():
+    lon1, lat1, azi1, distance = [[row[i] for row in DIRECT] for i in range(4)]
+    lon2, lat2, azi2 = geodesy.direct(ELLIPS, lon1, lat1, azi1, distance)
+    for i, row in enumerate(DIRECT):
+        assert _angle_diff(lon2[i], row[4]) < POSITION_TOL and abs(lat2[i] - row[5]) < POSITION_TOL
+
+def test_round_trip():
+    # the direct problem from the inverse solution arrives at the second point
+    for lon1, lat1, lon2, lat2, distance, azi1, azi2 in INVERSE:
+        distance, azi1, azi2 = geodesy.inverse(ELLIPS, lon1, lat1, lon2, lat2)
+        result = geodesy.direct(ELLIPS, lon1, lat1, azi1, distance)
+        assert abs(result[1] - lat2) < POSITION_TOL, (lon1, lat1, lon2, lat2, result)
+        # longitudes are meaningless at the poles
+        if abs(lat2) < 89:
+            assert _angle_diff(result[0], lon2) < POSITION_TOL, (lon1, lat1, lon2, lat2, result)
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
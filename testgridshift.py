@@ -0,0 +1,202 @@
+"""
+Tests NTv2 grid shifts and datum shifts in transformations, on small grid files with
+known shifts that are written by write_ntv2(). Run directly, or with pytest.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+import pycrs
+from pycrs import gridshift
+from pycrs import transform
+
+NAD27_WKT = ('GEOGCS["NAD27",DATUM["North_American_Datum_1927",SPHEROID["Clarke 1866",6378206.4,294.9786982138982,'
+             'AUTHORITY["EPSG","7008"]],AUTHORITY["EPSG","6267"]],PRIMEM["Greenwich",0],'
+             'UNIT["degree",0.0174532925199433],AUTHORITY["EPSG","4267"]]')
+
+
+def write_ntv2(savepath, subgrids, source="NAD27", target="NAD83", endian="<"):
+    """
+    Writes an NTv2 grid shift file with shifts in arc-seconds.
+
+    Arguments:
+
+    - *savepath*: The filepath to save the file to.
+    - *subgrids*: List of (name, parent, south, north, east, west, inc, latshifts, lonshifts)
+        tuples, with the bounds in degrees positive north and west, the spacing in arc-seconds,
+        and the shifts as arrays of rows from south to north, with columns from east to west.
+        Longitude shifts are positive west.
+    - *source*, *target* (optional): The datum names of the grid (defaults to NAD27 to NAD83).
+    - *endian* (optional): The byte order, "<" or ">" (defaults to little-endian).
+    """
+    def record(label, value):
+        if isinstance(value, int):
+            return label.ljust(8).encode("ascii") + struct.pack(endian + "i4x", value)
+        elif isinstance(value, float):
+            return label.ljust(8).encode("ascii") + struct.pack(endian + "d", value)
+        return label.ljust(8).encode("ascii") + value.ljust(8).encode("ascii")
+    with open(savepath, "wb") as fobj:
+        for label, value in [("NUM_OREC", 11), ("NUM_SREC", 11), ("NUM_FILE", len(subgrids)), ("GS_TYPE", "SECONDS"),
+                             ("VERSION", "NTv2.0"), ("SYSTEM_F", source), ("SYSTEM_T", target),
+                             ("MAJOR_F", 6378206.4), ("MINOR_F", 6356583.8), ("MAJOR_T", 6378137.0), ("MINOR_T", 6356752.314)]:
+            fobj.write(record(label, value))
+        for name, parent, south, north, east, west, inc, latshifts, lonshifts in subgrids:
+            nodes = np.zeros(latshifts.shape + (4,), dtype=endian + "f4")
+            nodes[..., 0] = latshifts
+            nodes[..., 1] = lonshifts
+            for label, value in [("SUB_NAME", name), ("PARENT", parent), ("CREATED", ""), ("UPDATED", ""),
+                                 ("S_LAT", south * 3600.0), ("N_LAT", north * 3600.0), ("E_LONG", east * 3600.0),
+                                 ("W_LONG", west * 3600.0), ("LAT_INC", float(inc)), ("LONG_INC", float(inc)),
+                                 ("GS_COUNT", nodes.shape[0] * nodes.shape[1])]:
+                fobj.write(record(label, value))
+            fobj.write(nodes.tobytes())
+        fobj.write(record("END", ""))
+
+
+# a one degree parent grid from 40N to 44N and 70W to 76W, with bilinear shifts, so that
+# the interpolated shifts between nodes are exact
+def _parent_latshift(x, y):
+    return 0.25 * y + 0.5 * x + 0.125 * x * y
+
+def _parent_lonshift(x, y):
+    return 1 + 0.25 * x - 0.5 * y
+
+_rows, _cols = np.meshgrid(np.arange(5.0), np.arange(7.0), indexing="ij")
+PARENT = ("PARENT", "NONE", 40, 44, 70, 76, 3600, _parent_latshift(_cols, _rows), _parent_lonshift(_cols, _rows))
+
+# a denser child grid from 41N to 42N and 72W to 73W, with constant shifts
+CHILD = ("CHILD", "PARENT", 41, 42, 72, 73, 900, np.full((5, 5), 10.0), np.full((5, 5), -3.0))
+
+
+def _expected(lons, lats):
+    "the shifts in degrees positive east and north at points in the parent grid"
+    x, y = -np.asarray(lons) - 70, np.asarray(lats) - 40
+    return -_parent_lonshift(x, y) / 3600.0, _parent_latshift(x, y) / 3600.0
+
+class _Grids(object):
+    "writes grid files to a temporary folder, and removes them again"
+
+    def __enter__(self):
+        self.folder = tempfile.mkdtemp()
+        self.grids = []
+        return self
+
+    def open(self, subgrids, **kwargs):
+        path = os.path.join(self.folder, "%i.gsb" % len(self.grids))
+        write_ntv2(path, subgrids, **kwargs)
+        grid = gridshift.GridShift(path)
+        self.grids.append(grid)
+        return grid
+
+    def __exit__(self, *exc):
+        for grid in self.grids:
+            grid.close()
+        shutil.rmtree(self.folder)
+
+def test_nodes():
+    with _Grids() as grids:
+        grid = grids.open([PARENT])
+        assert grid.source == "NAD27" and grid.target == "NAD83"
+        assert grid.names == ["PARENT"]
+        assert grid.bounds.tolist() == [[-76, 40, -70, 44]]
+        for row in range(5):
+            for col in range(7):
+                dlon, dlat = grid.shifts(-70 - col, 40 + row)
+                assert abs(dlat - _parent_latshift(col, row) / 3600.0) < 1e-15
+                assert abs(dlon + _parent_lonshift(col, row) / 3600.0) < 1e-15
+
+def test_between_nodes():
+    with _Grids() as grids:
+        grid = grids.open([PARENT])
+        lons = np.array([-70.5, -73.25, -75.9, -71.1, -76])
+        lats = np.array([40.5, 43.75, 41.3, 44, 42.2])
+        dlons, dlats = grid.shifts(lons, lats)
+        expected = _expected(lons, lats)
+        assert np.abs(dlons - expected[0]).max() < 1e-15
+        assert np.abs(dlats - expected[1]).max() < 1e-15
+
+def test_outside():
+    with _Grids() as grids:
+        grid = grids.open([PARENT])
+        dlons, dlats = grid.forward([-69.9, -73, -80], [42, 39.9, 42])
+        assert np.isnan(dlons).all() and np.isnan(dlats).all()
+
+def test_sub_grids():
+    # points in the child grid are shifted with it, and the others with the parent
+    with _Grids() as grids:
+        grid = grids.open([PARENT, CHILD])
+        assert grid.names == ["PARENT", "CHILD"]
+        lons = np.array([-72.5, -72, -73, -71.5, -74.5])
+        lats = np.array([41.5, 41, 42, 41.5, 43.25])
+        dlons, dlats = grid.shifts(lons, lats)
+        assert np.abs(dlons[:3] - 3 / 3600.0).max() < 1e-15
+        assert np.abs(dlats[:3] - 10 / 3600.0).max() < 1e-15
+        expected = _expected(lons[3:], lats[3:])
+        assert np.abs(dlons[3:] - expected[0]).max() < 1e-15
+        assert np.abs(dlats[3:] - expected[1]).max() < 1e-15
+
+def test_big_endian():
+    with _Grids() as grids:
+        little = grids.open([PARENT, CHILD])
+        big = grids.open([PARENT, CHILD], endian=">")
+        with open(big.filepath, "rb") as fobj:
+            assert struct.unpack(">i", fobj.read(12)[8:])[0] == 11
+        assert big.source == "NAD27" and big.names == ["PARENT", "CHILD"]
+        assert big.bounds.tolist() == little.bounds.tolist()
+        lons = np.linspace(-76, -70, 25)
+        lats = np.linspace(40, 44, 25)
+        for ours, theirs in zip(big.shifts(lons, lats), little.shifts(lons, lats)):
+            assert (ours == theirs).all()
+
+def test_inverse():
+    # points away from the edges of the child grid, where the shifts jump
+    with _Grids() as grids:
+        grid = grids.open([PARENT, CHILD])
+        lons, lats = np.meshgrid(np.linspace(-75.9, -70.1, 30), np.linspace(42.5, 43.9, 10))
+        lons = np.append(lons.ravel(), -72.5)
+        lats = np.append(lats.ravel(), 41.5)
+        shifted = grid.forward(lons, lats)
+        assert np.abs(shifted[0] - lons).min() > 0
+        back = grid.inverse(*shifted)
+        assert np.abs(back[0] - lons).max() < 1e-11
+        assert np.abs(back[1] - lats).max() < 1e-11
+
+def test_transform():
+    # the datums of the coordinate systems are matched to the grid by any of their names
+    nad27 = pycrs.parse.from_ogc_wkt(NAD27_WKT)
+    nad83 = pycrs.parse.from_proj4("+proj=longlat +datum=NAD83 +no_defs")
+    with _Grids() as grids:
+        grid = grids.open([PARENT])
+        lons, lats = np.array([-70.5, -73.25]), np.array([40.5, 43.75])
+        shifted = transform.transform(nad27, nad83, lons, lats, gridshift=grid)
+        expected = grid.forward(lons, lats)
+        assert np.abs(shifted[0] - expected[0]).max() < 1e-11 and np.abs(shifted[1] - expected[1]).max() < 1e-11
+        back = transform.transform(nad83, nad27, shifted[0], shifted[1], gridshift=grid)
+        assert np.abs(back[0] - lons).max() < 1e-11 and np.abs(back[1] - lats).max() < 1e-11
+        try:
+            transform.transform(nad27, nad27, lons, lats, gridshift=grid)
+        except ValueError:
+            pass
+        else:
+            assert False, "a grid between other datums should raise ValueError"
+
+def test_transform_names():
+    # grids can name their datums like any of the crs formats do
+    nad27 = pycrs.parse.from_ogc_wkt(NAD27_WKT)
+    nad83 = pycrs.parse.from_proj4("+proj=longlat +datum=NAD83 +no_defs")
+    with _Grids() as grids:
+        grid = grids.open([PARENT], source="nad_27", target="NAD 83")
+        shifted = transform.transform(nad27, nad83, -73.25, 43.75, gridshift=grid)
+        expected = grid.forward(-73.25, 43.75)
+        assert abs(shifted[0] - expected[0]) < 1e-11 and abs(shifted[1] - expected[1]) < 1e-11
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
@@ -0,0 +1,73 @@
+"""
+Tests that interning shares parsed CS instances, while copies stay independent of the
+canonical instances. Run directly, or with pytest.
+"""
+
+import copy
+import pickle
+
+import pycrs
+from pycrs import codec
+from pycrs import interning
+
+PROJ4 = "+proj=robin +lon_0=10 +datum=WGS84 +units=m +no_defs"
+
+
+class _Interning(object):
+    "enables interning with a fresh pool, and disables it again"
+
+    def __enter__(self):
+        self.pool = interning.InternPool()
+        interning.enable(self.pool)
+        return self.pool
+
+    def __exit__(self, *exc):
+        interning.disable()
+
+def _assert_independent(crs, other):
+    assert other is not crs
+    assert other.to_proj4() == crs.to_proj4()
+    other.params[0].value = 12.5
+    assert other.to_proj4() != crs.to_proj4()
+    assert crs.params[0].value == 10
+
+def test_parse():
+    with _Interning():
+        crs = pycrs.parse.from_proj4(PROJ4)
+        assert pycrs.parse.from_proj4(PROJ4) is crs
+        assert codec.decode(codec.encode(crs)) is crs
+
+def test_copy():
+    with _Interning():
+        crs = pycrs.parse.from_proj4(PROJ4)
+        _assert_independent(crs, copy.copy(crs))
+
+def test_deepcopy():
+    with _Interning():
+        crs = pycrs.parse.from_proj4(PROJ4)
+        _assert_independent(crs, copy.deepcopy(crs))
+        # the canonical instance is still the one returned by parsing
+        assert pycrs.parse.from_proj4(PROJ4) is crs
+
+def test_pickle():
+    with _Interning():
+        crs = pycrs.parse.from_proj4(PROJ4)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            _assert_independent(crs, pickle.loads(pickle.dumps(crs, protocol)))
+        geogcs = pycrs.parse.from_proj4("+proj=longlat +datum=WGS84 +no_defs")
+        other = pickle.loads(pickle.dumps(geogcs))
+        assert other is not geogcs and other.to_proj4() == geogcs.to_proj4()
+
+def test_from_tuple():
+    with _Interning():
+        crs = pycrs.parse.from_proj4(PROJ4)
+        encoded = codec.to_tuple(crs)
+        _assert_independent(crs, codec.from_tuple(encoded))
+        assert codec.from_tuple(encoded, intern=True) is crs
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
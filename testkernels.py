@@ -0,0 +1,50 @@
+"""
+Tests projecting coordinates with compiled kernels against the worked examples of the
+EPSG guidance note 7-2. Run directly, or with pytest.
+"""
+
+import pycrs
+
+# Lambert Conic Conformal (2SP), Texas South Central on NAD27 in US survey feet, with the
+# false easting of 2000000 US survey feet given in meters as proj4 does
+TEXAS_PROJ4 = ("+proj=lcc +lat_1=28.38333333333333 +lat_2=30.28333333333333 +lat_0=27.83333333333333 "
+               "+lon_0=-99 +x_0=609601.2192 +y_0=0 +datum=NAD27 +units=us-ft +no_defs")
+TEXAS_WKT = ('PROJCS["NAD27 / Texas South Central",GEOGCS["NAD27",DATUM["North_American_Datum_1927",'
+             'SPHEROID["Clarke 1866",6378206.4,294.9786982138982]],PRIMEM["Greenwich",0],'
+             'UNIT["degree",0.0174532925199433]],PROJECTION["Lambert_Conformal_Conic"],'
+             'PARAMETER["standard_parallel_1",28.38333333333333],PARAMETER["standard_parallel_2",30.28333333333333],'
+             'PARAMETER["latitude_of_origin",27.83333333333333],PARAMETER["central_meridian",-99],'
+             'PARAMETER["false_easting",2000000],PARAMETER["false_northing",0],'
+             'UNIT["US survey foot",0.3048006096012192]]')
+TEXAS_LONLAT = (-96.0, 28.5)
+TEXAS_XY = (2963503.91, 254759.80)
+
+
+def test_us_feet_proj4():
+    crs = pycrs.parse.from_proj4(TEXAS_PROJ4)
+    x, y = crs.project(*TEXAS_LONLAT)
+    assert abs(x - TEXAS_XY[0]) < 0.01 and abs(y - TEXAS_XY[1]) < 0.01, (x, y)
+    lon, lat = crs.unproject(*TEXAS_XY)
+    assert abs(lon - TEXAS_LONLAT[0]) < 1e-7 and abs(lat - TEXAS_LONLAT[1]) < 1e-7, (lon, lat)
+
+def test_us_feet_wkt():
+    crs = pycrs.parse.from_ogc_wkt(TEXAS_WKT)
+    x, y = crs.project(*TEXAS_LONLAT)
+    assert abs(x - TEXAS_XY[0]) < 0.01 and abs(y - TEXAS_XY[1]) < 0.01, (x, y)
+
+def test_us_feet_formats():
+    # the false easting is in meters in proj4, and in the unit of the crs in wkt
+    crs = pycrs.parse.from_proj4(TEXAS_PROJ4)
+    assert "+x_0=609601.2192 " in crs.to_proj4()
+    wkt = pycrs.parse.from_ogc_wkt(crs.to_ogc_wkt())
+    easting = [param for param in wkt.params if isinstance(param, pycrs.elements.parameters.FalseEasting)][0]
+    assert abs(easting.value - 2000000) < 1e-4
+    assert "+x_0=609601.2192 " in wkt.to_proj4()
+    assert abs(pycrs.parse.from_ogc_wkt(TEXAS_WKT).project(*TEXAS_LONLAT)[0] - crs.project(*TEXAS_LONLAT)[0]) < 1e-4
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
@@ -0,0 +1,43 @@
+"""
+Tests the web mercator tile math. Run directly, or with pytest.
+"""
+
+import numpy as np
+
+from pycrs import tiles
+
+
+def test_bounds_last_column():
+    # the east edge of the last column is the antimeridian, not wrapped around to -180
+    for zoom in range(21):
+        last = 2**zoom - 1
+        xmin, ymin, xmax, ymax = tiles.tile_bounds(last, last // 2, zoom, lonlat=True)
+        assert xmax == 180, (zoom, xmax)
+        assert xmin == 180 - 360.0 / 2**zoom, (zoom, xmin)
+        assert ymin < ymax
+    xmin, ymin, xmax, ymax = tiles.tile_bounds(7, 7, 3, lonlat=True)
+    assert (xmin, xmax) == (135, 180)
+
+def test_bounds_lonlat():
+    # the same as unprojecting the web mercator bounds, where longitudes can wrap around
+    tx, ty = np.meshgrid(np.arange(16), np.arange(16))
+    lonlat = tiles.tile_bounds(tx, ty, 4, lonlat=True)
+    xmin, ymin, xmax, ymax = tiles.tile_bounds(tx, ty, 4)
+    crs = tiles.web_mercator()
+    for ours, theirs in zip(lonlat, crs.unproject(xmin, ymin) + crs.unproject(xmax, ymax)):
+        assert np.abs((ours - theirs + 180) % 360 - 180).max() < 1e-9
+    assert (lonlat[0][:, 0] == -180).all() and (lonlat[2][:, -1] == 180).all()
+    assert abs(lonlat[1].min() + tiles.MAX_LATITUDE) < 1e-9 and abs(lonlat[3].max() - tiles.MAX_LATITUDE) < 1e-9
+
+def test_roundtrip():
+    # the centers of tiles are found in those tiles again
+    lons, lats = tiles.tile_to_lonlat(np.arange(8) + 0.5, np.arange(8) + 0.5, 3)
+    tx, ty = tiles.lonlat_to_tile(lons, lats, 3)
+    assert tx.tolist() == list(range(8)) and ty.tolist() == list(range(8))
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)
@@ -0,0 +1,60 @@
+"""
+Tests transforming coordinates, grids and bounding boxes between coordinate systems,
+against transforming every point exactly. Run directly, or with pytest.
+"""
+
+import warnings
+
+import numpy as np
+
+import pycrs
+from pycrs import transform
+
+WGS84 = pycrs.parse.from_proj4("+proj=longlat +datum=WGS84 +no_defs")
+WEB_MERCATOR = pycrs.tiles.web_mercator()
+LCC = pycrs.parse.from_proj4("+proj=lcc +lat_1=33 +lat_2=45 +lat_0=39 +lon_0=-96 +x_0=0 +y_0=0 +datum=NAD83 +units=m +no_defs")
+
+
+def _grid_error(from_crs, to_crs, xs, ys, max_error):
+    "the largest errors of transform_grid(), as reported and against the exact transformation"
+    x, y, error = transform.transform_grid(from_crs, to_crs, xs, ys, max_error)
+    exact = transform.transform(from_crs, to_crs, *np.meshgrid(xs, ys))
+    return error, max(np.abs(x - exact[0]).max(), np.abs(y - exact[1]).max())
+
+def test_grid_equator():
+    # latitudes are odd-symmetric about the equator, so cells across it interpolate exactly
+    # at their centers and the middle of their edges, but not in between
+    for extent in (20037508.34, 2000000):
+        xs = np.linspace(-extent, extent, 801)
+        ys = np.linspace(extent, -extent, 801)
+        error, real = _grid_error(WEB_MERCATOR, WGS84, xs, ys, 1e-6)
+        assert real <= 1e-6, (extent, error, real)
+        assert error <= 1e-6
+
+def test_grid_offset():
+    # a grid that is not symmetric about the equator, with cells that do get interpolated
+    xs = np.linspace(-1000000, 3000000, 517)
+    ys = np.linspace(3500000, -500000, 301)
+    error, real = _grid_error(WEB_MERCATOR, WGS84, xs, ys, 1e-4)
+    assert 0 < error <= 1e-4 and real <= 1e-4, (error, real)
+
+def test_grid_projected():
+    lons = np.linspace(-125, -66, 1000)
+    lats = np.linspace(50, 24, 500)
+    error, real = _grid_error(WGS84, LCC, lons, lats, 10)
+    assert real <= 10, (error, real)
+
+def test_bbox_poles():
+    # the poles are infinitely far away in mercator, which is expected and not warned about
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        bbox = transform.transform_bbox(WGS84, WEB_MERCATOR, [-10, -80, 10, 80])
+        assert abs(bbox[3] - 15538711.096309722) < 1e-6, bbox
+        assert WEB_MERCATOR.project(0.0, 90.0)[1] == float("inf")
+
+
+if __name__ == "__main__":
+    for name, func in sorted(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print("%s passed" % name)